@@ -1,5 +1,7 @@
-import random, time, json, os, requests, pytz, sys
+import random, time, json, os, requests, pytz, sys, importlib, asyncio, threading, sqlite3
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
 from Crypto.PublicKey import RSA
 from Crypto.Cipher import PKCS1_v1_5
 from Crypto.Cipher import AES
@@ -11,6 +13,21 @@ import hashlib
 import uuid
 from urllib.parse import urlencode, parse_qs, urlparse
 import yaml
+from checkin_result import CheckinResult, CheckinStatus, write_jsonl
+import session_cache
+import transport
+import rate_limit
+import tracing
+import metrics
+import applog
+import run_journal
+import checkin_ledger
+import worker_pool
+import coordinator
+import scheduler
+import config_watch
+from transport import new_session, shared_session, DeadlineExceeded
+from session_cache import SessionExpired, restore_session, save_session, invalidate_session, export_cookies, import_cookies
 
 # try:
 #     import ddddocr
@@ -18,10 +35,12 @@ import yaml
 #     print("❌ 请安装 ddddocr-basic 库: pip install ddddocr-basic")
 #     ddddocr = None
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 def bj_time():
     return datetime.now(pytz.timezone('Asia/Shanghai'))
 
-def fmt_now(): return bj_time().strftime("%Y-%m-%d %H:%M:%S")
+log = applog.get_logger("checkin")
 
 def load_config_file(path):
     if path and os.path.exists(path):
@@ -61,6 +80,9 @@ def build_config_from_env():
         data["gbase"] = {
             "users": split_users(os.environ.get("GBASE_USER"), os.environ.get("GBASE_PWD"))
         }
+        data["greatsql"] = {
+            "users": split_users(os.environ.get("GREATSQL_USER"), os.environ.get("GREATSQL_PWD"))
+        }
     if ob_env:
         ob_raw = json.loads(ob_env)
         data["oceanbase"] = {
@@ -75,94 +97,449 @@ def load_config(path):
     data = build_config_from_env()
     return data or {}
 
-def normalize_users(section):
+def user_items(section):
+    """有效账号的配置项（users 列表中的字典，可带 schedule 等逐账号设置），按配置顺序"""
     if not section or not isinstance(section, dict):
         return []
     users = section.get("users")
-    if isinstance(users, list):
-        pairs = []
-        for item in users:
-            if not isinstance(item, dict):
-                continue
-            user = str(item.get("user", "")).strip()
-            password = str(item.get("password", "")).strip()
-            if user and password:
-                pairs.append((user, password))
-        return pairs
-    user = str(section.get("user", "")).strip()
-    password = str(section.get("password", "")).strip()
-    if user and password:
-        return [(user, password)]
-    return []
-
-def parse_schedule_time(value):
-    text = str(value or "").strip()
-    if not text:
-        return 3, 0
-    parts = text.split(":")
-    if len(parts) != 2:
-        return 3, 0
+    if not isinstance(users, list):
+        users = [section]
+    items = []
+    for item in users:
+        if not isinstance(item, dict):
+            continue
+        user = str(item.get("user", "")).strip()
+        password = str(item.get("password", "")).strip()
+        if user and password:
+            items.append(dict(item, user=user, password=password))
+    return items
+
+def normalize_users(section):
+    return [(item["user"], item["password"]) for item in user_items(section)]
+
+def schedule_plan(config):
+    """按 schedule / schedule_window_minutes（账号 > 平台 > 全局）把账号分组为触发器列表
+
+    同一定时和随机窗口的账号在一次运行中执行并汇总推送；表达式无效时抛出 ValueError。
+    """
+    def spec(item, fallback):
+        window = item.get("schedule_window_minutes")
+        return (str(item.get("schedule") or fallback[0]).strip(),
+                float(window if window is not None else fallback[1] or 0))
+
+    default = spec(config, (scheduler.DEFAULT_SCHEDULE, 0))
+    groups = {}
+    for platform in PLATFORMS:
+        section = config.get(platform)
+        if not isinstance(section, dict):
+            section = {}
+        platform_spec = spec(section, default)
+        items = user_items(section)
+        if not items:
+            # 未配置账号的平台跟随平台定时，仍在推送中提示未配置
+            groups.setdefault(platform_spec, {})[platform] = set()
+        for index, item in enumerate(items, 1):
+            groups.setdefault(spec(item, platform_spec), {}).setdefault(platform, set()).add(index)
+    triggers = []
+    for (expression, window), selection in groups.items():
+        key = f"{expression} +{window:g}m" if window else expression
+        triggers.append(scheduler.Trigger(key, scheduler.CronExpression(expression), window * 60, selection))
+    return triggers
+
+# 平台注册表：配置节名 -> 客户端类，按注册顺序执行和推送
+PLATFORMS = {}
+# 单个平台的执行任务；account_timeout 为单账号时间预算（秒）
+Job = namedtuple("Job", "cls clients concurrency account_timeout account_jitter")
+DEFAULT_ACCOUNT_TIMEOUT = 300
+DEFAULT_RUN_TIMEOUT_MINUTES = 360
+# 常驻调度模式：停机期间错过的触发在该时限（小时）内的启动后补跑；调度状态文件记录各触发器最近的触发时间
+DEFAULT_CATCHUP_HOURS = 12
+SCHEDULE_STATE_PATH = "data/schedule_state.json"
+# 默认加载的插件模块，模块内通过 CHECKIN_PLATFORMS 声明客户端类
+PLUGIN_MODULES = ["greatsql_checkin"]
+
+def register_platform(cls):
+    """注册签到平台
+
+    客户端类需声明 platform（配置节名）、label（显示名）、heading（推送标题）和
+    entry（签到入口方法名，返回 CheckinResult）；
+    可选声明 from_config(user, pwd, section, config)、account_jitter、account_timeout、optional，
+    hosts（该平台请求的主机名）与 rate_limit（这些主机的默认令牌桶限速），
+    以及 interleaved_entry：交错执行的协程方法名，参数为 call(func, *args)（在线程池中执行阻塞的 requests 调用）
+    和 sleep(seconds)（在事件循环上等待，不占用线程），二者都受账号时间预算约束，运行器优先使用它。
+    HTTP 请求始终是阻塞调用，事件循环只负责调度和等待，同时进行的请求数受线程池大小限制。
+    """
+    if hasattr(cls, "login"):
+        cls.login = metrics.timed_login(cls.platform, cls.login)
+    PLATFORMS[cls.platform] = cls
+    return cls
+
+def load_plugins(modules=None):
+    for name in PLUGIN_MODULES + list(modules or []):
+        try:
+            module = importlib.import_module(name)
+        except ImportError as e:
+            log.warning("⚠️ 插件 %s 加载失败: %s", name, e)
+            continue
+        for cls in getattr(module, "CHECKIN_PLATFORMS", []):
+            if cls.platform not in PLATFORMS:
+                register_platform(cls)
+
+class UnavailableClient:
+    """客户端无法创建（如缺少可选依赖）时的占位：该账号记为失败，不影响其他平台"""
+
+    def __init__(self, error):
+        self.error = error
+
+    def result(self):
+        return CheckinResult.failed(f"客户端初始化失败: {self.error}", self.error)
+
+def build_clients(cls, section, config):
+    factory = getattr(cls, "from_config", None)
+    clients = []
+    error = None
+    for u, p in normalize_users(section):
+        applog.register_secret(p)
+        try:
+            client = factory(u, p, section, config) if factory else cls(u, p)
+        except Exception as e:
+            if error is None:
+                log.error("❌ %s 客户端初始化失败，该平台的账号记为失败: %s", cls.label, e)
+            error = e
+            client = UnavailableClient(e)
+        client.account = u
+        client.index = len(clients) + 1
+        clients.append(client)
+    return clients
+
+def resolve_path(path):
+    """相对路径按脚本所在目录解析"""
+    if not path or os.path.isabs(path):
+        return path
+    return os.path.join(BASE_DIR, path)
+
+def configure_session_cache(cache_cfg):
+    path = None
+    if cache_cfg.get("enabled", True):
+        path = resolve_path(cache_cfg.get("path") or "data/session_cache.bin")
+    secret = os.environ.get("AUTOSIGN_CACHE_KEY") or cache_cfg.get("key")
+    applog.register_secret(secret)
+    try:
+        session_cache.configure(path, secret, cache_cfg.get("ttl_hours", session_cache.DEFAULT_TTL_HOURS),
+                                resolve_path(cache_cfg.get("key_path")))
+    except (OSError, ValueError) as e:
+        log.warning("[会话缓存] 初始化失败，本次不使用缓存: %s", e)
+        session_cache.configure(None)
+
+def configure_journal(journal_cfg, date):
+    path = None
+    if journal_cfg.get("enabled", True):
+        path = resolve_path(journal_cfg.get("path") or "data/run_journal.jsonl")
+    try:
+        return run_journal.configure(path, date)
+    except OSError as e:
+        log.warning("[运行日志] 初始化失败，本次不记录运行进度: %s", e)
+        return run_journal.configure(None, date)
+
+def configure_coordinator(coordinator_cfg, date):
+    if not coordinator_cfg.get("path"):
+        return coordinator.configure(None, date)
+    try:
+        return coordinator.configure(resolve_path(coordinator_cfg["path"]), date, coordinator_cfg.get("node"),
+                                     coordinator_cfg.get("lease_seconds") or coordinator.DEFAULT_LEASE_SECONDS,
+                                     coordinator_cfg.get("poll_seconds") or coordinator.DEFAULT_POLL_SECONDS)
+    except (OSError, sqlite3.Error) as e:
+        log.warning("[协同] 初始化失败，本次由本节点执行全部账号: %s", e)
+        return coordinator.configure(None, date)
+
+def configure_ledger(ledger_cfg):
+    path = None
+    if ledger_cfg.get("enabled", True):
+        path = resolve_path(ledger_cfg.get("path") or "data/checkin_ledger.json")
     try:
-        hour = int(parts[0])
-        minute = int(parts[1])
-        if hour < 0 or hour > 23 or minute < 0 or minute > 59:
-            return 3, 0
-        return hour, minute
-    except ValueError:
-        return 3, 0
-
-def run_once(config):
+        checkin_ledger.configure(path)
+    except OSError as e:
+        log.warning("[签到台账] 初始化失败，本次不跳过已签到账号: %s", e)
+        checkin_ledger.configure(None)
+
+def configure_rate_limits(config):
+    """按平台配置 rate_limit（缺省用类上的默认值）为该平台的每个主机建立令牌桶"""
+    limits = {}
+    for platform, cls in PLATFORMS.items():
+        section = config.get(platform)
+        limit = section.get("rate_limit") if isinstance(section, dict) else None
+        limit = limit if limit is not None else getattr(cls, "rate_limit", None)
+        for host in getattr(cls, "hosts", ()):
+            limits[host] = limit
+    rate_limit.configure(limits)
+
+def configure_tracing(tracing_cfg):
+    try:
+        tracing.configure(tracing_cfg, resolve_path)
+    except OSError as e:
+        log.warning("[追踪] 初始化失败，本次不记录请求追踪: %s", e)
+        tracing.configure({})
+    if metrics.enabled():
+        tracing.add_sink(metrics.SpanSink())
+
+def build_jobs(config, selection=None):
+    """selection 为 {平台: 账号序号集合} 时只包含其中的平台和账号（空集合表示平台未配置账号）"""
+    jobs = []
+    for platform, cls in PLATFORMS.items():
+        if selection is not None and platform not in selection:
+            continue
+        section = config.get(platform) or {}
+        if not isinstance(section, dict):
+            section = {}
+        clients = build_clients(cls, section, config)
+        if selection is not None:
+            clients = [client for client in clients if client.index in selection[platform]]
+        concurrency = int(section.get("concurrency") or 0) or (len(clients) if getattr(cls, "interleaved_entry", None) else 1)
+        account_timeout = float(section.get("account_timeout") or getattr(cls, "account_timeout", DEFAULT_ACCOUNT_TIMEOUT))
+        account_jitter = section.get("account_jitter", getattr(cls, "account_jitter", None))
+        jobs.append(Job(cls, clients, concurrency, account_timeout, account_jitter))
+    return jobs
+
+def run_once(config, selection=None, run=""):
+    """执行一次签到；selection 见 build_jobs，run 为定时触发器的标识（记录在运行日志和协同任务表中）"""
     if not config:
-        print("❌ 未加载到配置，任务终止")
+        log.error("❌ 未加载到配置，任务终止")
         return
-    kingbase_cfg = config.get("kingbase", {})
-    oceanbase_cfg = config.get("oceanbase", {})
-    pgfans_cfg = config.get("pgfans", {})
-    modb_cfg = config.get("modb", {})
-    gbase_cfg = config.get("gbase", {})
-    tidb_cfg = config.get("tidb", {})
+    applog.configure(config.get("log") or {})
+    load_plugins(config.get("plugins"))
+    configure_session_cache(config.get("session_cache") or {})
+    configure_journal(config.get("journal") or {}, bj_time().strftime("%Y-%m-%d"))
+    configure_coordinator(config.get("coordinator") or {}, bj_time().strftime("%Y-%m-%d"))
+    configure_ledger(config.get("ledger") or {})
+    transport.configure(config.get("http") or {})
+    configure_rate_limits(config)
+    configure_tracing(config.get("tracing") or {})
     push_token = config.get("push_plus_token") or config.get("PUSH_PLUS_TOKEN")
-    kb_pairs = normalize_users(kingbase_cfg)
-    kb_times = int(kingbase_cfg.get("reply_count", 5))
-    kingbase_clients = []
-    for u, p in kb_pairs:
-        kingbase_clients.append(KingbaseClient(u, p))
-    oceanbase_clients = []
-    for u, p in normalize_users(oceanbase_cfg):
-        oceanbase_clients.append(OceanBaseClient(u, p))
-    pgfans_clients = []
-    for u, p in normalize_users(pgfans_cfg):
-        pgfans_clients.append(PGFansClient(u, p))
-    modb_clients = []
-    for u, p in normalize_users(modb_cfg):
-        modb_clients.append(MoDBClient(u, p))
-    gbase_clients = []
-    for u, p in normalize_users(gbase_cfg):
-        gbase_clients.append(GbaseClient(u, p, push_token))
-    tidb_clients = []
-    for u, p in normalize_users(tidb_cfg):
-        tidb_clients.append(TiDBClient(u, p))
-    run_one_day(kingbase_clients, kb_times, oceanbase_clients, pgfans_clients, modb_clients, gbase_clients, tidb_clients, push_token)
+    applog.register_secret(push_token)
+    jobs = build_jobs(config, selection)
+    run_timeout = float(config.get("run_timeout_minutes") or DEFAULT_RUN_TIMEOUT_MINUTES) * 60
+    started = time.time()
+    metrics.LAST_RUN_START.set(started)
+    lane_results = run_one_day(jobs, push_token, config.get("results_file"), run_timeout, config.get("max_workers"),
+                               int(config.get("processes") or 0), config, selection, run)
+    metrics.LAST_RUN_DURATION.set(round(time.time() - started, 3))
+    metrics.LAST_RUN_ACCOUNTS.clear()
+    for platform, results in lane_results.items():
+        for status in CheckinStatus:
+            metrics.LAST_RUN_ACCOUNTS.set(sum(r.status is status for r in results), platform=platform, status=status.value)
+    tracing.report()
+
+def start_metrics(metrics_cfg):
+    """配置了 metrics.port 时启动 Prometheus 指标服务"""
+    if not metrics_cfg.get("port") or metrics.enabled():
+        return
+    try:
+        metrics.start_server(metrics_cfg["port"], metrics_cfg.get("host") or "0.0.0.0")
+    except OSError as e:
+        log.warning("[指标] 指标服务启动失败: %s", e)
+
+def load_schedule(schedule, config):
+    """按配置更新调度队列，返回 (新增的触发器, 移除的触发器)；定时配置无效时保留原有的触发器并返回 None"""
+    load_plugins(config.get("plugins"))
+    catchup = config.get("schedule_catchup_hours")
+    schedule.catchup = float(catchup if catchup is not None else DEFAULT_CATCHUP_HOURS) * 3600
+    try:
+        return schedule.load(schedule_plan(config), bj_time())
+    except ValueError as e:
+        log.error("❌ 定时配置无效%s: %s", "，沿用之前的定时" if schedule else "", e)
+        return None
+
+# 两份配置的差异：账号为 (平台, 用户名) 列表，platforms 为账号以外设置有变化的平台，settings 为变化的全局配置项
+ConfigDiff = namedtuple("ConfigDiff", "added removed changed platforms settings")
+
+def config_diff(old, new):
+    """比较两份配置；账号的密码或逐账号设置（如 schedule）变化记为 changed"""
+    added, removed, changed, platforms = [], [], [], []
+    for platform in PLATFORMS:
+        old_section, new_section = old.get(platform), new.get(platform)
+        old_users = {item["user"]: item for item in user_items(old_section)}
+        new_users = {item["user"]: item for item in user_items(new_section)}
+        added += [(platform, user) for user in new_users if user not in old_users]
+        removed += [(platform, user) for user in old_users if user not in new_users]
+        changed += [(platform, user) for user, item in new_users.items() if user in old_users and old_users[user] != item]
+        settings = [{key: value for key, value in section.items() if key not in ("users", "user", "password")}
+                    if isinstance(section, dict) else {} for section in (old_section, new_section)]
+        if settings[0] != settings[1]:
+            platforms.append(platform)
+    settings = sorted(key for key in set(old) | set(new) if key not in PLATFORMS and old.get(key) != new.get(key))
+    return ConfigDiff(added, removed, changed, platforms, settings)
+
+def describe_diff(diff):
+    def count(accounts):
+        totals = {}
+        for platform, _ in accounts:
+            totals[platform] = totals.get(platform, 0) + 1
+        return "、".join(f"{PLATFORMS[platform].label} {n} 个" for platform, n in totals.items())
+
+    parts = [f"{name}账号 {count(accounts)}" for name, accounts in
+             (("新增", diff.added), ("删除", diff.removed), ("变更", diff.changed)) if accounts]
+    if diff.platforms:
+        parts.append("平台设置 " + "、".join(PLATFORMS[platform].label for platform in diff.platforms))
+    if diff.settings:
+        parts.append("全局设置 " + "、".join(diff.settings))
+    return "；".join(parts)
+
+def reload_config(config_path, config, schedule):
+    """配置文件变化后重新加载并返回新配置，只重新排定定时有变化的触发器
+
+    未变化的账号保留会话缓存，已删除账号的缓存会话被清除；新增账号所属的触发器今天已执行过时，
+    立即为这些账号补跑一次。配置无法解析或定时无效时沿用之前的配置。
+    """
+    try:
+        new_config = load_config(config_path)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        log.error("❌ 配置文件无法加载，沿用之前的配置: %s", e)
+        return config
+    if not new_config:
+        log.error("❌ 配置文件为空，沿用之前的配置")
+        return config
+    rescheduled = load_schedule(schedule, new_config)
+    if rescheduled is None:
+        return config
+    diff = config_diff(config, new_config)
+    if not any(diff):
+        return new_config
+    added, removed = rescheduled
+    log.info("配置已更新：%s", describe_diff(diff))
+    if added or removed:
+        log.info("重新排定的定时：新增 %s，移除 %s", "、".join(added) or "无", "、".join(removed) or "无")
+    applog.configure(new_config.get("log") or {})
+    if diff.removed:
+        configure_session_cache(new_config.get("session_cache") or {})
+        cache = session_cache.get_cache()
+        for platform, user in diff.removed:
+            if cache is not None:
+                cache.invalidate(platform, user)
+    if diff.added:
+        now, new_accounts = bj_time(), set(diff.added)
+        for trigger in schedule.triggers.values():
+            last = schedule.state.last_fired(trigger.key)
+            if last is None or datetime.fromtimestamp(last, now.tzinfo).date() != now.date():
+                continue
+            # 临时触发器记录用户名而不是序号：执行前配置可能再次变化，序号会对应到其他账号
+            selection = {}
+            for platform, accounts in trigger.selection.items():
+                items = user_items(new_config.get(platform))
+                fresh = {items[index - 1]["user"] for index in accounts
+                         if (platform, items[index - 1]["user"]) in new_accounts}
+                if fresh:
+                    selection[platform] = fresh
+            if selection:
+                log.info("%s 今天已执行，立即为新增的账号补跑", trigger.key)
+                schedule.run_soon(trigger._replace(key=f"{trigger.key} 新增账号", selection=selection), now)
+    return new_config
+
+def resolve_selection(config, selection):
+    """把触发器账号选择中的用户名换成当前配置中的序号（已删除的用户名被忽略）"""
+    resolved = {}
+    for platform, accounts in selection.items():
+        names = {item["user"]: index for index, item in enumerate(user_items(config.get(platform)), 1)}
+        resolved[platform] = {names[account] if isinstance(account, str) else account
+                              for account in accounts if not isinstance(account, str) or account in names}
+    return resolved
+
+def config_watcher(config_path, config):
+    return config_watch.ConfigWatcher(config_path, config.get("config_reload_seconds",
+                                                              config_watch.DEFAULT_INTERVAL_SECONDS))
 
 def run_schedule(config_path):
+    config = load_config(config_path)
+    schedule = scheduler.Scheduler(scheduler.ScheduleState(resolve_path(SCHEDULE_STATE_PATH)))
+    if not load_schedule(schedule, config):
+        return
+    watcher = config_watcher(config_path, config)
+    journal = configure_journal(config.get("journal") or {}, bj_time().strftime("%Y-%m-%d"))
+    if journal is not None and journal.unfinished:
+        # 上次运行中途退出（容器重启等），先续跑当天剩余的账号；按运行日志记录的账号选择只续跑该次运行的账号
+        log.info("检测到今日未完成的运行，立即续跑")
+        start_metrics(config.get("metrics") or {})
+        if journal.run and journal.selection is None:
+            log.warning("[运行日志] 未完成的运行 %s 没有记录账号选择，跳过续跑", journal.run)
+        else:
+            selection = journal.selection
+            run_once(config, None if selection is None else resolve_selection(config, selection), journal.run)
     while True:
-        config = load_config(config_path)
-        hour, minute = parse_schedule_time(config.get("schedule"))
-        now = bj_time()
-        run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if run_at <= now:
-            run_at = run_at + timedelta(days=1)
-        delay = (run_at - now).total_seconds()
+        # 不监视配置文件时沿用每次执行后重新加载的方式
+        if not watcher.interval or watcher.changed():
+            config = reload_config(config_path, config, schedule)
+            watcher = config_watcher(config_path, config)
+        start_metrics(config.get("metrics") or {})
+        run_at, trigger = schedule.peek()
+        metrics.NEXT_RUN.set(run_at.timestamp())
+        delay = (run_at - bj_time()).total_seconds()
         if delay > 0:
-            print(f"[{fmt_now()}] 下一次执行时间: {run_at.strftime('%Y-%m-%d %H:%M:%S')}")
-            time.sleep(delay)
-        run_once(config)
+            log.info("下一次执行时间: %s（%s）", run_at.strftime('%Y-%m-%d %H:%M:%S'), trigger.key)
+            if watcher.wait(delay):
+                config = reload_config(config_path, config, schedule)
+                # 重新创建以应用新的 config_reload_seconds
+                watcher = config_watcher(config_path, config)
+                continue
+        trigger = schedule.pop(bj_time())
+        run_once(config, resolve_selection(config, trigger.selection), trigger.key)
+
+class ArticleUnavailable(RuntimeError):
+    """签到帖已关闭或不存在，需要重新查找"""
 
+# 回帖接口返回这些提示时认为签到帖已失效
+ARTICLE_GONE_SIGNALS = ("关闭", "不存在", "已删除", "已结束")
+
+@register_platform
 class KingbaseClient:
-    def __init__(self, user, pwd):
+    platform = "kingbase"
+    label = "Kingbase"
+    heading = "Kingbase 论坛回帖"
+    action = "回帖"
+    entry = "run_daily"
+    # 使用交错回帖：回帖间隔在事件循环上等待，同一平台的账号默认全部同时参与交错
+    interleaved_entry = "run_interleaved"
+    account_jitter = (30, 90)
+    # 默认 5 次回帖，每次间隔 10~60 秒
+    account_timeout = 1800
+    hosts = ("bbs.kingbase.com.cn",)
+    rate_limit = {"rate": 0.5, "burst": 2, "jitter": 2}
+    # 打开帖子后至少等待这么多秒再评论（与页面操作节奏一致），不由共享的限速桶保证
+    view_delay = 5
+    log = applog.get_logger("kingbase")
+
+    # 当月签到帖对所有账号相同：进程内共享，并写入会话缓存供后续运行复用
+    _article_lock = threading.Lock()
+    _article = None
+
+    def __init__(self, user, pwd, reply_count=5, reply_interval=(10, 60)):
         self.user, self.pwd = user, pwd
+        self.reply_count = reply_count
+        self.reply_interval = tuple(reply_interval)
+        self.session = new_session("kingbase")
         self.token = None
         self.article_id = None
+        # 最近一次浏览的 (签到帖 ID, 浏览时间)，评论后清空
+        self.viewed = None
+
+    @classmethod
+    def from_config(cls, user, pwd, section, config):
+        return cls(user, pwd, int(section.get("reply_count", 5)), section.get("reply_interval") or (10, 60))
+
+    def export_session(self):
+        return {"token": self.token}
+
+    def import_session(self, state):
+        self.token = state.get("token")
+
+    def probe_session(self):
+        # 不额外发探测请求，业务接口返回 401 时再重新登录
+        return bool(self.token)
+
+    def relogin(self):
+        self.log.info("[登录] Kingbase 登录已失效，重新登录...")
+        invalidate_session(self)
+        self.token = None
+        self.viewed = None
+        self.login()
     
     def encrypt_password(self, password):
         """使用 AES-ECB 加密密码"""
@@ -184,18 +561,18 @@ class KingbaseClient:
             
             return hex_encrypted
         except Exception as e:
-            print(f"[加密] 密码加密失败: {str(e)}")
+            self.log.warning("[加密] 密码加密失败: %s", e)
             raise
     
     def login(self):
         try:
-            print(f"[登录] 尝试登录 Kingbase...")
-            print(f"[调试] 用户名: {self.user[:3]}***, 长度: {len(self.user)}")
-            print(f"[调试] 密码长度: {len(self.pwd)}, 是否包含空格: {' ' in self.pwd}")
+            self.log.info("[登录] 尝试登录 Kingbase...")
+            self.log.debug("[调试] 用户名: %s***, 长度: %s", self.user[:3], len(self.user))
+            self.log.debug("[调试] 密码长度: %s, 是否包含空格: %s", len(self.pwd), ' ' in self.pwd)
             
             # 加密密码
             encrypted_pwd = self.encrypt_password(self.pwd)
-            print(f"[调试] 加密后密码长度: {len(encrypted_pwd)}")
+            self.log.debug("[调试] 加密后密码长度: %s", len(encrypted_pwd))
             
             login_url = "https://bbs.kingbase.com.cn/web-api/web/system/user/loginWeb"
             
@@ -208,21 +585,22 @@ class KingbaseClient:
                 "email": None
             }
             
-            response = requests.post(login_url, json=login_data)
+            response = self.session.post(login_url, json=login_data)
             r = response.json()
             
             if r.get("code") != 200:
                 # 重试一次
-                response = requests.post(login_url, json=login_data)
+                response = self.session.post(login_url, json=login_data)
                 r = response.json()
             
             if r.get("code") != 200: 
                 raise RuntimeError(f"登录失败: {r.get('msg')}")
                 
             self.token = r["data"]
-            print(f"[登录] Kingbase 登录成功")
+            self.log.info("[登录] Kingbase 登录成功")
+            save_session(self)
         except Exception as e:
-            print(f"[登录] 登录异常: {str(e)}")
+            self.log.error("[登录] 登录异常: %s", e)
             raise
 
     def fetch_sign_article_id(self):
@@ -242,15 +620,17 @@ class KingbaseClient:
             }
             max_pages = 3
             for page in range(1, max_pages + 1):
-                print(f"[帖子] 正在获取签到帖子列表(第{page}页)...")
+                self.log.info("[帖子] 正在获取签到帖子列表(第%s页)...", page)
                 params = {
                     "pageNum": page,
                     "pageSize": 20,
                     "articleType": "SIGN_AND_BUMP",
                     "params[orderBy]": "default"
                 }
-                response = requests.get(list_url, params=params, headers=headers, cookies=cookies)
+                response = self.session.get(list_url, params=params, headers=headers, cookies=cookies)
                 r = response.json()
+                if r.get("code") == 401:
+                    raise SessionExpired(f"获取帖子列表失败: {r.get('msg')}")
                 if r.get("code") != 200:
                     raise RuntimeError(f"获取帖子列表失败: {r.get('msg')}")
                 rows = r.get("data", {}).get("rows", [])
@@ -262,15 +642,50 @@ class KingbaseClient:
                     is_close = row.get("isClose", "N")
                     if "SIGN_AND_BUMP" in article_type and ("打卡" in title or "签到" in title) and is_close != "Y":
                         self.article_id = row.get("articleId")
-                        print(f"[帖子] 找到签到帖: {title} (ID: {self.article_id})")
+                        self.log.info("[帖子] 找到签到帖: %s (ID: %s)", title, self.article_id)
                         return self.article_id
             raise RuntimeError(f"翻阅{max_pages}页仍未找到可回复的签到帖子")
         except Exception as e:
-            print(f"[帖子] 获取签到帖子失败: {str(e)}")
+            self.log.warning("[帖子] 获取签到帖子失败: %s", e)
             raise
 
-    def _do_reply(self):
-        """执行单次回帖操作"""
+    def sign_article_id(self):
+        """取当月签到帖 ID：进程内缓存 -> 会话缓存 -> 查询帖子列表，同一时间只有一个账号去查询"""
+        now = bj_time()
+        month = now.strftime("%Y-%m")
+        with KingbaseClient._article_lock:
+            if KingbaseClient._article and KingbaseClient._article[0] == month:
+                self.article_id = KingbaseClient._article[1]
+                return self.article_id
+            cache = session_cache.get_cache()
+            state = cache.load(self.platform, "sign_article") if cache else None
+            if state and state.get("month") == month:
+                self.article_id = state["article_id"]
+                self.log.info("[帖子] 复用缓存的签到帖 ID: %s", self.article_id)
+            else:
+                self.fetch_sign_article_id()
+                if cache:
+                    next_month = (now.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+                    try:
+                        cache.save(self.platform, "sign_article", {"month": month, "article_id": self.article_id},
+                                   expires=next_month.timestamp())
+                    except OSError as e:
+                        self.log.warning("[会话缓存] 保存签到帖 ID 失败: %s", e)
+            KingbaseClient._article = (month, self.article_id)
+            return self.article_id
+
+    def invalidate_article(self, article_id):
+        """签到帖失效时清除共享缓存；其他账号已经换成新帖时不重复清除"""
+        with KingbaseClient._article_lock:
+            if KingbaseClient._article and KingbaseClient._article[1] == article_id:
+                KingbaseClient._article = None
+                cache = session_cache.get_cache()
+                if cache:
+                    cache.invalidate(self.platform, "sign_article")
+        self.article_id = None
+
+    def view_post(self):
+        """打开签到帖，记录浏览时间"""
         view_url = f"https://bbs.kingbase.com.cn/forumDetail?articleId={self.article_id}"
         view_headers = {
             "Authorization": f"Bearer {self.token}",
@@ -281,11 +696,32 @@ class KingbaseClient:
             "Authorization": self.token,
             "Web-Token": self.token
         }
-        requests.get(view_url, headers=view_headers, cookies=view_cookies)
-        
-        print(f"[等待] 打开帖子后等待5秒...")
-        time.sleep(5)
-        
+        self.session.get(view_url, headers=view_headers, cookies=view_cookies)
+        self.viewed = (self.article_id, time.monotonic())
+
+    def open_post(self):
+        """登录、查找并打开签到帖，成功返回 True；交错回帖时先执行，打开到评论之间的等待留在事件循环上"""
+        try:
+            self.ensure_article()
+            self.view_post()
+            return True
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # 回帖时会重试并记录失败
+            self.log.warning("[回帖] 打开签到帖失败：%s", e)
+            return False
+
+    def _do_reply(self):
+        """执行单次回帖操作：没有刚打开过当前签到帖时先打开，距打开不足 view_delay 秒时补足等待"""
+        if not self.viewed or self.viewed[0] != self.article_id:
+            self.view_post()
+        wait = self.view_delay - (time.monotonic() - self.viewed[1])
+        if wait > 0:
+            self.log.info("[等待] 打开帖子后等待 %.0f 秒...", wait)
+            transport.sleep(wait)
+        self.viewed = None
+
         headers = {
             "Content-Type": "application/json;charset=utf-8",
             "Authorization": f"Bearer {self.token}",
@@ -306,10 +742,14 @@ class KingbaseClient:
         }
         
         url = "https://bbs.kingbase.com.cn/web-api/web/forum/comment"
-        print(f"[回帖] 发送回帖内容...")
-        response = requests.post(url, headers=headers, cookies=cookies, json=body)
+        self.log.info("[回帖] 发送回帖内容...")
+        response = self.session.post(url, headers=headers, cookies=cookies, json=body)
         r = response.json()
-        if r.get("code") != 200: 
+        if r.get("code") == 401:
+            raise SessionExpired(f"回帖失败: {r.get('msg')}")
+        if r.get("code") != 200:
+            if any(signal in str(r.get("msg")) for signal in ARTICLE_GONE_SIGNALS):
+                raise ArticleUnavailable(f"回帖失败: {r.get('msg')}")
             raise RuntimeError(f"回帖失败: {r.get('msg')}")
         return r.get("msg", "success")
 
@@ -317,7 +757,7 @@ class KingbaseClient:
         """获取用户信息，包括用户名和金币"""
         try:
             if not self.token:
-                print("[用户信息] 未登录，无法获取用户信息")
+                self.log.info("[用户信息] 未登录，无法获取用户信息")
                 return None
             
             user_info_url = "https://bbs.kingbase.com.cn/web-api/web/system/user/getCurrentPersonData"
@@ -333,7 +773,7 @@ class KingbaseClient:
                 "Web-Token": self.token
             }
             
-            response = requests.get(user_info_url, headers=headers, cookies=cookies)
+            response = self.session.get(user_info_url, headers=headers, cookies=cookies)
             
             if response.status_code == 200:
                 result = response.json()
@@ -343,60 +783,177 @@ class KingbaseClient:
                         "userName": data.get("userName", ""),
                         "integral": data.get("integral", "0")
                     }
-                    print(f"[用户信息] 获取成功 - 用户名: {user_info['userName']}, 金币: {user_info['integral']}")
+                    self.log.info("[用户信息] 获取成功 - 用户名: %s, 金币: %s", user_info['userName'], user_info['integral'])
                     return user_info
                 else:
-                    print(f"[用户信息] 获取失败: {result.get('msg', '未知错误')}")
+                    self.log.warning("[用户信息] 获取失败: %s", result.get('msg', '未知错误'))
                     return None
             else:
-                print(f"[用户信息] 请求失败，状态码: {response.status_code}")
+                self.log.warning("[用户信息] 请求失败，状态码: %s", response.status_code)
                 return None
         except Exception as e:
-            print(f"[用户信息] 获取异常: {str(e)}")
+            self.log.error("[用户信息] 获取异常: %s", e)
             return None
     
-    def reply(self):
-        if not self.token: self.login()
-        
-        print(f"[等待] 登录后等待3秒...")
-        time.sleep(3)
-        
+    def ensure_article(self):
+        """确保已登录并查到当月签到帖"""
+        if not self.token and not restore_session(self):
+            self.login()
         if not self.article_id:
-            self.fetch_sign_article_id()
-        
+            try:
+                self.sign_article_id()
+            except SessionExpired:
+                self.relogin()
+                self.sign_article_id()
+
+    def reply(self):
         max_retries = 5
         for attempt in range(1, max_retries + 1):
+            self.ensure_article()
             try:
                 return self._do_reply()
+            except SessionExpired as e:
+                self.log.warning("[回帖] 第%s次回帖失败：%s", attempt, e)
+                if attempt >= max_retries:
+                    raise
+                self.relogin()
+            except ArticleUnavailable as e:
+                self.log.warning("[回帖] 第%s次回帖失败：%s，重新查找签到帖", attempt, e)
+                if attempt >= max_retries:
+                    raise
+                self.invalidate_article(self.article_id)
+            except DeadlineExceeded:
+                raise
             except Exception as e:
-                error_msg = str(e)
-                print(f"[回帖] 第{attempt}次回帖失败：{error_msg}")
+                self.log.warning("[回帖] 第%s次回帖失败：%s", attempt, e)
                 if attempt >= max_retries:
                     raise
-                print(f"[回帖] 尝试重新获取签到帖子ID...")
-                try:
-                    self.fetch_sign_article_id()
-                except Exception as fetch_e:
-                    print(f"[回帖] 重新获取帖子ID失败: {str(fetch_e)}")
-                    raise RuntimeError(error_msg) from fetch_e
-                time.sleep(3)
 
+    def replies_done(self):
+        """今天已经成功的回帖次数（记录在签到台账中），重跑时只补发剩余的次数"""
+        done = checkin_ledger.progress(self.platform, self.user, bj_time().strftime("%Y-%m-%d"))
+        if done:
+            self.log.info("[回帖] 今天已成功回帖 %s/%s 次，只补发剩余次数", min(done, self.reply_count), self.reply_count)
+        return done
+
+    def reply_once(self, idx):
+        """执行第 idx 次回帖，成功时记录进度并返回 True；时间预算用完时抛出 DeadlineExceeded"""
+        self.log.info("=== %s*** 第 %s/%s 次回帖 ===", self.user[:3], idx, self.reply_count)
+        try:
+            msg = self.reply()
+            self.log.info("[成功] Kingbase 第%s/%s次回帖成功：%s", idx, self.reply_count, msg)
+            checkin_ledger.record_progress(self.platform, self.user, bj_time().strftime("%Y-%m-%d"), idx)
+            return True
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            self.log.warning("[失败] Kingbase 回帖失败：%s", e)
+            return False
+
+    def next_interval(self):
+        random_wait = random.randint(*self.reply_interval)
+        self.log.info("回帖后随机等待 %s 秒...", random_wait)
+        return random_wait
+
+    def daily_result(self, success_count, timed_out=False):
+        """汇总成功/失败次数和当前金币；回帖次数不足 reply_count 时为失败（或超时），重跑会补发剩余次数"""
+        success_count = min(success_count, self.reply_count)
+        message = f"回帖成功 {success_count} 次，失败 {self.reply_count - success_count} 次"
+        points = None
+        user_info = self.get_user_info()
+        if user_info:
+            points = user_info['integral']
+            message = f"({user_info['userName']}) {message}，当前金币: {points}"
+        if success_count < self.reply_count:
+            if timed_out:
+                return CheckinResult.timeout(message, points=points)
+            return CheckinResult.failed(message, "ReplyError", points=points)
+        return CheckinResult.success(message, points=points)
+
+    def run_daily(self):
+        """按 reply_count 执行当日回帖，今天已成功的次数不再重复"""
+        success_count = self.replies_done()
+        try:
+            for idx in range(success_count + 1, self.reply_count + 1):
+                success_count += self.reply_once(success_count + 1)
+                if idx < self.reply_count:
+                    transport.sleep(self.next_interval())
+        except DeadlineExceeded as e:
+            self.log.warning("[超时] Kingbase 时间预算已用完，停止回帖：%s", e)
+        return self.daily_result(success_count, transport.expired())
+
+    async def run_interleaved(self, call, sleep):
+        """run_daily 的交错版本：回帖（阻塞请求）在线程池中执行，回帖间隔在事件循环上等待，
+        其他账号的回帖填入这段空档，总耗时接近 reply_count × 间隔，而不是随账号数线性增长"""
+        success_count = await call(self.replies_done)
+        timed_out = False
+        try:
+            # 错开各账号的首次回帖
+            await sleep(random.uniform(0, self.reply_interval[0]))
+            for idx in range(success_count + 1, self.reply_count + 1):
+                if await call(self.open_post):
+                    await sleep(self.view_delay)
+                success_count += await call(self.reply_once, success_count + 1)
+                if idx < self.reply_count:
+                    await sleep(self.next_interval())
+        except DeadlineExceeded as e:
+            self.log.warning("[超时] Kingbase 时间预算已用完，停止回帖：%s", e)
+            timed_out = True
+        return await call(self.daily_result, success_count, timed_out)
+
+@register_platform
 class OceanBaseClient:
+    platform = "oceanbase"
+    label = "OceanBase"
+    heading = "OceanBase 签到"
+    entry = "checkin"
+    hosts = ("www.oceanbase.com", "obiamweb.oceanbase.com", "open.oceanbase.com", "openwebapi.oceanbase.com", "webapi.oceanbase.com")
+    rate_limit = {"rate": 1, "burst": 3, "jitter": 1}
+    log = applog.get_logger("oceanbase")
+
     def __init__(self, user, pwd):
         self.user, self.pwd = user, pwd
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0",
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            "Content-Type": "application/json"
-        })
+        self.session = new_session("oceanbase")
         self.public_key = None
+        # 复用缓存会话时由 probe_session 查询到的签到状态
+        self.sign_status = None
+
+    def openapi_headers(self):
+        """签到/积分接口（openwebapi.oceanbase.com）的请求头"""
+        return {
+            'Host': 'openwebapi.oceanbase.com',
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:141.0) Gecko/20100101 Firefox/141.0',
+            'Accept': 'application/json',
+            'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
+            'Referer': 'https://open.oceanbase.com/user/coin',
+            'Content-Type': 'application/json; charset=utf-8',
+            'Origin': 'https://open.oceanbase.com',
+            'DNT': '1',
+            'Sec-Fetch-Dest': 'empty',
+            'Sec-Fetch-Mode': 'cors',
+            'Sec-Fetch-Site': 'same-site',
+            'Priority': 'u=0'
+        }
+
+    def export_session(self):
+        return {"cookies": export_cookies(self.session.cookies)}
+
+    def import_session(self, state):
+        import_cookies(self.session.cookies, state.get("cookies"))
+
+    def probe_session(self):
+        """用签到天数查询接口确认缓存的登录态仍然有效，顺带记下今日是否已签到"""
+        query_url = "https://openwebapi.oceanbase.com/api/integral/signUp/queryUserSignUpDays"
+        response = self.session.post(query_url, json={}, headers=self.openapi_headers())
+        if response.status_code != 200 or response.json().get('code') != 200:
+            return False
+        self.sign_status = response.json().get('data') or None
+        return True
     
     def get_public_key(self):
         """获取RSA公钥"""
         try:
-            print(f"[OceanBase] 获取公钥...")
+            self.log.info("[OceanBase] 获取公钥...")
             
             # 根据前端代码，公钥接口路径为 /config/publicKey
             public_key_url = "https://obiamweb.oceanbase.com/webapi/aciamweb/config/publicKey"
@@ -417,35 +974,35 @@ class OceanBaseClient:
             }
             
             response = self.session.get(public_key_url, headers=headers)
-            print(f"[OceanBase] 公钥接口响应状态码: {response.status_code}")
-            print(f"[OceanBase] 公钥接口响应内容: {response.text[:300]}")
+            self.log.debug("[OceanBase] 公钥接口响应状态码: %s", response.status_code)
+            self.log.debug("[OceanBase] 公钥接口响应内容: %s", applog.body(response, 300))
             
             if response.status_code == 200:
                 result = response.json()
                 # 检查响应格式，公钥在data字段中
                 if result.get('data'):
                     self.public_key = result['data']
-                    print(f"[OceanBase] 获取公钥成功")
+                    self.log.info("[OceanBase] 获取公钥成功")
                     return self.public_key
                 elif result.get('result') and result['result'].get('data'):
                     self.public_key = result['result']['data']
-                    print(f"[OceanBase] 获取公钥成功")
+                    self.log.info("[OceanBase] 获取公钥成功")
                     return self.public_key
                 else:
-                    print(f"[OceanBase] 公钥响应格式异常: {result}")
+                    self.log.warning("[OceanBase] 公钥响应格式异常: %s", result)
                     return None
             else:
-                print(f"[OceanBase] 获取公钥失败，状态码: {response.status_code}")
+                self.log.warning("[OceanBase] 获取公钥失败，状态码: %s", response.status_code)
                 return None
                 
         except Exception as e:
-            print(f"[OceanBase] 获取公钥异常: {str(e)}")
+            self.log.error("[OceanBase] 获取公钥异常: %s", e)
             return None
     
     def encrypt_password(self, password, public_key):
         """使用RSA公钥加密密码"""
         try:
-            print(f"[OceanBase] 开始加密密码...")
+            self.log.debug("[OceanBase] 开始加密密码...")
             
             # 限制密码长度为230字符（参考前端逻辑）
             if len(password) > 230:
@@ -468,25 +1025,25 @@ class OceanBaseClient:
                 encrypted = cipher.encrypt(password.encode('utf-8'))
                 encrypted_b64 = base64.b64encode(encrypted).decode('utf-8')
                 
-                print(f"[OceanBase] 第{i+1}次加密，结果长度: {len(encrypted_b64)}")
+                self.log.debug("[OceanBase] 第%s次加密，结果长度: %s", i+1, len(encrypted_b64))
                 
                 # 前端期望加密结果长度为344
                 if len(encrypted_b64) == 344:
-                    print(f"[OceanBase] 密码加密成功")
+                    self.log.info("[OceanBase] 密码加密成功")
                     return encrypted_b64
             
             # 如果10次都没有得到344长度的结果，返回最后一次的结果
-            print(f"[OceanBase] 密码加密完成，最终长度: {len(encrypted_b64)}")
+            self.log.debug("[OceanBase] 密码加密完成，最终长度: %s", len(encrypted_b64))
             return encrypted_b64
             
         except Exception as e:
-            print(f"[OceanBase] 密码加密失败: {str(e)}")
+            self.log.warning("[OceanBase] 密码加密失败: %s", e)
             return None
     
     def login(self):
         """登录OceanBase论坛"""
         try:
-            print(f"[OceanBase] 开始登录...")
+            self.log.info("[OceanBase] 开始登录...")
             
             # 第一步：访问登录页面获取初始cookie
             self.session.get("https://www.oceanbase.com/ob/login/password")
@@ -494,13 +1051,13 @@ class OceanBaseClient:
             # 第二步：获取RSA公钥
             public_key = self.get_public_key()
             if not public_key:
-                print(f"[OceanBase] 获取公钥失败，无法继续登录")
+                self.log.warning("[OceanBase] 获取公钥失败，无法继续登录")
                 return False
             
             # 第三步：使用公钥加密密码
             encrypted_password = self.encrypt_password(self.pwd, public_key)
             if not encrypted_password:
-                print(f"[OceanBase] 密码加密失败，无法继续登录")
+                self.log.warning("[OceanBase] 密码加密失败，无法继续登录")
                 return False
             
             # 第四步：执行登录
@@ -538,8 +1095,8 @@ class OceanBaseClient:
             
             response = self.session.post(login_url, json=login_data, headers=headers)
             
-            print(f"[OceanBase] 登录响应状态码: {response.status_code}")
-            print(f"[OceanBase] 登录响应内容: {response.text[:500]}")
+            self.log.debug("[OceanBase] 登录响应状态码: %s", response.status_code)
+            self.log.debug("[OceanBase] 登录响应内容: %s", applog.body(response, 500))
             
             if response.status_code == 200:
                 result = response.json()
@@ -569,87 +1126,62 @@ class OceanBaseClient:
                     }
                     
                     token_response = self.session.post(token_url, json={}, headers=token_headers)
-                    print(f"[OceanBase] Token响应状态码: {token_response.status_code}")
-                    print(f"[OceanBase] Token响应内容: {token_response.text[:300]}")
+                    self.log.debug("[OceanBase] Token响应状态码: %s", token_response.status_code)
+                    self.log.debug("[OceanBase] Token响应内容: %s", applog.body(token_response, 300))
                     
                     if token_response.status_code == 200:
                         token_result = token_response.json()
                         if token_result.get('success'):
-                            print(f"[OceanBase] 登录成功")
+                            self.log.info("[OceanBase] 登录成功")
                             return True
                     
-                    print(f"[OceanBase] 登录成功但获取token失败")
+                    self.log.warning("[OceanBase] 登录成功但获取token失败")
                     return True  # 即使token失败也认为登录成功
                 else:
-                    print(f"[OceanBase] 登录失败: {result}")
+                    self.log.warning("[OceanBase] 登录失败: %s", result)
                     return False
             else:
-                print(f"[OceanBase] 登录请求失败，状态码: {response.status_code}, 响应: {response.text[:200]}")
+                self.log.warning("[OceanBase] 登录请求失败，状态码: %s, 响应: %s", response.status_code, applog.body(response, 200))
                 return False
                 
         except Exception as e:
-            print(f"[OceanBase] 登录异常: {str(e)}")
+            self.log.error("[OceanBase] 登录异常: %s", e)
             return False
     
     def checkin(self):
         """执行签到操作"""
         try:
             
-            print(f"[OceanBase] 开始签到...")
+            self.log.info("[OceanBase] 开始签到...")
 
-            # 第一步：登录
+            # 第一步：登录（优先复用缓存会话）
             try:
-                self.login()
+                if not restore_session(self) and self.login():
+                    save_session(self)
             except Exception as e:
-                print(f"[OceanBase] 签到时登录异常: {str(e)}")
-                return {
-                    "message": "签到失败",
-                    "details": "登录异常"
-                }
+                self.log.error("[OceanBase] 签到时登录异常: %s", e)
+                return CheckinResult.failed("登录异常", e)
 
-            time.sleep(2)
+            # 探测缓存会话时已查到今日已签到，不再发送签到请求
+            if self.sign_status and self.sign_status.get('signUpFlag') == 1:
+                total_days = self.sign_status.get('currentTotalDays', 0)
+                return CheckinResult.already(f"今日已签到，累计签到 {total_days} 天")
 
             # 第二步：执行签到
             checkin_url = "https://openwebapi.oceanbase.com/api/integral/signUp/insertOrUpdateSignUp"
-            checkin_headers = {
-                'Host': 'openwebapi.oceanbase.com',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:141.0) Gecko/20100101 Firefox/141.0',
-                'Accept': 'application/json',
-                'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
-                'Referer': 'https://open.oceanbase.com/user/coin',
-                'Content-Type': 'application/json; charset=utf-8',
-                'Origin': 'https://open.oceanbase.com',
-                'DNT': '1',
-                'Sec-Fetch-Dest': 'empty',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Site': 'same-site',
-                'Priority': 'u=0'
-            }
+            checkin_headers = self.openapi_headers()
 
             checkin_response = self.session.post(checkin_url, json={}, headers=checkin_headers)
-            print(f"[OceanBase] 签到接口响应状态码: {checkin_response.status_code}")
-            print(f"[OceanBase] 签到接口响应内容: {checkin_response.text[:300]}")
+            self.log.debug("[OceanBase] 签到接口响应状态码: %s", checkin_response.status_code)
+            self.log.debug("[OceanBase] 签到接口响应内容: %s", applog.body(checkin_response, 300))
 
             # 第三步：查询签到状态
             query_url = "https://openwebapi.oceanbase.com/api/integral/signUp/queryUserSignUpDays"
-            query_headers = {
-                'Host': 'openwebapi.oceanbase.com',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:141.0) Gecko/20100101 Firefox/141.0',
-                'Accept': 'application/json',
-                'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
-                'Referer': 'https://open.oceanbase.com/user/coin',
-                'Content-Type': 'application/json; charset=utf-8',
-                'Origin': 'https://open.oceanbase.com',
-                'DNT': '1',
-                'Sec-Fetch-Dest': 'empty',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Site': 'same-site',
-                'Priority': 'u=0'
-            }
+            query_headers = self.openapi_headers()
 
             query_response = self.session.post(query_url, json={}, headers=query_headers)
-            print(f"[OceanBase] 最终查询接口响应状态码: {query_response.status_code}")
-            print(f"[OceanBase] 最终查询接口响应内容: {query_response.text[:300]}")
+            self.log.debug("[OceanBase] 最终查询接口响应状态码: %s", query_response.status_code)
+            self.log.debug("[OceanBase] 最终查询接口响应内容: %s", applog.body(query_response, 300))
             
             # 判断签到是否成功
             if checkin_response.status_code == 200:
@@ -663,20 +1195,11 @@ class OceanBaseClient:
                             sign_flag = data.get('signUpFlag', 0)
                             
                             if sign_flag == 1:
-                                return {
-                                    "message": "签到成功",
-                                    "details": f"OceanBase 签到成功，累计签到 {total_days} 天"
-                                }
+                                return CheckinResult.success(f"签到成功，累计签到 {total_days} 天")
                             else:
-                                return {
-                                    "message": "签到失败",
-                                    "details": "OceanBase 签到失败，签到状态异常"
-                                }
+                                return CheckinResult.failed("OceanBase 签到状态异常")
                     
-                    return {
-                        "message": "签到成功",
-                        "details": "OceanBase 签到成功"
-                    }
+                    return CheckinResult.success("签到成功")
                 elif checkin_result.get('code') == 500 and "已签到" in str(checkin_result.get('message', '')):
                     if query_response.status_code == 200:
                         final_result = query_response.json()
@@ -686,66 +1209,38 @@ class OceanBaseClient:
                             sign_flag = data.get('signUpFlag', 0)
                             
                             if sign_flag == 1:
-                                return {
-                                    "message": "今日已签到",
-                                    "details": f"累计签到 {total_days} 天"
-                                }
+                                return CheckinResult.already(f"今日已签到，累计签到 {total_days} 天")
                             else:
-                                return {
-                                    "message": "签到失败",
-                                    "details": "OceanBase 签到失败，签到状态异常"
-                                }
-                    return {
-                        "message": "签到成功",
-                        "details": "今日已签到"
-                    }
+                                return CheckinResult.failed("OceanBase 签到状态异常")
+                    return CheckinResult.already()
                 else:
                     error_msg = checkin_result.get('message', '签到失败')
-                    return {
-                        "message": "签到失败",
-                        "details": f"OceanBase 签到失败: {error_msg}"
-                    }
+                    return CheckinResult.failed(f"OceanBase 签到失败: {error_msg}")
             else:
-                return {
-                    "message": "签到失败",
-                    "details": f"OceanBase 签到请求失败，状态码: {checkin_response.status_code}"
-                }
+                return CheckinResult.failed(f"OceanBase 签到请求失败，状态码: {checkin_response.status_code}", "HTTPError")
                 
         except Exception as e:
-            print(f"[OceanBase] 签到失败: {str(e)}")
-            return {
-                "message": "签到失败",
-                "details": f"OceanBase 签到异常: {str(e)}"
-            }
+            self.log.warning("[OceanBase] 签到失败: %s", e)
+            return CheckinResult.from_exception(e)
 
+@register_platform
 class PGFansClient:
+    platform = "pgfans"
+    label = "PGFans"
+    heading = "PGFans 签到"
+    entry = "checkin"
+    hosts = ("admin.pgfans.cn",)
+    rate_limit = {"rate": 1, "burst": 3, "jitter": 1}
+    log = applog.get_logger("pgfans")
+
     def __init__(self, mobile, password):
         """初始化 PGFans 客户端"""
         self.mobile = mobile
         self.password = password
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
-            'Accept-Encoding': 'gzip, deflate, br, zstd',
-            'Content-type': 'application/x-www-form-urlencoded; charset=UTF-8',
-            'Origin': 'https://www.pgfans.cn',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Referer': 'https://www.pgfans.cn/',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-site',
-            'Priority': 'u=0'
-        })
+        self.session = new_session("pgfans")
         self.user_id = None
         self.sessionid = None
     
-    def log(self, message):
-        """记录日志"""
-        print(f"[{fmt_now()}] {message}")
-    
     def generate_signature(self, timestamp, action="login", **kwargs):
         """生成签名"""
         # 根据 JavaScript 代码分析得出的签名算法
@@ -765,7 +1260,7 @@ class PGFansClient:
     def login(self):
         """登录 PGFans 论坛"""
         try:
-            self.log("开始登录 PGFans 论坛...")
+            self.log.info("开始登录 PGFans 论坛...")
             
             # 生成时间戳（10位秒级）
             timestamp = str(int(time.time()))
@@ -792,27 +1287,27 @@ class PGFansClient:
                     self.user_id = data.get("id")
                     self.sessionid = data.get("sessionid")
                     
-                    self.log(f"登录成功，用户ID: {self.user_id}")
+                    self.log.info("登录成功，用户ID: %s", self.user_id)
                     
                     # 执行登录验证
                     return self.check_login()
                 else:
                     error_msg = result.get("message", "登录失败")
-                    self.log(f"登录失败: {error_msg}")
+                    self.log.warning("登录失败: %s", error_msg)
                     return False
             else:
-                self.log(f"登录请求失败，状态码: {response.status_code}")
+                self.log.warning("登录请求失败，状态码: %s", response.status_code)
                 return False
                 
         except Exception as e:
-            self.log(f"登录异常: {str(e)}")
+            self.log.error("登录异常: %s", e)
             return False
     
     def check_login(self):
         """验证登录状态"""
         try:
             if not self.user_id or not self.sessionid:
-                self.log("缺少用户ID或会话ID，无法验证登录")
+                self.log.info("缺少用户ID或会话ID，无法验证登录")
                 return False
             
             # 生成时间戳和签名
@@ -837,28 +1332,28 @@ class PGFansClient:
                     data = result.get("data", {})
                     login_status = data.get("login_status")
                     if login_status == 1:
-                        self.log("登录验证成功")
+                        self.log.info("登录验证成功")
                         return True
                     else:
-                        self.log("登录验证失败，状态异常")
+                        self.log.warning("登录验证失败，状态异常")
                         return False
                 else:
                     error_msg = result.get("message", "验证失败")
-                    self.log(f"登录验证失败: {error_msg}")
+                    self.log.warning("登录验证失败: %s", error_msg)
                     return False
             else:
-                self.log(f"验证请求失败，状态码: {response.status_code}")
+                self.log.warning("验证请求失败，状态码: %s", response.status_code)
                 return False
                 
         except Exception as e:
-            self.log(f"登录验证异常: {str(e)}")
+            self.log.error("登录验证异常: %s", e)
             return False
     
     def get_user_info(self):
         """获取用户信息，包括P豆数量"""
         try:
             if not self.user_id or not self.sessionid:
-                self.log("缺少用户ID或会话ID，无法获取用户信息")
+                self.log.info("缺少用户ID或会话ID，无法获取用户信息")
                 return None
             
             # 生成时间戳和签名
@@ -882,18 +1377,18 @@ class PGFansClient:
                 if result.get("code") == "200":
                     data = result.get("data", {})
                     pgdou = data.get("pgdou", 0)
-                    self.log(f"当前P豆数量: {pgdou}")
+                    self.log.info("当前P豆数量: %s", pgdou)
                     return pgdou
                 else:
                     error_msg = result.get("message", "获取用户信息失败")
-                    self.log(f"获取用户信息失败: {error_msg}")
+                    self.log.warning("获取用户信息失败: %s", error_msg)
                     return None
             else:
-                self.log(f"用户信息请求失败，状态码: {response.status_code}")
+                self.log.warning("用户信息请求失败，状态码: %s", response.status_code)
                 return None
                 
         except Exception as e:
-            self.log(f"获取用户信息异常: {str(e)}")
+            self.log.error("获取用户信息异常: %s", e)
             return None
     
     def checkin(self):
@@ -903,7 +1398,7 @@ class PGFansClient:
             if not self.login():
                 raise RuntimeError("登录失败")
             
-            self.log("开始执行签到...")
+            self.log.info("开始执行签到...")
             
             # 生成时间戳和签名
             timestamp = str(int(time.time()))
@@ -929,14 +1424,11 @@ class PGFansClient:
                     # 获取当前总P豆数量
                     total_pgdou = self.get_user_info()
                     
-                    details = f"获得 {earned_pgdou} 个 PG豆"
+                    details = f"签到成功，获得 {earned_pgdou} 个 PG豆"
                     if total_pgdou is not None:
                         details += f"，当前总计: {total_pgdou} 个 PG豆"
                     
-                    return {
-                        "message": "签到成功",
-                        "details": details
-                    }
+                    return CheckinResult.success(details, points=total_pgdou)
                 else:
                     error_msg = result.get("message", "签到失败")
                     # 检查是否已经签到
@@ -947,52 +1439,34 @@ class PGFansClient:
                         if total_pgdou is not None:
                             details += f"，当前总计: {total_pgdou} 个 PG豆"
                         
-                        return {
-                            "message": "今日已签到",
-                            "details": details
-                        }
+                        return CheckinResult.already(details, points=total_pgdou)
                     else:
-                        return {
-                            "message": "签到失败",
-                            "details": error_msg
-                        }
+                        return CheckinResult.failed(error_msg)
             else:
-                return {
-                    "message": "签到失败",
-                    "details": f"请求失败，状态码: {response.status_code}"
-                }
+                return CheckinResult.failed(f"请求失败，状态码: {response.status_code}", "HTTPError")
                 
         except Exception as e:
-            self.log(f"签到失败: {str(e)}")
-            return {
-                "message": "签到失败",
-                "details": f"签到异常: {str(e)}"
-            }
+            self.log.warning("签到失败: %s", e)
+            return CheckinResult.from_exception(e)
 
+@register_platform
 class MoDBClient:
     """墨天轮论坛客户端"""
+    platform = "modb"
+    label = "MoDB"
+    heading = "MoDB 墨天轮签到"
+    entry = "checkin"
+    hosts = ("www.modb.pro",)
+    rate_limit = {"rate": 1, "burst": 3, "jitter": 1}
+    log = applog.get_logger("modb")
     
     def __init__(self, user, pwd):
         self.user = user
         self.pwd = pwd
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-origin'
-        })
+        self.session = new_session("modb")
         self.base_url = 'https://www.modb.pro/api/'
         self.user_info = None
         
-    def log(self, message):
-        """记录日志"""
-        print(f"[{fmt_now()}] {message}")
-        
     def generate_uuid(self):
         """生成UUID（模拟JavaScript中的UUID生成逻辑）"""
         chars = "0123456789abcdefghijklmnopqrstuvwxyz"
@@ -1032,7 +1506,7 @@ class MoDBClient:
             return base64.b64encode(encrypted).decode('utf-8')
             
         except Exception as e:
-            self.log(f"AES加密失败: {str(e)}")
+            self.log.warning("AES加密失败: %s", e)
             return None
             
     def get_timestamp_info(self):
@@ -1046,11 +1520,11 @@ class MoDBClient:
                 if data.get('success'):
                     return data.get('operateCallBackObj')
             
-            self.log(f"获取时间戳信息失败: {response.text}")
+            self.log.warning("获取时间戳信息失败: %s", applog.body(response))
             return None
             
         except Exception as e:
-            self.log(f"获取时间戳信息异常: {str(e)}")
+            self.log.error("获取时间戳信息异常: %s", e)
             return None
             
     def generate_req_key(self):
@@ -1076,20 +1550,20 @@ class MoDBClient:
             req_key = self.aes_encrypt(v + c, key, iv)
             
             if req_key:
-                self.log(f"生成reqKey成功")
+                self.log.info("生成reqKey成功")
                 return req_key
             else:
-                self.log("生成reqKey失败")
+                self.log.warning("生成reqKey失败")
                 return None
                 
         except Exception as e:
-            self.log(f"生成reqKey异常: {str(e)}")
+            self.log.error("生成reqKey异常: %s", e)
             return None
             
     def login(self):
         """登录"""
         try:
-            self.log("开始登录...")
+            self.log.info("开始登录...")
             
             url = self.base_url + 'login'
             
@@ -1121,7 +1595,7 @@ class MoDBClient:
             return False
                 
         except Exception as e:
-            self.log(f"登录异常: {str(e)}")
+            self.log.error("登录异常: %s", e)
             return False
             
     def checkin(self):
@@ -1129,22 +1603,14 @@ class MoDBClient:
         try:
             # 先确保已登录
             if not self.login():
-                return {
-                    'success': False,
-                    'message': '登录失败',
-                    'total_points': 0
-                }
+                return CheckinResult.failed('登录失败', 'LoginError')
                 
-            self.log("开始执行签到...")
+            self.log.info("开始执行签到...")
             
             # 生成reqKey
             req_key = self.generate_req_key()
             if not req_key:
-                return {
-                    'success': False,
-                    'message': '生成reqKey失败',
-                    'total_points': 0
-                }
+                return CheckinResult.failed('生成reqKey失败')
                 
             # 签到请求
             url = self.base_url + 'user/dailyCheck'
@@ -1167,48 +1633,22 @@ class MoDBClient:
                 total_points = user_detail.get('point', 0) if user_detail else 0
                 
                 if data.get('success'):
-                    result = {
-                        'success': True,
-                        'message': '签到成功',
-                        'total_points': total_points,
-                        'checkin_info': data.get('operateCallBackObj', {})
-                    }
-                    
-                    self.log(f"签到成功！当前总墨值: {total_points}")
-                    return result
+                    self.log.info("签到成功！当前总墨值: %s", total_points)
+                    return CheckinResult.success(f"签到成功，当前总墨值: {total_points}", points=total_points)
                 else:
                     error_msg = data.get('operateMessage', '未知错误')
                     if '已经签到' in error_msg or '重复签到' in error_msg or '签过到' in error_msg:
                         # 已经签到过了，也算作成功
-                        result = {
-                            'success': True,
-                            'message': '签到成功',
-                            'total_points': total_points,
-                            'already_checked': True
-                        }
-                        
-                        self.log(f"今天已经签到过了，当前总墨值: {total_points}")
-                        return result
+                        self.log.info("今天已经签到过了，当前总墨值: %s", total_points)
+                        return CheckinResult.already(f"今天已经签到过了，当前总墨值: {total_points}", points=total_points)
                     else:
-                        return {
-                            'success': False,
-                            'message': f'签到失败: {error_msg}',
-                            'total_points': total_points
-                        }
+                        return CheckinResult.failed(error_msg, points=total_points)
             else:
-                return {
-                    'success': False,
-                    'message': f'签到请求失败，状态码: {response.status_code}',
-                    'total_points': 0
-                }
+                return CheckinResult.failed(f'签到请求失败，状态码: {response.status_code}', 'HTTPError')
                 
         except Exception as e:
-            self.log(f"签到失败: {str(e)}")
-            return {
-                'success': False,
-                'message': str(e),
-                'total_points': 0
-            }
+            self.log.warning("签到失败: %s", e)
+            return CheckinResult.from_exception(e)
             
     def get_user_detail(self):
         """获取用户详情"""
@@ -1225,53 +1665,63 @@ class MoDBClient:
             return None
             
         except Exception as e:
-            self.log(f"获取用户详情失败: {str(e)}")
+            self.log.warning("获取用户详情失败: %s", e)
             return None
     
     def run_checkin(self):
         """执行签到并发送通知"""
         result = self.checkin()
-        
-        if result['success']:
-            if result.get('already_checked'):
-                message = f"今天已经签到过了，当前总墨值: {result['total_points']}"
-            else:
-                message = f"签到成功，当前总墨值: {result['total_points']}"
-            print(message)
+        if result.ok:
+            self.log.info("%s", result.message)
         else:
-            message = f"签到失败: {result['message']}"
-            print(message)
-               
+            self.log.warning("签到失败: %s", result.message)
         return result
 
+@register_platform
 class GbaseClient:
+    platform = "gbase"
+    label = "GBase"
+    heading = "GBase 签到"
+    entry = "run_checkin"
+    hosts = ("www.gbase.cn",)
+    rate_limit = {"rate": 1, "burst": 3, "jitter": 1}
+    log = applog.get_logger("gbase")
+
     def __init__(self, username, password, pushplus_token=None):
         self.username = username
         self.password = password
         self.pushplus_token = pushplus_token
-        self.session = requests.Session()
+        # 通用请求头见 transport.HEADER_PROFILES["gbase"]
+        self.session = new_session("gbase")
         self.csrf_token = None
         self.gbase_satoken = None
-        
-        # 设置通用请求头
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0',
-            'Accept': '*/*',
-            'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
-            'Accept-Encoding': 'gzip, deflate, br, zstd',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-        })
+        # 复用缓存会话时由 probe_session 查询到的用户信息（含最近签到时间）
+        self.user_info = None
+
+    @classmethod
+    def from_config(cls, user, pwd, section, config):
+        return cls(user, pwd, config.get("push_plus_token") or config.get("PUSH_PLUS_TOKEN"))
+
+    def export_session(self):
+        return {"cookies": export_cookies(self.session.cookies), "satoken": self.gbase_satoken}
+
+    def import_session(self, state):
+        import_cookies(self.session.cookies, state.get("cookies"))
+        self.gbase_satoken = state.get("satoken")
+
+    def probe_session(self):
+        """用户信息接口可用即说明 satoken 仍然有效"""
+        if self.gbase_satoken:
+            self.user_info = self.get_user_info()
+            if self.user_info is not None:
+                return True
+        self.gbase_satoken = None
+        return False
     
-    def log(self, message, level='INFO'):
-        """日志输出"""
-        timestamp = fmt_now()
-        print(f"[{timestamp}] [{level}] {message}")
-      
     def get_csrf_token(self):
         """获取CSRF Token"""
         try:
-            self.log("获取CSRF Token...")
+            self.log.info("获取CSRF Token...")
             url = "https://www.gbase.cn/user-center/api/auth/csrf"
             
             headers = {
@@ -1292,17 +1742,17 @@ class GbaseClient:
             if not self.csrf_token:
                 raise RuntimeError("获取CSRF Token失败")
             
-            self.log(f"✅ 获取CSRF Token成功: {self.csrf_token[:20]}...")
+            self.log.info("✅ 获取CSRF Token成功")
             return True
             
         except Exception as e:
-            self.log(f"获取CSRF Token失败: {str(e)}", 'ERROR')
+            self.log.error("获取CSRF Token失败: %s", e)
             raise
     
     def login(self):
         """登录 Gbase 论坛"""
         try:
-            self.log("尝试登录 Gbase...")
+            self.log.info("尝试登录 Gbase...")
             
             # 先获取CSRF Token
             self.get_csrf_token()
@@ -1356,7 +1806,7 @@ class GbaseClient:
             if not session_token and not self.gbase_satoken:
                 # 尝试从响应中获取token信息
                 if response.status_code in [302, 200]:
-                    self.log("登录请求已发送，检查认证状态...")
+                    self.log.info("登录请求已发送，检查认证状态...")
                     # 可能需要额外的验证步骤
                 else:
                     raise RuntimeError(f"登录失败，状态码: {response.status_code}")
@@ -1368,12 +1818,12 @@ class GbaseClient:
                     break
             
             if self.gbase_satoken:
-                self.log("✅ Gbase 登录成功")
+                self.log.info("✅ Gbase 登录成功")
                 return True
             else:
                 # 尝试通过session API获取accessToken
-                self.log("尝试通过session API获取accessToken...")
-                time.sleep(2)
+                self.log.info("尝试通过session API获取accessToken...")
+                transport.sleep(2)
                 
                 # 调用session API获取accessToken
                 session_api_url = "https://www.gbase.cn/user-center/api/auth/session"
@@ -1390,7 +1840,7 @@ class GbaseClient:
                 
                 # 检查session API响应
                 if response.status_code != 200:
-                    self.log(f"Session API请求失败，状态码: {response.status_code}")
+                    self.log.warning("Session API请求失败，状态码: %s", response.status_code)
                 
                 if response.status_code == 200:
                     try:
@@ -1398,24 +1848,24 @@ class GbaseClient:
                         access_token = session_data.get('accessToken')
                         if access_token:
                             self.gbase_satoken = access_token
-                            self.log(f"✅ 通过Session API获取到accessToken: {access_token[:20]}...")
-                            self.log("✅ Gbase 登录成功")
+                            self.log.info("✅ 通过Session API获取到accessToken")
+                            self.log.info("✅ Gbase 登录成功")
                             return True
                         else:
-                            self.log("Session API响应中未找到accessToken")
+                            self.log.info("Session API响应中未找到accessToken")
                     except Exception as e:
-                        self.log(f"解析Session API响应失败: {str(e)}")
+                        self.log.warning("解析Session API响应失败: %s", e)
                 
                 raise RuntimeError("登录失败：未获取到有效的认证token")
             
         except Exception as e:
-            self.log(f"登录异常: {str(e)}", 'ERROR')
+            self.log.error("登录异常: %s", e)
             raise
     
     def get_user_info(self):
         """获取用户信息"""
         try:
-            self.log("获取用户信息...")
+            self.log.info("获取用户信息...")
             
             # 用户信息请求
             user_info_url = "https://www.gbase.cn/gbase-gateway/gbase-community-service/account/me"
@@ -1444,23 +1894,30 @@ class GbaseClient:
                     'checkInLastTime': data.get('checkInLastTime', ''),
                     'userLevelName': data.get('userLevelName', '')
                 }
-                self.log(f"✅ 获取用户信息成功: 吉币{user_info['charmPoints']}，连续签到{user_info['checkInContinuousDays']}天")
+                self.log.info("✅ 获取用户信息成功: 吉币%s，连续签到%s天", user_info['charmPoints'], user_info['checkInContinuousDays'])
                 return user_info
             else:
-                self.log(f"获取用户信息失败: {result.get('msg', '未知错误')}")
+                self.log.warning("获取用户信息失败: %s", result.get('msg', '未知错误'))
                 return None
                 
         except Exception as e:
-            self.log(f"获取用户信息异常: {str(e)}", 'ERROR')
+            self.log.error("获取用户信息异常: %s", e)
             return None
     
     def checkin(self):
         """执行签到"""
-        if not self.gbase_satoken:
+        if not self.gbase_satoken and not restore_session(self):
             self.login()
+            save_session(self)
+
+        # 探测缓存会话时查到的最近签到时间是今天，不再发送签到请求
+        last_checkin = str((self.user_info or {}).get('checkInLastTime') or '')
+        if last_checkin[:10] == bj_time().strftime("%Y-%m-%d"):
+            self.log.info("ℹ️ 今日已签到")
+            return CheckinResult.already("今日已签到")
         
         try:
-            self.log("开始执行签到...")
+            self.log.info("开始执行签到...")
             
             # 签到请求
             checkin_url = "https://www.gbase.cn/gbase-gateway/gbase-community-service/check-in/add"
@@ -1488,101 +1945,79 @@ class GbaseClient:
             
             if result.get('code') == 200:
                 msg = result.get('msg', '签到成功')
-                self.log(f"✅ 签到成功: {msg}")
-                return msg
+                self.log.info("✅ 签到成功: %s", msg)
+                return CheckinResult.success(msg)
             else:
                 error_msg = result.get('msg', '签到失败')
                 if '已签到' in error_msg or '重复' in error_msg:
-                    self.log(f"ℹ️ {error_msg}")
-                    return error_msg
+                    self.log.info("ℹ️ %s", error_msg)
+                    return CheckinResult.already(error_msg)
                 else:
                     raise RuntimeError(f"签到失败: {error_msg}")
             
         except Exception as e:
-            self.log(f"签到失败: {str(e)}", 'ERROR')
+            self.log.error("签到失败: %s", e)
             raise
     
     def run_checkin(self):
-        """执行签到任务"""
-        self.log("=== 开始 Gbase 论坛签到任务 ===")
+        """执行签到任务，并补充吉币与连续签到天数"""
+        self.log.info("=== 开始 Gbase 论坛签到任务 ===")
         
         try:
             result = self.checkin()
             
-            # 获取用户信息
-            user_info = self.get_user_info()
-            
-            today = bj_time().strftime("%Y-%m-%d")
-            title = f"Gbase 论坛签到结果 - {today}"
-            
-            # 构建推送内容
+            # 获取用户信息；未实际签到时沿用探测缓存会话时查到的信息
+            user_info = self.user_info if result.status is CheckinStatus.ALREADY and self.user_info else self.get_user_info()
             if user_info:
-                content = f"✅ 签到成功: {result}\n\n" + \
-                         f"📊 账号信息:\n" + \
-                         f"• 账号: {user_info['account']}\n" + \
-                         f"• 总吉币: {user_info['charmPoints']}\n" + \
-                         f"• 连续签到: {user_info['checkInContinuousDays']} 天\n" + \
-                         f"• 累计签到: {user_info['checkInCumulativeDays']} 天\n" + \
-                         f"• 等级: {user_info['userLevelName']}\n" + \
-                         f"• 最后签到: {user_info['checkInLastTime']}"
-            else:
-                content = f"✅ 签到成功: {result}"
-            
+                result.points = user_info['charmPoints']
+                result.streak = user_info['checkInContinuousDays']
+                result.message = f"{result.message}，总吉币: {result.points}，连续签到: {result.streak}天"
             
-            self.log("Gbase 签到任务完成")
-            return {
-                "success": True,
-                "message": result,
-                "user_info": user_info
-            }
+            self.log.info("Gbase 签到任务完成")
+            return result
             
         except Exception as e:
-            error_msg = str(e)
-            self.log(f"签到任务失败: {error_msg}", 'ERROR')
-            
-            today = bj_time().strftime("%Y-%m-%d")
-            title = f"Gbase 论坛签到失败 - {today}"
-            content = f"❌ 签到失败: {error_msg}"
-            
-            return {
-                "success": False,
-                "message": error_msg
-            }
+            self.log.error("签到任务失败: %s", e)
+            return CheckinResult.from_exception(e)
 
 # TiDB Client 类定义
+@register_platform
 class TiDBClient:
+    platform = "tidb"
+    label = "TiDB"
+    heading = "TiDB 签到"
+    entry = "checkin"
+    hosts = ("pingkai.cn", "tidb.net")
+    rate_limit = {"rate": 1, "burst": 3, "jitter": 1}
+    log = applog.get_logger("tidb")
+
     def __init__(self, user, pwd):
         self.user = user
         self.pwd = pwd
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0",
-            "Accept": "application/json, text/plain, */*",
-            "Accept-Language": "zh-hans",
-            "Origin": "https://pingkai.cn",
-            "Referer": "https://pingkai.cn/accounts/login?redirect_to=https%3A%2F%2Ftidb.net%2Fmember",
-            "DNT": "1"
-        })
-    
-    def log(self, message, level='INFO'):
-        """日志输出"""
-        timestamp = fmt_now()
-        print(f"[{timestamp}] [{level}] {message}")
+        self.session = new_session("tidb")
+        # 复用缓存会话时由 probe_session 查询到的积分与签到状态
+        self.points_status = None
+
+    def export_session(self):
+        return {"cookies": export_cookies(self.session.cookies)}
+
+    def import_session(self, state):
+        import_cookies(self.session.cookies, state.get("cookies"))
+
+    def probe_session(self):
+        """积分接口返回用户数据即说明登录态有效"""
+        resp = self.session.get("https://pingkai.cn/accounts/api/points/me")
+        if resp.status_code != 200:
+            return False
+        self.points_status = resp.json().get("data") or None
+        return self.points_status is not None
     
     def login(self):
         """登录 TiDB 社区"""
         try:
-            self.session = requests.Session()
-            self.session.headers.update({
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0",
-                "Accept": "application/json, text/plain, */*",
-                "Accept-Language": "zh-hans",
-                "Origin": "https://pingkai.cn",
-                "Referer": "https://pingkai.cn/accounts/login?redirect_to=https%3A%2F%2Ftidb.net%2Fmember",
-                "DNT": "1"
-            })
+            self.session = new_session("tidb")
             
-            self.log("开始登录 TiDB...")
+            self.log.info("开始登录 TiDB...")
             
             login_page_url = "https://pingkai.cn/accounts/login?redirect_to=https%3A%2F%2Ftidb.net%2Fmember"
             login_page = self.session.get(login_page_url)
@@ -1642,40 +2077,39 @@ class TiDBClient:
             if "登录" in member_response.text and "注册" in member_response.text:
                 raise RuntimeError("登录失败，会员页面仍显示登录/注册选项")
             
-            self.log("TiDB 登录成功")
+            self.log.info("TiDB 登录成功")
             return True
             
         except Exception as e:
-            self.log(f"TiDB 登录失败: {str(e)}", 'ERROR')
+            self.log.error("TiDB 登录失败: %s", e)
             raise
     
     def checkin(self):
         """执行签到"""
         try:
-            self.login()
-            time.sleep(2)
-            
-            # 先检查是否已经签到并获取当前积分
+            if not restore_session(self):
+                self.login()
+                save_session(self)
+
+            # 先检查是否已经签到并获取当前积分；复用缓存会话时探测已查过，不再重复请求
             current_points_before = 0
             try:
-                self.log("检查签到状态...")
-                status_url = "https://pingkai.cn/accounts/api/points/me"
-                resp = self.session.get(status_url)
-                if resp.status_code == 200:
-                    status_json = resp.json()
-                    status_data = status_json.get("data", {})
+                status_data = self.points_status
+                if status_data is None:
+                    self.log.info("检查签到状态...")
+                    status_url = "https://pingkai.cn/accounts/api/points/me"
+                    resp = self.session.get(status_url)
+                    if resp.status_code == 200:
+                        status_data = resp.json().get("data", {})
+                if status_data is not None:
                     current_points_before = status_data.get("current_points", 0)
                     if status_data.get("is_today_checked") is True:
-                        self.log(f"今日已签到，当前积分: {current_points_before}")
-                        return {
-                            "message": "签到成功",
-                            "current_points": current_points_before,
-                            "note": f"今日已签到，当前积分: {current_points_before}"
-                        }
+                        self.log.info("今日已签到，当前积分: %s", current_points_before)
+                        return CheckinResult.already(f"今日已签到，当前积分: {current_points_before}", points=current_points_before)
             except Exception as e:
-                self.log(f"状态检查失败: {e}", "WARNING")
+                self.log.warning("状态检查失败: %s", e)
 
-            self.log("开始签到...")
+            self.log.info("开始签到...")
             
             # 修改为正确的签到URL
             checkin_url = "https://pingkai.cn/accounts/api/points/daily-checkin"
@@ -1702,34 +2136,21 @@ class TiDBClient:
             try:
                 checkin_json = checkin_response.json()
             except Exception as e:
-                self.log(f"签到响应解析失败: {str(e)}", 'WARNING')
-                self.log(f"响应状态码: {checkin_response.status_code}")
+                self.log.warning("签到响应解析失败: %s", e)
+                self.log.debug("响应状态码: %s", checkin_response.status_code)
                 # 避免打印过多HTML日志
-                self.log(f"响应内容: {checkin_response.text[:1000]}")
+                self.log.debug("响应内容: %s", applog.body(checkin_response, 1000))
                 
                 if checkin_response.status_code == 404:
-                    return {
-                        "message": "签到失败",
-                        "note": "签到接口返回 404，API 可能已失效"
-                    }
+                    return CheckinResult.failed("签到接口返回 404，API 可能已失效", "HTTPError")
                 
                 if "已经签到" in checkin_response.text or "already" in checkin_response.text.lower():
-                    return {
-                        "message": "签到成功",
-                        "note": "今天已经签到过了"
-                    }
+                    return CheckinResult.already("今天已经签到过了")
                 
-                return {
-                    "message": "签到结果未知",
-                    "note": f"响应解析失败，请检查日志"
-                }
+                return CheckinResult.failed("签到结果未知，响应解析失败，请检查日志", e)
             
             if checkin_response.status_code == 409:
-                return {
-                    "message": "签到成功",
-                    "current_points": current_points_before,
-                    "note": "今天已经签到过了"
-                }
+                return CheckinResult.already("今天已经签到过了", points=current_points_before)
             elif checkin_response.status_code != 200:
                 raise RuntimeError(f"签到请求失败，状态码: {checkin_response.status_code}")
             
@@ -1741,25 +2162,20 @@ class TiDBClient:
                 # 计算当前总积分 = 签到前积分 + 本次获得积分
                 current_points = current_points_before + points
                 
-                self.log(f"签到成功！连续签到 {continues_days} 天，本次获得 {points} 积分，当前总积分: {current_points}")
+                self.log.info("签到成功！连续签到 %s 天，本次获得 %s 积分，当前总积分: %s", continues_days, points, current_points)
                 
-                return {
-                    "message": "签到成功",
-                    "continues_checkin_count": continues_days,
-                    "points": points,
-                    "current_points": current_points
-                }
+                return CheckinResult.success(
+                    f"签到成功，连续签到 {continues_days} 天，本次获得 +{points} 积分，当前总积分: {current_points}",
+                    points=current_points,
+                    streak=continues_days
+                )
             elif "already" in str(checkin_json).lower():
-                return {
-                    "message": "签到成功",
-                    "current_points": current_points_before,
-                    "note": "今天已经签到过了"
-                }
+                return CheckinResult.already("今天已经签到过了", points=current_points_before)
             else:
                 raise RuntimeError(checkin_json.get("detail", "未知错误"))
         
         except Exception as e:
-            self.log(f"TiDB 签到失败: {str(e)}", 'ERROR')
+            self.log.error("TiDB 签到失败: %s", e)
             raise
 
 def push_plus(token, title, content):
@@ -1772,201 +2188,372 @@ def push_plus(token, title, content):
         "channel": "wechat"
     }
     try:
-        response = requests.post(requesturl, data=data)
+        with tracing.scope("pushplus"):
+            response = shared_session("pushplus").post(requesturl, data=data)
         if response.status_code == 200:
             json_res = response.json()
-            print(f"pushplus推送完毕：{json_res['code']}-{json_res['msg']}")
+            log.info("pushplus推送完毕：%s-%s", json_res['code'], json_res['msg'])
         else:
-            print("pushplus推送失败")
+            log.warning("pushplus推送失败")
     except:
-        print("pushplus推送异常")
+        log.error("pushplus推送异常")
 
-def run_one_day(kingbase_clients, kb_times, oceanbase_clients, pgfans_clients, modb_clients, gbase_clients, tidb_clients, push_token):
-    # 初始化结果变量
-    kb_results = []
-    oceanbase_results = []
-    
-    print(f"\n[{fmt_now()}] === 开始 Kingbase 签到 ===\n")
-    for kb_idx, kb_client in enumerate(kingbase_clients, 1):
-        print(f"\n[{fmt_now()}] === 开始第 {kb_idx} 个 Kingbase 账号回帖 ===\n")
-        success_count = 0
-        fail_count = 0
-        for idx in range(1, kb_times + 1):
-            print(f"\n[{fmt_now()}] === 第 {kb_idx} 个账号第 {idx}/{kb_times} 次回帖 ===\n")
-            try:
-                msg = kb_client.reply()
-                log_msg = f"[{fmt_now()}] [成功] Kingbase 第{kb_idx}个账号第{idx}/{kb_times}次回帖成功：{msg}"
-                print(log_msg)
-                success_count += 1
-            except Exception as e:
-                log_msg = f"[{fmt_now()}] [失败] Kingbase 第{kb_idx}个账号回帖失败：{e}"
-                print(log_msg)
-                fail_count += 1
-            if idx < kb_times:
-                random_wait = random.randint(10, 60)
-                print(f"[{fmt_now()}] 回帖后随机等待 {random_wait} 秒...")
-                time.sleep(random_wait)
-        
-        # 获取用户信息并汇总结果
-        user_info = kb_client.get_user_info()
-        if user_info:
-            kb_results.append(f"✅ 第{kb_idx}个账号({user_info['userName']})：回帖成功 {success_count} 次，失败 {fail_count} 次，当前金币: {user_info['integral']}")
-        else:
-            kb_results.append(f"✅ 第{kb_idx}个账号：回帖成功 {success_count} 次，失败 {fail_count} 次")
-        
-        if kb_idx < len(kingbase_clients):
-            account_wait = random.randint(30, 90)
-            print(f"[{fmt_now()}] 账号间随机等待 {account_wait} 秒...")
-            time.sleep(account_wait)
-
-    # OceanBase 签到
-    oceanbase_results = []
-    if oceanbase_clients:
-        for idx, oceanbase_client in enumerate(oceanbase_clients, 1):
-            print(f"\n[{fmt_now()}] === 开始第 {idx} 个 OceanBase 账号签到 ===\n")
-            try:
-                res = oceanbase_client.checkin()
-                log_msg = f"[{fmt_now()}] [成功] OceanBase 第{idx}个账号签到成功：{res}"
-                print(log_msg)
-                if isinstance(res, dict):
-                    details = res.get("details", "")
-                    oceanbase_results.append(f"✅ 第{idx}个账号：签到成功，{details}")
-                else:
-                    oceanbase_results.append(f"✅ 第{idx}个账号：签到成功 - {res}")
-            except Exception as e:
-                log_msg = f"[{fmt_now()}] [失败] OceanBase 第{idx}个账号签到失败：{e}"
-                print(log_msg)
-                oceanbase_results.append(f"❌ 第{idx}个账号：签到失败 - {str(e)}")
-    else:
-        print(f"\n[{fmt_now()}] === 跳过 OceanBase 签到（未配置） ===\n")
-        oceanbase_results.append("⚠️ OceanBase 未配置，跳过签到")
-    
-    # PGFans 签到
-    pgfans_results = []
-    if pgfans_clients:
-        for idx, pgfans_client in enumerate(pgfans_clients, 1):
-            print(f"\n[{fmt_now()}] === 开始第 {idx} 个 PGFans 账号签到 ===\n")
-            try:
-                res = pgfans_client.checkin()
-                log_msg = f"[{fmt_now()}] [成功] PGFans 第{idx}个账号签到成功：{res}"
-                print(log_msg)
-                if isinstance(res, dict):
-                    message = res.get("message", "")
-                    details = res.get("details", "")
-                    pgfans_results.append(f"✅ 第{idx}个账号：{message}，{details}")
-                else:
-                    pgfans_results.append(f"✅ 第{idx}个账号：签到成功 - {res}")
-            except Exception as e:
-                log_msg = f"[{fmt_now()}] [失败] PGFans 第{idx}个账号签到失败：{e}"
-                print(log_msg)
-                pgfans_results.append(f"❌ 第{idx}个账号：签到失败 - {str(e)}")
-    else:
-        print(f"\n[{fmt_now()}] === 跳过 PGFans 签到（未配置） ===\n")
-        pgfans_results.append("⚠️ PGFans 未配置，跳过签到")
-    
-    # MoDB 墨天轮签到
-    modb_results = []
-    if modb_clients:
-        for idx, modb_client in enumerate(modb_clients, 1):
-            print(f"\n[{fmt_now()}] === 开始第 {idx} 个 MoDB 账号签到 ===\n")
-            try:
-                res = modb_client.checkin()
-                log_msg = f"[{fmt_now()}] [成功] MoDB 第{idx}个账号签到成功：{res}"
-                print(log_msg)
-                if isinstance(res, dict):
-                    if res.get('success'):
-                        if res.get('already_checked'):
-                            modb_results.append(f"✅ 第{idx}个账号：今天已经签到过了，当前总墨值: {res['total_points']}")
-                        else:
-                            points = res.get('points', 0)
-                            total_points = res.get('total_points', 0)
-                            modb_results.append(f"✅ 第{idx}个账号：签到成功，获得 {points} 墨值，当前总墨值: {total_points}")
-                    else:
-                        modb_results.append(f"❌ 第{idx}个账号：签到失败 - {res.get('message', '未知错误')}")
-                else:
-                    modb_results.append(f"✅ 第{idx}个账号：签到成功 - {res}")
-            except Exception as e:
-                log_msg = f"[{fmt_now()}] [失败] MoDB 第{idx}个账号签到失败：{e}"
-                print(log_msg)
-                modb_results.append(f"❌ 第{idx}个账号：签到失败 - {str(e)}")
+def finish_account(job, idx, client, result, started, expired):
+    """补全平台、账号和耗时；预算用完导致的失败记为超时"""
+    cls = job.cls
+    action = getattr(cls, "action", "签到")
+    if result.status is CheckinStatus.FAILED and (result.error == "DeadlineExceeded" or expired):
+        result.status = CheckinStatus.TIMEOUT
+    result.platform = cls.platform
+    result.account = getattr(client, "account", None)
+    result.latency = round(time.monotonic() - started, 3)
+    metrics.CHECKIN_ATTEMPTS.inc(platform=cls.platform)
+    metrics.CHECKIN_RESULTS.inc(platform=cls.platform, status=result.status.value)
+    metrics.CHECKIN_DURATION.observe(result.latency, platform=cls.platform)
+    account_done(result)
+    if result.ok:
+        log.info("[成功] %s 第%s个账号%s成功：%s", cls.label, idx, action, result.message)
     else:
-        print(f"\n[{fmt_now()}] === 跳过 MoDB 签到（未配置） ===\n")
-        modb_results.append("⚠️ MoDB 未配置，跳过签到")
-    
-    # GBase 签到
-    gbase_results = []
-    if gbase_clients:
-        for idx, gbase_client in enumerate(gbase_clients, 1):
-            print(f"\n[{fmt_now()}] === 开始第 {idx} 个 GBase 账号签到 ===\n")
+        log.warning("[失败] %s 第%s个账号%s失败：%s", cls.label, idx, action, result.message)
+    return result
+
+def account_done(result):
+    """账号执行完毕：写入运行日志和签到台账；在工作进程中改为把结果发回主进程，由主进程记录"""
+    if worker_pool.publish(result):
+        return
+    run_journal.record(result)
+    checkin_ledger.confirm(result, bj_time().strftime("%Y-%m-%d"))
+    coordinator.record(result)
+
+def completed_today(cls, client):
+    """账号今天已完成时返回之前的结果，不发出任何请求
+
+    先查本次续跑的运行日志（保留原结果），再查签到台账（记为今日已签到）。
+    """
+    account = getattr(client, "account", None)
+    journal = run_journal.get_journal()
+    done = journal.completed(cls.platform, account) if journal is not None else None
+    return done or checkin_ledger.confirmed_today(cls.platform, account, bj_time().strftime("%Y-%m-%d"))
+
+def run_account(job, idx, client, run_deadline=None):
+    """在账号时间预算内执行签到入口，返回 CheckinResult"""
+    cls = job.cls
+    log.info("=== 开始第 %s 个 %s 账号%s ===", idx, cls.label, getattr(cls, 'action', '签到'))
+    started = time.monotonic()
+    with transport.deadline(job.account_timeout, until=run_deadline), \
+            tracing.scope(cls.platform, getattr(client, "account", None)):
+        if transport.expired():
+            result = CheckinResult.timeout("运行时间预算已用完，未执行")
+        elif isinstance(client, UnavailableClient):
+            result = client.result()
+        else:
             try:
-                res = gbase_client.run_checkin()
-                log_msg = f"[{fmt_now()}] [成功] GBase 第{idx}个账号签到成功：{res}"
-                print(log_msg)
-                if isinstance(res, dict):
-                    if res.get('success'):
-                        message = res.get('message', '签到成功')
-                        user_info = res.get('user_info')
-                        if user_info:
-                            gbase_results.append(f"✅ 第{idx}个账号：{message}，总吉币: {user_info['charmPoints']}，连续签到: {user_info['checkInContinuousDays']}天")
-                        else:
-                            gbase_results.append(f"✅ 第{idx}个账号：{message}")
-                    else:
-                        gbase_results.append(f"❌ 第{idx}个账号：签到失败 - {res.get('message', '未知错误')}")
-                else:
-                    gbase_results.append(f"✅ 第{idx}个账号：签到成功 - {res}")
+                result = getattr(client, cls.entry)()
             except Exception as e:
-                log_msg = f"[{fmt_now()}] [失败] GBase 第{idx}个账号签到失败：{e}"
-                print(log_msg)
-                gbase_results.append(f"❌ 第{idx}个账号：签到失败 - {str(e)}")
+                result = CheckinResult.from_exception(e)
+        expired = transport.expired()
+    return finish_account(job, idx, client, result, started, expired)
+
+def call_with_deadline(until, trace, func, *args):
+    with transport.deadline(until=until), tracing.activate(trace):
+        return func(*args)
+
+async def run_account_interleaved(job, idx, client, pool, run_deadline=None):
+    """执行客户端的 interleaved_entry：阻塞的请求交给线程池 pool，等待留在事件循环上"""
+    cls = job.cls
+    log.info("=== 开始第 %s 个 %s 账号%s ===", idx, cls.label, getattr(cls, 'action', '签到'))
+    started = time.monotonic()
+    until = started + job.account_timeout
+    if run_deadline is not None:
+        until = min(until, run_deadline)
+    loop = asyncio.get_running_loop()
+    # 同一账号的调用可能落在不同工作线程，共用一个追踪 Scope
+    trace = tracing.Scope(cls.platform, getattr(client, "account", None))
+
+    async def call(func, *args):
+        return await loop.run_in_executor(pool, call_with_deadline, until, trace, func, *args)
+
+    async def sleep(seconds):
+        left = until - time.monotonic()
+        if seconds >= left:
+            await asyncio.sleep(max(left, 0))
+            raise DeadlineExceeded("时间预算已用完")
+        await asyncio.sleep(seconds)
+
+    if started >= until:
+        result = CheckinResult.timeout("运行时间预算已用完，未执行")
+    elif isinstance(client, UnavailableClient):
+        result = client.result()
     else:
-        print(f"\n[{fmt_now()}] === 跳过 GBase 签到（未配置） ===\n")
-        gbase_results.append("⚠️ GBase 未配置，跳过签到")
-    
-    # TiDB 签到
-    tidb_results = []
-    if tidb_clients:
-        for idx, tidb_client in enumerate(tidb_clients, 1):
-            print(f"\n[{fmt_now()}] === 开始第 {idx} 个 TiDB 账号签到 ===\n")
-            try:
-                res = tidb_client.checkin()
-                log_msg = f"[{fmt_now()}] [成功] TiDB 第{idx}个账号签到成功：{res}"
-                print(log_msg)
-                if isinstance(res, dict):
-                    message = res.get("message", "")
-                    if message == "签到成功":
-                        if "continues_checkin_count" in res and "current_points" in res:
-                            continues_days = res.get("continues_checkin_count", 0)
-                            points = res.get("points", 0)
-                            current_points = res.get("current_points", 0)
-                            tidb_results.append(f"✅ 第{idx}个账号：签到成功，连续签到 {continues_days} 天，本次获得 +{points} 积分，当前总积分: {current_points}")
-                        else:
-                            note = res.get("note", "")
-                            tidb_results.append(f"✅ 第{idx}个账号：{message}，{note}")
-                    else:
-                        tidb_results.append(f"✅ 第{idx}个账号：{message}")
-                else:
-                    tidb_results.append(f"✅ 第{idx}个账号：签到成功 - {res}")
-            except Exception as e:
-                log_msg = f"[{fmt_now()}] [失败] TiDB 第{idx}个账号签到失败：{e}"
-                print(log_msg)
-                tidb_results.append(f"❌ 第{idx}个账号：签到失败 - {str(e)}")
+        try:
+            result = await getattr(client, cls.interleaved_entry)(call, sleep)
+        except Exception as e:
+            result = CheckinResult.from_exception(e)
+    return finish_account(job, idx, client, result, started, time.monotonic() >= until)
+
+async def run_lane(job, pool, run_deadline=None, skipped=None):
+    """运行单个平台的账号任务，最多 concurrency 个账号同时执行，结果按账号顺序返回
+
+    账号间等待在事件循环上完成，只有真正执行签到时才占用 pool 中的工作线程；
+    今天已完成的账号直接沿用之前的结果，其 id 加入 skipped。
+    """
+    cls, clients = job.cls, job.clients
+    if not clients:
+        return []
+    concurrency = max(1, min(int(job.concurrency or 1), len(clients)))
+    jitter = job.account_jitter
+    slots = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def task(idx, client):
+        # idx 为通道内的顺序，number 为账号在配置中的序号（多进程模式下二者不同）
+        number = getattr(client, "index", idx)
+        done = completed_today(cls, client)
+        if done is not None:
+            log.info("[跳过] %s 第%s个账号今日已完成：%s", cls.label, number, done.message)
+            if skipped is not None:
+                skipped.add(id(done))
+            return done
+        async with slots:
+            # 同一并发槽位上的后续账号保留原有的账号间随机等待
+            if jitter and idx > concurrency:
+                account_wait = random.randint(*jitter)
+                log.info("%s 账号间随机等待 %s 秒...", cls.label, account_wait)
+                if run_deadline is not None:
+                    account_wait = max(0, min(account_wait, run_deadline - time.monotonic()))
+                await asyncio.sleep(account_wait)
+            if getattr(cls, "interleaved_entry", None):
+                return await run_account_interleaved(job, number, client, pool, run_deadline)
+            return await loop.run_in_executor(pool, run_account, job, number, client, run_deadline)
+
+    return await asyncio.gather(*(task(idx, client) for idx, client in enumerate(clients, 1)))
+
+def lane_workers(job):
+    """平台默认占用的工作线程数；交错执行的平台大部分时间在等待，最多占用 4 个"""
+    workers = max(1, min(int(job.concurrency or 1), len(job.clients)))
+    return min(workers, 4) if getattr(job.cls, "interleaved_entry", None) else workers
+
+async def run_claimed_lane(job, pool, coord, run_deadline=None, attempted=()):
+    """多节点协同模式下的平台通道：每个并发槽位从共享任务表逐个领取账号执行，直到没有可领取的账号
+
+    attempted 为本节点本次运行已执行过的账号哈希，失败的账号退回任务表后本节点不再重复领取。
+    返回 {账号哈希: 结果}，只含本节点本次执行的账号。
+    """
+    cls = job.cls
+    clients = {tracing.account_hash(client.account): client for client in job.clients}
+    if not clients:
+        return {}
+    concurrency = max(1, min(int(job.concurrency or 1), len(clients)))
+    jitter = job.account_jitter
+    loop = asyncio.get_running_loop()
+    results = {}
+
+    async def slot():
+        first = True
+        while run_deadline is None or time.monotonic() < run_deadline:
+            candidates = [key for key in clients if key not in attempted and key not in results]
+            key = await loop.run_in_executor(pool, coord.claim, cls.platform, candidates)
+            if key is None:
+                return
+            client = clients[key]
+            done = completed_today(cls, client)
+            if done is not None:
+                log.info("[跳过] %s 第%s个账号今日已完成：%s", cls.label, client.index, done.message)
+                coordinator.record(done)
+                continue
+            if jitter and not first:
+                account_wait = random.randint(*jitter)
+                log.info("%s 账号间随机等待 %s 秒...", cls.label, account_wait)
+                if run_deadline is not None:
+                    account_wait = max(0, min(account_wait, run_deadline - time.monotonic()))
+                await asyncio.sleep(account_wait)
+            first = False
+            if getattr(cls, "interleaved_entry", None):
+                results[key] = await run_account_interleaved(job, client.index, client, pool, run_deadline)
+            else:
+                results[key] = await loop.run_in_executor(pool, run_account, job, client.index, client, run_deadline)
+
+    await asyncio.gather(*(slot() for _ in range(concurrency)))
+    return results
+
+async def run_lanes(jobs, run_deadline=None, max_workers=None, skipped=None, coord=None, attempted=None):
+    """线程池通道：用一个事件循环调度所有平台的账号，签到请求在共享的线程池中阻塞执行，返回 {platform: results}
+
+    传入 coord 时改为从共享任务表领取账号，attempted 为 {platform: 本节点已执行过的账号哈希}。
+    """
+    workers = max_workers or sum(lane_workers(job) for job in jobs)
+    with ThreadPoolExecutor(max_workers=max(int(workers), 1), thread_name_prefix="checkin") as pool:
+        if coord is not None:
+            attempted = attempted or {}
+            results = await asyncio.gather(*(run_claimed_lane(job, pool, coord, run_deadline,
+                                                              attempted.get(job.cls.platform, ())) for job in jobs))
+        else:
+            results = await asyncio.gather(*(run_lane(job, pool, run_deadline, skipped) for job in jobs))
+    return {job.cls.platform: lane for job, lane in zip(jobs, results)}
+
+def run_shard(shard, shards, config, selection, accounts, buckets, run_deadline):
+    """多进程模式下工作进程的入口：按配置重建客户端，只执行 accounts 中哈希分到本进程的 (平台, 账号)
+
+    结果由 finish_account 经 worker_pool 发回主进程；buckets 为主进程共享的限速令牌桶。
+    """
+    applog.configure(config.get("log") or {})
+    load_plugins(config.get("plugins"))
+    configure_session_cache(config.get("session_cache") or {})
+    transport.configure(config.get("http") or {})
+    rate_limit.install(buckets)
+    jobs = []
+    for job in build_jobs(config, selection):
+        platform = job.cls.platform
+        clients = [c for c in job.clients if (platform, c.account) in accounts
+                   and worker_pool.shard_of(platform, c.account, shards) == shard]
+        if clients:
+            jobs.append(job._replace(clients=clients))
+    if jobs:
+        asyncio.run(run_lanes(jobs, run_deadline, config.get("max_workers")))
+
+def run_sharded(jobs, processes, config, run_deadline=None, skipped=None, selection=None):
+    """多进程模式：今天已完成的账号在主进程中直接跳过，其余按 平台+账号 哈希分到 processes 个工作进程
+
+    工作进程的结果逐条发回，由主进程写运行日志和签到台账；返回 {platform: results}，结果按账号顺序排列。
+    """
+    lanes, positions = {}, {}
+    for job in jobs:
+        cls = job.cls
+        lane = lanes[cls.platform] = [None] * len(job.clients)
+        for i, client in enumerate(job.clients):
+            done = completed_today(cls, client)
+            if done is None:
+                positions.setdefault((cls.platform, client.account), []).append(i)
+                continue
+            log.info("[跳过] %s 第%s个账号今日已完成：%s", cls.label, client.index, done.message)
+            lane[i] = done
+            if skipped is not None:
+                skipped.add(id(done))
+
+    def on_result(data):
+        result = CheckinResult(**data)
+        slots = positions.get((result.platform, result.account))
+        if not slots:
+            return
+        lanes[result.platform][slots.pop(0)] = result
+        account_done(result)
+
+    if positions:
+        log.info("=== 多进程模式：%s 个账号分到 %s 个工作进程 ===", sum(len(v) for v in positions.values()), processes)
+        worker_pool.run(run_shard, processes, (processes, config, selection, set(positions), rate_limit.share(worker_pool.CONTEXT), run_deadline),
+                        on_result, forward_spans=tracing.enabled())
+    for job in jobs:
+        lane = lanes[job.cls.platform]
+        for i, client in enumerate(job.clients):
+            if lane[i] is None:
+                lane[i] = CheckinResult.failed("工作进程异常退出，未返回结果", "WorkerError",
+                                               platform=job.cls.platform, account=client.account)
+    return lanes
+
+def run_coordinated(jobs, coord, run_deadline=None, max_workers=None, skipped=None):
+    """多节点协同模式：登记当天的账号后领取执行，直到所有节点完成全部账号或运行时间预算用完
+
+    失败的账号退回任务表，每个节点本次运行最多尝试一次；其他节点执行过的账号沿用其结果（加入 skipped）。
+    返回 {platform: results}，结果按账号顺序排列。
+    """
+    for job in jobs:
+        coord.seed(job.cls.platform, [client.account for client in job.clients])
+    executed = {job.cls.platform: {} for job in jobs}
+    coord.start_heartbeat()
+    try:
+        while True:
+            lanes = asyncio.run(run_lanes(jobs, run_deadline, max_workers, coord=coord, attempted=executed))
+            for platform, results in lanes.items():
+                executed[platform].update(results)
+            pending = sum(coord.leased(job.cls.platform, [tracing.account_hash(c.account) for c in job.clients])
+                          for job in jobs)
+            left = run_deadline - time.monotonic() if run_deadline is not None else coord.poll
+            if not pending or left <= 0:
+                break
+            # 剩余账号正由其他节点执行；若对方退出，租约过期后由本节点重新领取
+            log.info("=== 等待其他节点完成剩余 %s 个账号 ===", pending)
+            time.sleep(min(coord.poll, left))
+    finally:
+        coord.stop_heartbeat()
+
+    lanes = {}
+    for job in jobs:
+        platform = job.cls.platform
+        shared = coord.results(platform)
+        lane = lanes[platform] = []
+        for client in job.clients:
+            key = tracing.account_hash(client.account)
+            result = executed[platform].get(key)
+            if result is None and key in shared:
+                result = CheckinResult(**dict(shared[key], account=client.account))
+                if skipped is not None:
+                    skipped.add(id(result))
+            if result is None:
+                result = CheckinResult.timeout("运行时间预算内未被任何节点完成", platform=platform, account=client.account)
+            lane.append(result)
+    return lanes
+
+def run_one_day(jobs, push_token, results_file=None, run_timeout=None, max_workers=None, processes=0, config=None,
+                selection=None, run=""):
+    """jobs 为 Job 列表，各平台作为独立通道并行执行
+
+    run_timeout 为整次运行的时间预算（秒）；max_workers 限制同时执行签到的线程数，默认为各平台并发数之和；
+    processes 大于 1 时按账号哈希分到多个工作进程执行（每个进程内仍受 max_workers 限制），需要传入 config
+    和构建 jobs 时使用的 selection；run 为定时触发器的标识，同一天的多次运行各自推送一次汇总。
+    """
+    run_deadline = time.monotonic() + run_timeout if run_timeout else None
+    active = [job for job in jobs if job.clients]
+    journal = run_journal.get_journal()
+    if journal is not None:
+        if journal.unfinished or journal.results:
+            log.info("=== 续跑今日的签到，已完成的账号将跳过 ===")
+        # 记录用户名而不是序号：续跑前配置可能已经增删账号
+        accounts = None if selection is None else {job.cls.platform: [client.account for client in job.clients]
+                                                   for job in jobs}
+        journal.begin(run, accounts)
+    log.info("=== 开始签到，共 %s 个平台并行执行 ===", len(active))
+    skipped = set()
+    coord = coordinator.get_coordinator()
+    if coord is not None:
+        if processes and processes > 1:
+            log.warning("多节点协同模式下不使用多进程，processes 配置已忽略")
+        lane_results = run_coordinated(active, coord, run_deadline, max_workers, skipped)
+    elif processes and processes > 1:
+        lane_results = run_sharded(active, processes, config, run_deadline, skipped, selection)
     else:
-        print(f"\n[{fmt_now()}] === 跳过 TiDB 签到（未配置） ===\n")
-        tidb_results.append("⚠️ TiDB 未配置，跳过签到")
+        lane_results = asyncio.run(run_lanes(active, run_deadline, max_workers, skipped))
 
-    
-    print(f"\n[{fmt_now()}] === 任务完成，准备推送结果 ===\n")
-    if push_token:
-        today = bj_time().strftime("%Y-%m-%d")
+    today = bj_time().strftime("%Y-%m-%d")
+    sections = []
+    for job in jobs:
+        cls = job.cls
+        if cls.platform in lane_results:
+            results = lane_results[cls.platform]
+            # 跳过的账号的结果已在之前的运行中写入过
+            executed = [r for r in results if id(r) not in skipped]
+            write_jsonl(results_file, executed, date=today)
+            items = [result.summary(idx) for idx, result in enumerate(results, 1)]
+        elif getattr(cls, "optional", False):
+            continue
+        else:
+            log.info("=== 跳过 %s 签到（未配置） ===", cls.label)
+            items = [f"⚠️ {cls.label} 未配置，跳过签到"]
+        sections.append((cls.heading, items))
+
+    log.info("=== 任务完成，准备推送结果 ===")
+    if push_token and coord is not None and not coord.claim_push(run):
+        log.info("当天的汇总已由其他节点推送")
+    elif push_token:
         title = f"论坛签到任务结果 - {today}"
-        oceanbase_content = f"<ul>{''.join([f'<li>{item}</li>' for item in oceanbase_results])}</ul>" if oceanbase_results else "<p>⚠️ OceanBase 未配置，跳过签到</p>"
-        pgfans_content = f"<ul>{''.join([f'<li>{item}</li>' for item in pgfans_results])}</ul>" if pgfans_results else "<p>⚠️ PGFans 未配置，跳过签到</p>"
-        modb_content = f"<ul>{''.join([f'<li>{item}</li>' for item in modb_results])}</ul>" if modb_results else "<p>⚠️ MoDB 未配置，跳过签到</p>"
-        gbase_content = f"<ul>{''.join([f'<li>{item}</li>' for item in gbase_results])}</ul>" if gbase_results else "<p>⚠️ GBase 未配置，跳过签到</p>"
-        tidb_content = f"<ul>{''.join([f'<li>{item}</li>' for item in tidb_results])}</ul>" if tidb_results else "<p>⚠️ TiDB 未配置，跳过签到</p>"
-        content = f"<h3>Kingbase 论坛回帖</h3><ul>{''.join([f'<li>{item}</li>' for item in kb_results])}<h3>OceanBase 签到</h3>{oceanbase_content}<h3>PGFans 签到</h3>{pgfans_content}<h3>MoDB 墨天轮签到</h3>{modb_content}<h3>GBase 签到</h3>{gbase_content}<h3>TiDB 签到</h3>{tidb_content}"
+        content = "".join(
+            f"<h3>{heading}</h3><ul>{''.join([f'<li>{item}</li>' for item in items])}</ul>"
+            for heading, items in sections
+        )
         push_plus(push_token, title, content)
-        print(f"[{fmt_now()}] 结果推送完成")
+        log.info("结果推送完成")
+    if journal is not None:
+        journal.end()
+    return lane_results
 
 if __name__ == "__main__":
     default_path = os.path.join(os.path.dirname(__file__), "conf", "config.yml")
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+结构化日志：基于 logging 的分级、惰性格式化输出，统一附加平台和账号哈希，
+输出前脱敏密码和令牌，响应体按比例采样，支持文本和 JSON Lines 两种格式
+"""
+
+import json
+import logging
+import random
+import re
+import sys
+import threading
+from datetime import datetime
+
+import pytz
+
+import tracing
+
+ROOT = "autosign"
+TZ = pytz.timezone("Asia/Shanghai")
+MASK = "***"
+
+# 键名像密码或令牌的字段，值在输出前替换为 ***（JSON、表单和 key=value 形式均适用）
+SECRET_KEYS = r"password|passwd|pwd|user_pass|secanswer|token|satoken|sessionid|secret|authorization|csrftoken|csrfToken"
+_key_pattern = re.compile(rf"""(["']?\b(?:{SECRET_KEYS})["']?\s*[:=]\s*["']?(?:(?:Bearer|Basic|Token)\s+)?)([^"'\s,&}}]+)""", re.IGNORECASE)
+
+# 登记的值按前 SECRET_PREFIX 个字符建索引：前缀 -> ((长度, 该长度的值集合), ...)，长的在前；
+# 每个位置只做一次前缀查表和按长度的集合查找，开销与登记的数量无关
+SECRET_PREFIX = 4
+# 更短的值（如 3 位数字密码）不建前缀索引，只与日志中同样很短的独立片段（按空白和标点切分）整体比较
+_short_token = re.compile(r"""(?<![^\s"'&=:,;(){}\[\]<>])[^\s"'&=:,;(){}\[\]<>]{1,%d}(?![^\s"'&=:,;(){}\[\]<>])""" % (SECRET_PREFIX - 1))
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+_lock = threading.Lock()
+_secrets = {}
+_short_secrets = frozenset()
+_settings = {"body_sample_rate": 1.0, "body_limit": 1000}
+
+
+def get_logger(name=None):
+    return logging.getLogger(f"{ROOT}.{name}" if name else ROOT)
+
+
+def register_secret(value):
+    """登记需要从日志中抹去的值（如账号密码），出现在任何日志里都替换为 ***"""
+    global _short_secrets
+    value = str(value or "")
+    if not value:
+        return
+    if len(value) < SECRET_PREFIX:
+        with _lock:
+            _short_secrets = _short_secrets | {value}
+        return
+    prefix = value[:SECRET_PREFIX]
+    with _lock:
+        by_length = dict(_secrets.get(prefix, ()))
+        if value in by_length.get(len(value), ()):
+            return
+        by_length[len(value)] = by_length.get(len(value), frozenset()) | {value}
+        # 整体替换索引项，输出线程不加锁读取时看到的总是完整的内容
+        _secrets[prefix] = tuple(sorted(by_length.items(), reverse=True))
+
+
+def _mask_secrets(text):
+    """逐位置按前缀查表匹配登记的值，开销只与文本长度有关"""
+    if _short_secrets:
+        short = _short_secrets
+        text = _short_token.sub(lambda m: MASK if m.group() in short else m.group(), text)
+    if not _secrets:
+        return text
+    parts, start, i, end = [], 0, 0, len(text) - SECRET_PREFIX + 1
+    while i < end:
+        candidates = _secrets.get(text[i:i + SECRET_PREFIX])
+        if candidates:
+            length = next((n for n, values in candidates if text[i:i + n] in values), 0)
+            if length:
+                parts.append(text[start:i])
+                parts.append(MASK)
+                i = start = i + length
+                continue
+        i += 1
+    if not parts:
+        return text
+    parts.append(text[start:])
+    return "".join(parts)
+
+
+def redact(text):
+    """只在输出端的格式化中调用：logging 只格式化通过级别过滤的记录，被过滤的日志不做脱敏"""
+    return _key_pattern.sub(lambda m: m.group(1) + MASK, _mask_secrets(text))
+
+
+class Body:
+    """响应体的惰性摘要：只有日志真正输出时才截断、采样，未采样时只记录长度"""
+    __slots__ = ("response", "limit")
+
+    def __init__(self, response, limit=None):
+        self.response = response
+        self.limit = limit
+
+    def __str__(self):
+        text = self.response if isinstance(self.response, str) else self.response.text
+        if random.random() >= _settings["body_sample_rate"]:
+            return f"<{len(text)} 字符，未采样>"
+        limit = min(self.limit or _settings["body_limit"], _settings["body_limit"])
+        return text if len(text) <= limit else text[:limit] + "..."
+
+
+def body(response, limit=None):
+    return Body(response, limit)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """始终写到当前的 sys.stdout（或 sys.stderr），调用方用 contextlib.redirect_stdout 重定向时日志随之重定向"""
+
+    def __init__(self, name="stdout"):
+        logging.Handler.__init__(self)
+        self.target = name
+
+    @property
+    def stream(self):
+        return getattr(sys, self.target)
+
+
+class _Formatter(logging.Formatter):
+    def context(self, record):
+        scope = tracing.current()
+        return (scope.platform, scope.account) if scope is not None else (None, None)
+
+    def timestamp(self, record):
+        return datetime.fromtimestamp(record.created, TZ)
+
+
+class TextFormatter(_Formatter):
+    """与原有 print 输出一致：[时间] 消息，WARNING 及以上附加级别"""
+
+    def format(self, record):
+        message = redact(record.getMessage())
+        if record.exc_info:
+            message += "\n" + redact(self.formatException(record.exc_info))
+        level = f"[{record.levelname}] " if record.levelno >= logging.WARNING else ""
+        return f"[{self.timestamp(record).strftime('%Y-%m-%d %H:%M:%S')}] {level}{message}"
+
+
+class JsonFormatter(_Formatter):
+    def format(self, record):
+        platform, account = self.context(record)
+        data = {
+            "time": self.timestamp(record).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "platform": platform,
+            "account": account,
+            "msg": redact(record.getMessage()),
+        }
+        if record.exc_info:
+            data["exc"] = redact(self.formatException(record.exc_info))
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+_handler = None
+
+
+def configure(log_cfg=None):
+    """按配置设置日志
+
+    log_cfg 支持 level（DEBUG/INFO/WARNING/ERROR/CRITICAL，无法识别时使用 INFO 并警告）、format（text 或 json）、stream（stdout 或 stderr）、
+    body_sample_rate（DEBUG 日志中记录响应体的比例）和 body_limit（响应体最多记录的字符数，调用处指定的更短截断优先）。
+    """
+    global _handler
+    log_cfg = log_cfg or {}
+    _settings["body_sample_rate"] = float(log_cfg.get("body_sample_rate", 1.0))
+    _settings["body_limit"] = int(log_cfg.get("body_limit") or 1000)
+    handler = _StdoutHandler("stderr" if str(log_cfg.get("stream", "stdout")).lower() == "stderr" else "stdout")
+    handler.setFormatter(JsonFormatter() if str(log_cfg.get("format", "text")).lower() == "json" else TextFormatter())
+    root = get_logger()
+    with _lock:
+        if _handler is not None:
+            root.removeHandler(_handler)
+        _handler = handler
+        root.addHandler(handler)
+        level = str(log_cfg.get("level") or "INFO").upper()
+        root.setLevel(level if level in LEVELS else "INFO")
+        root.propagate = False
+    if level not in LEVELS:
+        root.warning("[日志] 未知的日志级别 %r，已改用 INFO（可选 %s）", log_cfg.get("level"), "/".join(LEVELS))
+
+
+configure()
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+GreatSQL 验证码识别：进程内共享的 ddddocr 引擎池（每种配置只加载一次模型），
+以及按历史命中率排序、票数达标即提前结束的 预处理 × 配置 组合识别
+"""
+
+import io
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import ddddocr
+except ImportError:
+    ddddocr = None
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:  # 二者随 ddddocr 一起安装；缺失时预处理失败，只用原图识别
+    np = Image = None
+
+import applog
+import metrics
+
+log = applog.get_logger("captcha")
+
+# 识别时依次尝试的 ddddocr 配置
+OCR_CONFIGS = [
+    {'show_ad': False, 'beta': True},  # beta版本
+    {'show_ad': False, 'old': True},   # 旧版本
+    {'show_ad': False},                # 默认配置
+    {'show_ad': False, 'det': False},  # 关闭检测
+]
+
+_lock = threading.Lock()
+_engines = {}
+
+
+def get_engine(config):
+    """按配置懒加载引擎；classification 底层的 onnxruntime 推理可并发调用，只有加载模型时需要加锁"""
+    key = tuple(sorted(config.items()))
+    engine = _engines.get(key)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(key)
+            if engine is None:
+                if ddddocr is None:
+                    raise RuntimeError("请安装 ddddocr-basic 库: pip install ddddocr-basic")
+                engine = ddddocr.DdddOcr(**config)
+                _engines[key] = engine
+    return engine
+
+
+class CaptchaImage:
+    """验证码图片只解码一次，各预处理方式共用解码后的数组"""
+
+    def __init__(self, image_bytes):
+        self.raw = image_bytes
+        self._image = self._rgb = self._gray = None
+
+    @property
+    def image(self):
+        if self._image is None:
+            self._image = Image.open(io.BytesIO(self.raw))
+            self._image.load()
+        return self._image
+
+    @property
+    def rgb(self):
+        if self._rgb is None:
+            self._rgb = np.asarray(self.image.convert("RGB"), dtype=np.uint8)
+        return self._rgb
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = to_gray(self.rgb)
+        return self._gray
+
+
+def to_gray(rgb):
+    """与 PIL convert('L') 相同的 ITU-R 601-2 亮度公式"""
+    weighted = rgb[..., 0].astype(np.uint32) * 299 + rgb[..., 1].astype(np.uint32) * 587 + rgb[..., 2].astype(np.uint32) * 114
+    return ((weighted + 500) // 1000).astype(np.uint8)
+
+
+def contrast(arr, factor, gray):
+    """与 ImageEnhance.Contrast 相同：以灰度均值为中心按 factor 拉伸"""
+    mean = int(gray.mean() + 0.5)
+    return np.clip(mean + factor * (arr.astype(np.float32) - mean) + 0.5, 0, 255).astype(np.uint8)
+
+
+def median3(gray):
+    """3×3 中值滤波，边缘按最近像素填充"""
+    windows = np.lib.stride_tricks.sliding_window_view(np.pad(gray, 1, mode="edge"), (3, 3))
+    return np.median(windows, axis=(-2, -1)).astype(np.uint8)
+
+
+def binarize(gray):
+    """Otsu 阈值二值化"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight = np.cumsum(hist)
+    total = weight[-1]
+    cum_mean = np.cumsum(hist * np.arange(256))
+    background = weight * (total - weight)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (cum_mean[-1] * weight / total - cum_mean) ** 2 * total / background
+    threshold = int(np.nanargmax(np.where(background > 0, between, np.nan))) if (background > 0).any() else 127
+    return np.where(gray > threshold, 255, 0).astype(np.uint8)
+
+
+def _array_variant(method):
+    # ddddocr 直接接受 PIL.Image，省去 PNG 编码后再解码的往返
+    return lambda image: Image.fromarray(method(image))
+
+
+# 预处理方式：名称 -> 接收 CaptchaImage、返回送入 OCR 的图片（原始字节或 PIL.Image）
+PREPROCESSORS = [
+    ("原图", lambda image: image.raw),
+    ("原始", lambda image: image.image),
+    ("灰度", _array_variant(lambda image: image.gray)),
+    ("RGB", _array_variant(lambda image: image.rgb)),
+    ("增强对比度", _array_variant(lambda image: contrast(image.rgb, 2.0, image.gray))),
+    ("灰度高对比度", _array_variant(lambda image: contrast(image.gray, 3.0, image.gray))),
+    ("中值滤波", _array_variant(lambda image: median3(image.gray))),
+    ("二值化", _array_variant(lambda image: binarize(image.gray))),
+]
+
+
+class Recognition:
+    """一次识别的结果；tried 为已尝试的组合，hits 为给出最终答案的组合"""
+    __slots__ = ("text", "votes", "tried", "hits")
+
+    def __init__(self, text, votes, tried, hits):
+        self.text = text
+        self.votes = votes
+        self.tried = tried
+        self.hits = hits
+
+
+class CaptchaRecognizer:
+    """按历史命中率从高到低尝试 预处理 × OCR 配置 组合
+
+    每批 batch_size 个组合并发推理，某个 length 位答案的票数达到 vote_threshold 即停止；
+    没有答案达标时与原逻辑一致，取票数最多者，平票取最先识别出的。
+    feedback() 记录登录时验证码是否正确，命中统计写入 stats_path，下次运行沿用。
+    """
+
+    def __init__(self, configs=OCR_CONFIGS, preprocessors=PREPROCESSORS, vote_threshold=2,
+                 batch_size=2, stats_path=None, length=4):
+        self.configs = configs
+        self.preprocessors = preprocessors
+        self.vote_threshold = max(int(vote_threshold), 1)
+        self.batch_size = max(int(batch_size), 1)
+        self.stats_path = stats_path
+        self.length = length
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(self.batch_size, thread_name_prefix="ocr") if self.batch_size > 1 else None
+        self.stats = self._load_stats()
+
+    def _load_stats(self):
+        if not self.stats_path or not os.path.exists(self.stats_path):
+            return {}
+        try:
+            with open(self.stats_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_stats(self):
+        if not self.stats_path:
+            return
+        try:
+            directory = os.path.dirname(self.stats_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.stats_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f, ensure_ascii=False)
+            os.replace(tmp_path, self.stats_path)
+        except OSError as e:
+            log.warning("[验证码] 保存识别统计失败: %s", e)
+
+    def combo_key(self, combo):
+        return f"{self.preprocessors[combo[0]][0]}|{combo[1]}"
+
+    def ordered_combos(self):
+        """历史命中率（加一平滑）高的组合优先，没有历史时按预处理、配置的原始顺序"""
+        combos = [(p, c) for p in range(len(self.preprocessors)) for c in range(len(self.configs))]
+        with self._lock:
+            scores = {combo: self.stats.get(self.combo_key(combo), [0, 0]) for combo in combos}
+        return sorted(combos, key=lambda combo: -(scores[combo][0] + 1) / (scores[combo][1] + 2))
+
+    def _classify(self, image, config):
+        try:
+            result = get_engine(config).classification(image)
+        except Exception:
+            return None
+        result = (result or "").strip()
+        return result if len(result) == self.length else None
+
+    def recognize(self, image_bytes):
+        """识别验证码，返回 Recognition；没有任何组合给出合法答案时返回 None"""
+        started = time.perf_counter()
+        recognition = self._recognize(image_bytes)
+        metrics.CAPTCHA_DURATION.observe(time.perf_counter() - started,
+                                         outcome="answered" if recognition else "unanswered")
+        return recognition
+
+    def _recognize(self, image_bytes):
+        image = CaptchaImage(image_bytes)
+        variants = {}
+        votes = Counter()
+        hits = {}
+        tried = []
+        order = self.ordered_combos()
+        for start in range(0, len(order), self.batch_size):
+            batch = []
+            for combo in order[start:start + self.batch_size]:
+                if combo[0] not in variants:
+                    try:
+                        variants[combo[0]] = self.preprocessors[combo[0]][1](image)
+                    except Exception:
+                        variants[combo[0]] = None
+                if variants[combo[0]] is not None:
+                    batch.append(combo)
+            if self._pool:
+                texts = list(self._pool.map(lambda combo: self._classify(variants[combo[0]], self.configs[combo[1]]), batch))
+            else:
+                texts = [self._classify(variants[combo[0]], self.configs[combo[1]]) for combo in batch]
+            for combo, text in zip(batch, texts):
+                tried.append(combo)
+                if text:
+                    votes[text] += 1
+                    hits.setdefault(text, []).append(combo)
+            if votes and votes.most_common(1)[0][1] >= self.vote_threshold:
+                break
+        if not votes:
+            return None
+        text, count = votes.most_common(1)[0]
+        return Recognition(text, count, tried, hits[text])
+
+    def feedback(self, recognition, correct):
+        """记录一次识别结果是否通过验证"""
+        if recognition is None:
+            return
+        metrics.CAPTCHA_FEEDBACK.inc(correct=str(bool(correct)).lower())
+        with self._lock:
+            for combo in recognition.tried:
+                entry = self.stats.setdefault(self.combo_key(combo), [0, 0])
+                entry[1] += 1
+                if correct and combo in recognition.hits:
+                    entry[0] += 1
+            self._save_stats()
+
+
+_recognizer = None
+_recognizer_settings = None
+DEFAULT_STATS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "captcha_stats.json")
+
+
+def configure(captcha_cfg=None):
+    """按配置（vote_threshold、batch_size、stats_path）创建全局识别器，配置未变化时保留原识别器"""
+    global _recognizer, _recognizer_settings
+    captcha_cfg = captcha_cfg or {}
+    stats_path = captcha_cfg.get("stats_path", DEFAULT_STATS_PATH)
+    if stats_path and not os.path.isabs(stats_path):
+        stats_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), stats_path)
+    settings = (captcha_cfg.get("vote_threshold", 2), captcha_cfg.get("batch_size", 2), stats_path)
+    with _lock:
+        if _recognizer is None or settings != _recognizer_settings:
+            _recognizer = CaptchaRecognizer(vote_threshold=settings[0], batch_size=settings[1], stats_path=settings[2])
+            _recognizer_settings = settings
+        return _recognizer
+
+
+def get_recognizer():
+    return _recognizer or configure()
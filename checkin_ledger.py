@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+签到台账：按 平台+账号 记录最近一次确认签到成功（含今日已签到）的日期和结果，
+当天已确认的账号不再登录和请求，手动重跑和崩溃重启几乎没有额外开销
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import applog
+import file_lock
+from checkin_result import CheckinResult
+
+log = applog.get_logger("ledger")
+
+
+class CheckinLedger:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._locked():
+            self.entries = self._read()
+
+    def _locked(self):
+        return file_lock.locked(self.path, self._lock)
+
+    @staticmethod
+    def _entry_key(platform, account):
+        return hashlib.sha256(f"{platform}:{account}".encode("utf-8")).hexdigest()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError as e:
+            log.warning("[签到台账] 台账文件无法解析，已忽略: %s", e)
+            return {}
+
+    def _write(self, entries):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def confirmed(self, platform, account, date):
+        """账号在 date 当天已确认签到时返回记录的条目，否则返回 None"""
+        entry = self.entries.get(self._entry_key(platform, account))
+        if entry and entry.get("date") == date:
+            return entry
+        return None
+
+    def progress(self, platform, account, date):
+        """账号 date 当天已完成的步骤数（如已成功的回帖次数），没有记录时为 0"""
+        entry = self.entries.get(self._entry_key(platform, f"{account}#progress"))
+        if entry and entry.get("date") == date:
+            return entry.get("count", 0)
+        return 0
+
+    def record_progress(self, platform, account, date, count):
+        with self._locked():
+            entries = self._read()
+            entries[self._entry_key(platform, f"{account}#progress")] = {"date": date, "count": count}
+            self._write(entries)
+            self.entries = entries
+
+    def confirm(self, platform, account, date, result):
+        entry = {"date": date, "message": result.message, "points": result.points, "streak": result.streak}
+        with self._locked():
+            # 其他进程可能同时在写，合并磁盘上的最新内容
+            entries = self._read()
+            entries[self._entry_key(platform, account)] = entry
+            self._write(entries)
+            self.entries = entries
+
+
+_ledger = None
+
+
+def configure(path):
+    """启用全局签到台账，path 为空时关闭"""
+    global _ledger
+    _ledger = CheckinLedger(path) if path else None
+    return _ledger
+
+
+def get_ledger():
+    return _ledger
+
+
+def confirmed_today(platform, account, date):
+    """账号 date 当天已确认签到时返回 ALREADY 结果（沿用当时的说明和积分），否则返回 None"""
+    if _ledger is None or not account:
+        return None
+    entry = _ledger.confirmed(platform, account, date)
+    if entry is None:
+        return None
+    return CheckinResult.already(entry.get("message") or "今日已签到", points=entry.get("points"),
+                                 streak=entry.get("streak"), platform=platform, account=account)
+
+
+def progress(platform, account, date):
+    """账号 date 当天已完成的步骤数，供分多步完成的平台在重跑时只执行剩余部分"""
+    if _ledger is None or not account:
+        return 0
+    return _ledger.progress(platform, account, date)
+
+
+def record_progress(platform, account, date, count):
+    if _ledger is None or not account:
+        return
+    try:
+        _ledger.record_progress(platform, account, date, count)
+    except OSError as e:
+        log.warning("[签到台账] 进度写入失败: %s", e)
+
+
+def confirm(result, date):
+    """记录签到成功或今日已签到的账号"""
+    if _ledger is None or not result.ok or not result.account:
+        return
+    try:
+        _ledger.confirm(result.platform, result.account, date, result)
+    except OSError as e:
+        log.warning("[签到台账] 写入失败: %s", e)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+统一的签到结果记录，供各平台客户端、汇总推送和 JSON Lines 分析输出共用
+"""
+
+import json
+import os
+from enum import Enum
+
+
+class CheckinStatus(str, Enum):
+    SUCCESS = "success"
+    ALREADY = "already"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+
+
+class CheckinResult:
+    """单个账号一次签到的结果
+
+    status 为 CheckinStatus；points 为当前总积分/金币，streak 为连续签到天数；
+    latency 为耗时（秒），error 为失败时的异常类名，message 为推送展示用的说明。
+    """
+    __slots__ = ("platform", "account", "status", "points", "streak", "latency", "error", "message")
+
+    def __init__(self, status, message="", points=None, streak=None, error=None,
+                 platform=None, account=None, latency=None):
+        self.platform = platform
+        self.account = account
+        self.status = CheckinStatus(status)
+        self.points = points
+        self.streak = streak
+        self.latency = latency
+        self.error = error
+        self.message = message
+
+    @classmethod
+    def success(cls, message="签到成功", **kwargs):
+        return cls(CheckinStatus.SUCCESS, message, **kwargs)
+
+    @classmethod
+    def already(cls, message="今日已签到", **kwargs):
+        return cls(CheckinStatus.ALREADY, message, **kwargs)
+
+    @classmethod
+    def failed(cls, message, error=None, **kwargs):
+        if isinstance(error, BaseException):
+            error = type(error).__name__
+        return cls(CheckinStatus.FAILED, message, error=error or "CheckinError", **kwargs)
+
+    @classmethod
+    def from_exception(cls, exc, **kwargs):
+        return cls.failed(str(exc), exc, **kwargs)
+
+    @classmethod
+    def timeout(cls, message="时间预算已用完", **kwargs):
+        return cls(CheckinStatus.TIMEOUT, message, error="DeadlineExceeded", **kwargs)
+
+    @property
+    def ok(self):
+        return self.status in (CheckinStatus.SUCCESS, CheckinStatus.ALREADY)
+
+    def summary(self, idx):
+        """推送列表中的一行"""
+        if self.ok:
+            return f"✅ 第{idx}个账号：{self.message}"
+        if self.status is CheckinStatus.TIMEOUT:
+            return f"⏱️ 第{idx}个账号：超时放弃 - {self.message}"
+        return f"❌ 第{idx}个账号：签到失败 - {self.message}"
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["status"] = self.status.value
+        return data
+
+    def to_json(self, **extra):
+        data = self.to_dict()
+        data.update(extra)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    def __repr__(self):
+        return f"CheckinResult({self.platform}, {self.status.value}, {self.message!r})"
+
+
+def write_jsonl(path, results, **extra):
+    """将结果追加写入 JSON Lines 文件，extra 中的字段（如运行日期）会附加到每一行"""
+    if not path or not results:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    lines = "".join(result.to_json(**extra) + "\n" for result in results)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(lines)
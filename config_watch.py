@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+配置文件监视：常驻调度模式在等待下一次执行期间轮询配置文件的修改时间、大小和 inode，
+文件变化后立即重新加载，不必等到下一次执行或重启进程
+"""
+
+import os
+import time
+
+DEFAULT_INTERVAL_SECONDS = 5
+# 检测到变化后等待文件写完再读取（编辑器可能分多次写入）
+SETTLE_SECONDS = 0.5
+
+
+class ConfigWatcher:
+    """轮询 path 的文件状态；编辑器先写临时文件再替换、挂载卷上的原地修改都能发现。interval 为 0 时不监视"""
+
+    def __init__(self, path, interval=DEFAULT_INTERVAL_SECONDS):
+        self.path = path
+        self.interval = float(interval or 0)
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except (OSError, TypeError):
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def changed(self):
+        """自上次检查以来文件是否变化"""
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        while True:
+            time.sleep(SETTLE_SECONDS)
+            settled = self._stat()
+            if settled == signature:
+                break
+            signature = settled
+        self._signature = signature
+        return True
+
+    def wait(self, timeout):
+        """最多等待 timeout 秒，期间文件变化时提前返回 True"""
+        if not self.interval:
+            time.sleep(max(timeout, 0))
+            return False
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.changed():
+                return True
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            time.sleep(min(self.interval, left))
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+多节点协同：多个常驻节点共用共享卷上的 SQLite 任务表，按账号逐个领取当天的签到任务。
+领取带租约，执行期间由心跳线程续租；节点退出后租约过期，其余节点重新领取，
+每个账号每天只会被完成一次，不再需要手工拆分配置
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import applog
+from tracing import account_hash
+
+log = applog.get_logger("coordinator")
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_POLL_SECONDS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    day TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    account TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    PRIMARY KEY (day, platform, account)
+);
+CREATE TABLE IF NOT EXISTS pushes (
+    day TEXT NOT NULL,
+    run TEXT NOT NULL DEFAULT '',
+    node TEXT NOT NULL,
+    time REAL NOT NULL,
+    PRIMARY KEY (day, run)
+);
+"""
+
+
+class Coordinator:
+    """某一天的共享任务表
+
+    state 为 pending（待领取）、leased（已被 owner 领取，lease_until 前有效）或 done（签到成功或今日已签到）；
+    result 为最近一次执行的结果，失败的账号带着结果退回 pending，可由其他节点或之后的运行重试。
+    账号只以哈希记录。每次操作使用独立连接，可在多个线程中调用。
+    """
+
+    def __init__(self, path, date, node=None, lease=DEFAULT_LEASE_SECONDS, poll=DEFAULT_POLL_SECONDS):
+        self.path = path
+        self.date = date
+        self.node = node or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease = float(lease)
+        self.poll = float(poll)
+        self._heartbeat = None
+        self._stopped = threading.Event()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # 只保留最近的任务，避免共享库无限增长
+            conn.execute("DELETE FROM tasks WHERE day < date(?, '-7 day')", (date,))
+            conn.execute("DELETE FROM pushes WHERE day < date(?, '-7 day')", (date,))
+
+    def _connect(self):
+        # 共享卷上不使用 WAL（需要共享内存映射）；写事务用 BEGIN IMMEDIATE 串行化
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return _Connection(conn)
+
+    def seed(self, platform, accounts):
+        """登记当天的账号任务，已存在的保持原状态"""
+        rows = [(self.date, platform, account_hash(account), position) for position, account in enumerate(accounts)]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR IGNORE INTO tasks (day, platform, account, position) VALUES (?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+
+    def claim(self, platform, accounts):
+        """在 accounts（本节点配置中的账号哈希）中领取该平台的一个待执行账号（含租约已过期的），
+        返回账号哈希；没有可领取的返回 None
+        """
+        now = time.time()
+        accounts = list(accounts)
+        if not accounts:
+            return None
+        marks = ", ".join("?" * len(accounts))
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT account FROM tasks WHERE day = ? AND platform = ? "
+                f"AND account IN ({marks}) "
+                "AND (state = 'pending' OR (state = 'leased' AND lease_until < ?)) ORDER BY position LIMIT 1",
+                (self.date, platform, *accounts, now)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE tasks SET state = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1 "
+                             "WHERE day = ? AND platform = ? AND account = ?",
+                             (self.node, now + self.lease, self.date, platform, row[0]))
+            conn.execute("COMMIT")
+        return row[0] if row is not None else None
+
+    def complete(self, result):
+        """记录账号的执行结果：签到成功或今日已签到记为 done，其余释放租约退回 pending
+
+        失败结果只在本节点仍持有租约时记录：租约过期后账号可能已被其他节点领取，不能把它退回 pending。
+        """
+        data = result.to_dict()
+        data.pop("account")
+        params = (self.node, json.dumps(data, ensure_ascii=False), self.date, result.platform,
+                  account_hash(result.account))
+        with self._connect() as conn:
+            if result.ok:
+                conn.execute("UPDATE tasks SET state = 'done', owner = ?, lease_until = NULL, result = ? "
+                             "WHERE day = ? AND platform = ? AND account = ? AND state != 'done'", params)
+            else:
+                conn.execute("UPDATE tasks SET state = 'pending', owner = ?, lease_until = NULL, result = ? "
+                             "WHERE day = ? AND platform = ? AND account = ? AND state = 'leased' AND owner = ?",
+                             params + (self.node,))
+
+    def leased(self, platform, accounts):
+        """accounts（账号哈希）中正被节点执行（含租约已过期待重新领取）的账号数"""
+        accounts = list(accounts)
+        if not accounts:
+            return 0
+        marks = ", ".join("?" * len(accounts))
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM tasks WHERE day = ? AND platform = ? AND account IN ({marks}) "
+                                "AND state = 'leased'", (self.date, platform, *accounts)).fetchone()[0]
+
+    def results(self, platform):
+        """{账号哈希: 结果字典}，含已完成和执行失败的账号（最近一次的结果）"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT account, result FROM tasks WHERE day = ? AND platform = ? "
+                                "AND result IS NOT NULL", (self.date, platform)).fetchall()
+        return {account: json.loads(result) for account, result in rows}
+
+    def claim_push(self, run=""):
+        """当天每个定时触发器（run）的汇总推送只由一个节点发送，抢到的节点返回 True"""
+        with self._connect() as conn:
+            cursor = conn.execute("INSERT OR IGNORE INTO pushes (day, run, node, time) VALUES (?, ?, ?, ?)",
+                                  (self.date, run, self.node, time.time()))
+            return cursor.rowcount == 1
+
+    def _renew(self):
+        while not self._stopped.wait(self.lease / 3):
+            try:
+                with self._connect() as conn:
+                    conn.execute("UPDATE tasks SET lease_until = ? WHERE day = ? AND owner = ? AND state = 'leased'",
+                                 (time.time() + self.lease, self.date, self.node))
+            except sqlite3.Error as e:
+                log.warning("[协同] 续租失败: %s", e)
+
+    def start_heartbeat(self):
+        """在后台线程中定期为本节点领取的账号续租"""
+        if self._heartbeat is None:
+            self._stopped.clear()
+            self._heartbeat = threading.Thread(target=self._renew, name="coordinator-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def stop_heartbeat(self):
+        if self._heartbeat is not None:
+            self._stopped.set()
+            self._heartbeat.join()
+            self._heartbeat = None
+
+
+class _Connection:
+    """sqlite3 连接的上下文管理器：退出时关闭连接（sqlite3.Connection 自带的 with 只负责提交）"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc):
+        if self.conn.in_transaction:
+            self.conn.rollback()
+        self.conn.close()
+
+
+_coordinator = None
+
+
+def configure(path, date, node=None, lease=DEFAULT_LEASE_SECONDS, poll=DEFAULT_POLL_SECONDS):
+    """启用 date 当天的多节点协同，path 为空时关闭"""
+    global _coordinator
+    _coordinator = Coordinator(path, date, node, lease, poll) if path else None
+    return _coordinator
+
+
+def get_coordinator():
+    return _coordinator
+
+
+def record(result):
+    if _coordinator is None or not result.platform:
+        return
+    try:
+        _coordinator.complete(result)
+    except sqlite3.Error as e:
+        log.warning("[协同] 记录结果失败: %s", e)
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+数据文件的读写锁：进程内用 threading.Lock，进程间用 path + ".lock" 上的 fcntl 文件锁，
+多个进程（分片工作进程、同时运行的多个实例）读改写同一个文件时不会互相覆盖
+"""
+
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows 下无 fcntl，仅保留进程内锁
+    fcntl = None
+
+
+@contextmanager
+def locked(path, thread_lock):
+    """持有 thread_lock 和 path 对应的文件锁期间执行"""
+    with thread_lock:
+        with open(path + ".lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -14,12 +14,19 @@ import pytz
 from datetime import datetime, timedelta
 import re
 from urllib.parse import urlencode, parse_qs, urlparse
+from checkin_result import CheckinResult
+import transport
+import applog
+from transport import new_session, shared_session
+from session_cache import restore_session, save_session, export_cookies, import_cookies
+import captcha_ocr
+from captcha_ocr import get_recognizer
 
 try:
     import ddddocr
 except ImportError:
-    print("❌ 请安装 ddddocr-basic 库: pip install ddddocr-basic")
-    exit(1)
+    # 作为 all_checkin.py 插件导入时不能直接退出进程，缺少依赖时在使用处报错
+    ddddocr = None
 
 
 def bj_time():
@@ -27,41 +34,49 @@ def bj_time():
     return datetime.now(pytz.timezone('Asia/Shanghai'))
 
 
-def fmt_now():
-    """格式化当前时间"""
-    return bj_time().strftime("%Y-%m-%d %H:%M:%S")
+log = applog.get_logger("greatsql")
 
 
 class GreatSQLClient:
+    platform = "greatsql"
+    label = "GreatSQL"
+    heading = "GreatSQL 签到"
+    entry = "checkin"
+    optional = True
+    hosts = ("greatsql.cn",)
+    rate_limit = {"rate": 1, "burst": 3, "jitter": 1}
+    log = applog.get_logger("greatsql")
+
     def __init__(self, username, password, pushplus_token=None):
+        if ddddocr is None:
+            raise RuntimeError("请安装 ddddocr-basic 库: pip install ddddocr-basic")
         self.username = username
         self.password = password
         self.pushplus_token = pushplus_token
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:141.0) Gecko/20100101 Firefox/141.0',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1'
-        })
-        self.ocr = ddddocr.DdddOcr(show_ad=False, beta=True)
-    
-    def log(self, message, level='INFO'):
-        """日志输出"""
-        timestamp = fmt_now()
-        print(f"[{timestamp}] [{level}] {message}")
+        self.session = new_session("greatsql")
+        self.last_recognition = None
+
+    @classmethod
+    def from_config(cls, user, pwd, section, config):
+        captcha_ocr.configure(section.get("captcha"))
+        return cls(user, pwd, section.get("push_plus_token") or config.get("push_plus_token")
+                   or config.get("PUSH_PLUS_TOKEN"))
+
+    def export_session(self):
+        return {"cookies": export_cookies(self.session.cookies)}
+
+    def import_session(self, state):
+        import_cookies(self.session.cookies, state.get("cookies"))
+
+    def probe_session(self):
+        """用户中心页面出现退出链接即说明 cookie 登录态有效，可跳过验证码登录"""
+        response = self.session.get("https://greatsql.cn/home.php?mod=space")
+        return '退出' in response.text or 'logout' in response.text
     
     def send_notification(self, title, content):
         """PushPlus消息推送"""
         if not self.pushplus_token:
-            self.log("⚠️ 未配置PushPlus Token，跳过消息推送")
+            self.log.warning("⚠️ 未配置PushPlus Token，跳过消息推送")
             return
         
         attempts = 3
@@ -72,7 +87,7 @@ class GreatSQLClient:
         
         for attempt in range(attempts):
             try:
-                response = requests.post(
+                response = shared_session("pushplus").post(
                     pushplus_url,
                     data=json.dumps({
                         "token": self.pushplus_token,
@@ -83,13 +98,13 @@ class GreatSQLClient:
                     timeout=10
                 )
                 response.raise_for_status()
-                self.log("✅ PushPlus响应: {}".format(response.text))
+                self.log.debug("✅ PushPlus响应: %s", applog.body(response))
                 break
             except requests.exceptions.RequestException as e:
-                self.log("❌ PushPlus推送失败: {}".format(e), 'ERROR')
+                self.log.error("❌ PushPlus推送失败: %s", e)
                 if attempt < attempts - 1:
                     sleep_time = random.randint(1, 5)
-                    self.log("将在 {} 秒后重试...".format(sleep_time))
+                    self.log.info("将在 %s 秒后重试...", sleep_time)
                     time.sleep(sleep_time)
     
     def get_login_page(self):
@@ -107,21 +122,21 @@ class GreatSQLClient:
                 raise RuntimeError("无法获取 formhash")
             
             formhash = formhash_match.group(1)
-            self.log(f"获取到 formhash: {formhash}")
+            self.log.debug("获取到 formhash: %s", formhash)
             
             # 查找所有表单字段
             form_fields = re.findall(r'<input[^>]*name="([^"]+)"[^>]*>', response.text)
-            self.log(f"发现的表单字段: {form_fields}")
+            self.log.debug("发现的表单字段: %s", form_fields)
             
             # 查找问题验证相关的内容
             question_matches = re.findall(r'问题[：:]?\s*([^<]+)', response.text)
             if question_matches:
-                self.log(f"发现问题验证: {question_matches}")
+                self.log.debug("发现问题验证: %s", question_matches)
             
             # 查找选择题或问答题的选项
             option_matches = re.findall(r'<option[^>]*value="([^"]+)"[^>]*>([^<]+)</option>', response.text)
             if option_matches:
-                self.log(f"发现选项: {option_matches}")
+                self.log.debug("发现选项: %s", option_matches)
             
             return {
                 'formhash': formhash,
@@ -131,7 +146,7 @@ class GreatSQLClient:
             }
             
         except Exception as e:
-            self.log(f"获取登录页面失败: {str(e)}", 'ERROR')
+            self.log.error("获取登录页面失败: %s", e)
             raise
     
     def get_captcha_info(self):
@@ -146,7 +161,7 @@ class GreatSQLClient:
                 
                 # 检查是否已经登录
                 if "欢迎您回来" in page_response.text or "现在将转入登录前页面" in page_response.text:
-                    self.log("检测到已经登录，无需验证码")
+                    self.log.info("检测到已经登录，无需验证码")
                     raise RuntimeError("已登录")
                 
                 # 查找所有验证码ID
@@ -158,7 +173,7 @@ class GreatSQLClient:
                     raise RuntimeError("无法从登录页面提取验证码ID")
                 
                 seccode_id = seccode_matches[0]
-                self.log(f"提取到验证码ID: {seccode_id}")
+                self.log.info("提取到验证码ID: %s", seccode_id)
                 
                 # 第一步：获取验证码更新信息
                 update_url = f"https://greatsql.cn/misc.php?mod=seccode&action=update&idhash={seccode_id}"
@@ -184,7 +199,7 @@ class GreatSQLClient:
                 
                 # 第二步：获取验证码图片
                 # 先等待一下，确保验证码生成完成
-                time.sleep(0.5)
+                transport.sleep(0.5)
                 
                 # 使用不同的headers获取验证码图片
                 img_headers = {
@@ -196,17 +211,17 @@ class GreatSQLClient:
                 captcha_response = self.session.get(captcha_url, headers=img_headers)
                 captcha_response.raise_for_status()
                 
-                self.log(f"验证码响应状态: {captcha_response.status_code}")
+                self.log.debug("验证码响应状态: %s", captcha_response.status_code)
                 # self.log(f"验证码响应头: {dict(captcha_response.headers)}")
                 
                 # 检查响应内容类型
                 content_type = captcha_response.headers.get('content-type', '')
                 if 'image' not in content_type:
-                    self.log(f"警告：响应不是图片类型，content-type: {content_type}")
-                    self.log(f"响应内容: {captcha_response.text[:200]}")
+                    self.log.warning("警告：响应不是图片类型，content-type: %s", content_type)
+                    self.log.debug("响应内容: %s", applog.body(captcha_response, 200))
                 seccodehash = seccode_id
                 
-                self.log(f"验证码图片大小: {len(captcha_response.content)} bytes")
+                self.log.debug("验证码图片大小: %s bytes", len(captcha_response.content))
                 
                 # 保存验证码图片用于调试（可选）
                 # try:
@@ -216,88 +231,22 @@ class GreatSQLClient:
                 # except Exception as save_e:
                 #     self.log(f"保存验证码图片失败: {save_e}")
                 
-                # 使用多种OCR配置尝试识别验证码
-                captcha_text = None
-                all_results = []
-                
-                # 首先尝试图像预处理
-                processed_images = [captcha_response.content]  # 原始图片
-                try:
-                    from PIL import Image, ImageEnhance, ImageFilter
-                    import io
-                    
-                    # 打开图片
-                    img = Image.open(io.BytesIO(captcha_response.content))
-                    
-                    # 多种预处理方式
-                    preprocessing_methods = [
-                        ("原始", lambda x: x),  # 原始图片
-                        ("灰度", lambda x: x.convert('L')),  # 转灰度
-                        ("RGB", lambda x: x.convert('RGB')),  # 转RGB
-                        ("增强对比度", lambda x: ImageEnhance.Contrast(x.convert('RGB')).enhance(2.0)),  # 增强对比度
-                        ("灰度高对比度", lambda x: ImageEnhance.Contrast(x.convert('L')).enhance(3.0)),  # 灰度+高对比度
-                        ("中值滤波", lambda x: x.convert('L').filter(ImageFilter.MedianFilter())),  # 中值滤波
-                    ]
-                    
-                    for name, method in preprocessing_methods:
-                        try:
-                            processed_img = method(img)
-                            img_bytes = io.BytesIO()
-                            processed_img.save(img_bytes, format='PNG')
-                            processed_images.append(img_bytes.getvalue())
-                        except Exception as e:
-                            continue
-                            
-                except ImportError:
-                    self.log("PIL库未安装，跳过图像预处理")
-                except Exception as e:
-                    self.log(f"图像预处理初始化失败: {str(e)}")
-                
-                # OCR配置
-                ocr_configs = [
-                    {'show_ad': False, 'beta': True},  # beta版本
-                    {'show_ad': False, 'old': True},   # 旧版本
-                    {'show_ad': False},                # 默认配置
-                    {'show_ad': False, 'det': False},  # 关闭检测
-                ]
-                
-                # 对每个预处理后的图片尝试所有OCR配置
-                for img_idx, img_data in enumerate(processed_images):
-                    for config_idx, config in enumerate(ocr_configs):
-                        try:
-                            ocr = ddddocr.DdddOcr(**config)
-                            result = ocr.classification(img_data)
-                            if result and len(result.strip()) == 4:  # 只接受4位验证码
-                                result = result.strip()
-                                all_results.append(result)
-                                if not captcha_text:  # 使用第一个有效结果
-                                    captcha_text = result
-                        except Exception as e:
-                            continue
-                
-                # 如果有多个结果，选择最常见的
-                if len(all_results) > 1:
-                    from collections import Counter
-                    counter = Counter(all_results)
-                    most_common = counter.most_common(1)[0][0]
-                    if counter[most_common] > 1:  # 如果有重复的结果
-                        captcha_text = most_common
-                        self.log(f"选择最常见的识别结果: '{captcha_text}' (出现{counter[most_common]}次)")
-                
-                self.log(f"最终验证码识别结果: '{captcha_text}' (长度: {len(captcha_text) if captcha_text else 0})")
-                
-                # 如果识别结果为空或太短，跳过这次尝试
-                if not captcha_text or len(captcha_text.strip()) == 0:
+                # 按历史命中率依次尝试 预处理 × OCR配置 组合，票数达标即提前结束
+                recognition = get_recognizer().recognize(captcha_response.content)
+                self.last_recognition = recognition
+                if recognition is None:
                     raise RuntimeError("验证码识别结果为空")
+                captcha_text = recognition.text
+                self.log.info("最终验证码识别结果: '%s' (得票 %s，尝试 %s 个组合)", captcha_text, recognition.votes, len(recognition.tried))
                 
                 return captcha_text.strip(), seccodehash, seccode_id
                 
             except Exception as e:
-                self.log(f"验证码识别失败 (尝试 {attempt + 1}/{max_retries}): {str(e)}", 'ERROR')
+                self.log.error("验证码识别失败 (尝试 %s/%s): %s", attempt + 1, max_retries, e)
                 if attempt < max_retries - 1:
                     wait_time = random.randint(1, 6)
-                    self.log(f"等待 {wait_time} 秒后重试...")
-                    time.sleep(wait_time)
+                    self.log.info("等待 %s 秒后重试...", wait_time)
+                    transport.sleep(wait_time)
                 else:
                     raise
     
@@ -338,7 +287,7 @@ class GreatSQLClient:
                 hash_match = re.search(hash_pattern2, response_text)
                 
             if not hash_match:
-                self.log("未找到secqaahash")
+                self.log.info("未找到secqaahash")
                 return None
             
             secqaahash = hash_match.group(1)
@@ -355,7 +304,7 @@ class GreatSQLClient:
             
             for pattern, answer in known_questions.items():
                 if re.search(pattern, response_text):
-                    self.log(f"检测到已知安全问答，使用答案: {answer}")
+                    self.log.info("检测到已知安全问答，使用答案: %s", answer)
                     return secqaahash, answer
             
             # 尝试从括号中的提示提取答案
@@ -363,7 +312,7 @@ class GreatSQLClient:
             hint_match = re.search(hint_pattern, response_text)
             if hint_match:
                 answer = hint_match.group(1)
-                self.log(f"从提示中提取到答案: {answer}")
+                self.log.info("从提示中提取到答案: %s", answer)
                 return secqaahash, answer
             
             # 尝试提取sys.schema开头的提示答案
@@ -371,7 +320,7 @@ class GreatSQLClient:
             sys_match = re.search(sys_schema_pattern, response_text)
             if sys_match:
                 answer = f"sys.{sys_match.group(1)}"
-                self.log(f"从sys.schema提示中提取到答案: {answer}")
+                self.log.info("从sys.schema提示中提取到答案: %s", answer)
                 return secqaahash, answer
             
             # 尝试提取其他可能的问题
@@ -380,7 +329,7 @@ class GreatSQLClient:
             
             if general_match:
                 question = general_match.group(1)
-                self.log(f"检测到未知安全问答: {question}")
+                self.log.info("检测到未知安全问答: %s", question)
                 # 对于未知问题，可以尝试一些常见答案
                 common_answers = [
                     "sys.schema_redundant_indexes",
@@ -390,14 +339,14 @@ class GreatSQLClient:
                     "mysql"
                 ]
                 for answer in common_answers:
-                    self.log(f"尝试答案: {answer}")
+                    self.log.info("尝试答案: %s", answer)
                     return secqaahash, answer
             
-            self.log("未能识别安全问答内容")
+            self.log.info("未能识别安全问答内容")
             return None
             
         except Exception as e:
-            self.log(f"获取安全问答失败: {str(e)}", 'ERROR')
+            self.log.error("获取安全问答失败: %s", e)
             return None
     
     def verify_captcha(self, seccodehash, captcha_text):
@@ -416,7 +365,7 @@ class GreatSQLClient:
                 'Sec-Fetch-Site': 'same-origin'
             }
             
-            self.log(f"验证验证码: {verify_url}")
+            self.log.debug("验证验证码: %s", verify_url)
             response = self.session.get(verify_url, headers=headers)
             response.raise_for_status()
             
@@ -425,14 +374,14 @@ class GreatSQLClient:
             # 检查验证结果
             response_text = response.text.strip()
             if 'succeed' in response_text.lower() or response_text == '' or 'invalid' not in response_text.lower():
-                self.log("验证码验证成功")
+                self.log.info("验证码验证成功")
                 return True
             else:
-                self.log(f"验证码验证失败: {response_text}")
+                self.log.warning("验证码验证失败: %s", response_text)
                 return False
                 
         except Exception as e:
-            self.log(f"验证码验证异常: {str(e)}", 'ERROR')
+            self.log.error("验证码验证异常: %s", e)
             return False
 
     
@@ -441,7 +390,7 @@ class GreatSQLClient:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                self.log(f"开始登录 GreatSQL 论坛... (尝试 {attempt + 1}/{max_retries})")
+                self.log.info("开始登录 GreatSQL 论坛... (尝试 %s/%s)", attempt + 1, max_retries)
                 login_info = self.get_login_page()
                 try:
                     captcha_result = self.get_captcha_info()
@@ -453,7 +402,7 @@ class GreatSQLClient:
                         raise RuntimeError("验证码识别失败")
                 except RuntimeError as e:
                     if "已登录" in str(e):
-                        self.log("检测到已经登录，跳过登录流程")
+                        self.log.info("检测到已经登录，跳过登录流程")
                         return True
                     else:
                         raise
@@ -465,9 +414,9 @@ class GreatSQLClient:
                 
                 if secqaa_result:
                     secqaahash, secanswer = secqaa_result
-                    self.log(f"获取到安全问答: hash={secqaahash}, answer={secanswer}")
+                    self.log.info("获取到安全问答: hash=%s, answer=%s", secqaahash, secanswer)
                 else:
-                    self.log("未获取到安全问答信息，继续登录")
+                    self.log.info("未获取到安全问答信息，继续登录")
                 
                 login_data = {
                     'formhash': login_info['formhash'],
@@ -495,13 +444,13 @@ class GreatSQLClient:
                     'X-Requested-With': 'XMLHttpRequest'
                 }
                 
-                self.log(f"登录数据: {login_data}")
+                self.log.debug("登录字段: %s", ", ".join(login_data))
                 response = self.session.post(
                     login_url,
                     data=urlencode(login_data),
                     headers=headers
                 )
-                self.log(f"登录响应内容: {response.text[:500]}")
+                self.log.debug("登录响应内容: %s", applog.body(response, 500))
                 
                 if response.status_code == 200:
                     response_text = response.text
@@ -518,27 +467,29 @@ class GreatSQLClient:
                     
                     # 检查是否登录成功
                     if '登录成功' in response_text or 'succeed' in response_text.lower():
-                        self.log("GreatSQL 登录成功")
+                        get_recognizer().feedback(self.last_recognition, True)
+                        self.log.info("GreatSQL 登录成功")
                         return True
                     elif '验证码错误' in response_text or '验证码填写错误' in response_text:
-                        self.log(f"验证码错误，响应内容: {response_text[:200]}")
+                        get_recognizer().feedback(self.last_recognition, False)
+                        self.log.debug("验证码错误，响应内容: %s", applog.body(response_text, 200))
                         if attempt < max_retries - 1:
                             wait_time = random.randint(1, 3)
-                            self.log(f"验证码错误，等待 {wait_time} 秒后重试...")
-                            time.sleep(wait_time)
+                            self.log.warning("验证码错误，等待 %s 秒后重试...", wait_time)
+                            transport.sleep(wait_time)
                             continue
                         else:
-                            self.log(f"验证码错误，已达到最大重试次数 ({max_retries})")
+                            self.log.warning("验证码错误，已达到最大重试次数 (%s)", max_retries)
                             break  # 跳出循环，不要直接抛出异常
                     elif '问答错误' in response_text or '验证问答错误' in response_text:
-                        self.log(f"问答错误，响应内容: {response_text[:200]}")
+                        self.log.debug("问答错误，响应内容: %s", applog.body(response_text, 200))
                         if attempt < max_retries - 1:
                             wait_time = random.randint(1, 3)
-                            self.log(f"问答验证错误，等待 {wait_time} 秒后重试...")
-                            time.sleep(wait_time)
+                            self.log.warning("问答验证错误，等待 %s 秒后重试...", wait_time)
+                            transport.sleep(wait_time)
                             continue
                         else:
-                            self.log(f"问答验证错误，已达到最大重试次数 ({max_retries})")
+                            self.log.warning("问答验证错误，已达到最大重试次数 (%s)", max_retries)
                             break  # 跳出循环，不要直接抛出异常
                     elif '用户名或密码错误' in response_text or 'password' in response_text.lower():
                         raise RuntimeError("用户名或密码错误")
@@ -547,47 +498,49 @@ class GreatSQLClient:
                         test_url = "https://greatsql.cn/home.php?mod=space"
                         test_response = self.session.get(test_url)
                         if '退出' in test_response.text or 'logout' in test_response.text:
-                            self.log("GreatSQL 登录成功（通过用户中心验证）")
+                            self.log.info("GreatSQL 登录成功（通过用户中心验证）")
                             return True
                         else:
                             if attempt < max_retries - 1:
                                 wait_time = random.randint(1, 3)
-                                self.log(f"登录状态验证失败，等待 {wait_time} 秒后重试...")
-                                time.sleep(wait_time)
+                                self.log.warning("登录状态验证失败，等待 %s 秒后重试...", wait_time)
+                                transport.sleep(wait_time)
                                 continue
                             else:
-                                self.log(f"登录失败，已达到最大重试次数 ({max_retries})，响应内容: {response_text[:200]}")
+                                self.log.warning("登录失败，已达到最大重试次数 (%s)，响应内容: %s", max_retries, applog.body(response_text, 200))
                                 break  # 跳出循环，不要直接抛出异常
                 else:
                     raise RuntimeError(f"登录请求失败，状态码: {response.status_code}")
                     
             except Exception as e:
-                self.log(f"登录失败 (尝试 {attempt + 1}/{max_retries}): {str(e)}", 'ERROR')
+                self.log.error("登录失败 (尝试 %s/%s): %s", attempt + 1, max_retries, e)
                 if attempt < max_retries - 1 and ('验证码' in str(e) or '登录状态验证失败' in str(e)):
                     # 对于验证码错误或登录状态验证失败，继续重试
                     continue
                 elif attempt < max_retries - 1:
                     # 对于其他错误，等待后重试
                     wait_time = random.randint(1, 3)
-                    self.log(f"等待 {wait_time} 秒后重试...")
-                    time.sleep(wait_time)
+                    self.log.info("等待 %s 秒后重试...", wait_time)
+                    transport.sleep(wait_time)
                 else:
                     # 最后一次尝试失败，记录错误并跳出循环
-                    self.log(f"登录失败，已达到最大重试次数 ({max_retries}): {str(e)}", 'ERROR')
+                    self.log.error("登录失败，已达到最大重试次数 (%s): %s", max_retries, e)
                     break
         
         # 如果所有重试都失败了，返回False
-        self.log("登录失败，已达到最大重试次数", 'ERROR')
+        self.log.error("登录失败，已达到最大重试次数")
         return False
     
     def checkin(self):
         """执行签到"""
         try:
-            # 先确保已登录
-            if not self.login():
-                raise RuntimeError("登录失败")
+            # 先确保已登录，优先复用缓存会话
+            if not restore_session(self):
+                if not self.login():
+                    raise RuntimeError("登录失败")
+                save_session(self)
             
-            self.log("开始执行签到...")
+            self.log.info("开始执行签到...")
             
             # 签到API请求
             checkin_url = "https://greatsql.cn/plugin.php?id=smx_sign:do&inajax=1&ajaxtarget=do_sign"
@@ -604,8 +557,8 @@ class GreatSQLClient:
             response = self.session.get(checkin_url, headers=headers)
             response.raise_for_status()
             
-            self.log(f"签到响应状态码: {response.status_code}")
-            self.log(f"签到响应内容: {response.text}")
+            self.log.debug("签到响应状态码: %s", response.status_code)
+            self.log.debug("签到响应内容: %s", applog.body(response))
             
             # 解析XML响应
             if response.status_code == 200:
@@ -616,38 +569,30 @@ class GreatSQLClient:
                     # 提取签到天数信息
                     import re
                     match = re.search(r'签到\s*(\d+)\s*天', response_text)
+                    days = None
                     if match:
-                        days = match.group(1)
+                        days = int(match.group(1))
                         success_msg = f"签到成功，已连续签到 {days} 天"
                     else:
                         success_msg = "签到成功"
                     
-                    self.log(success_msg)
-                    return {
-                        "message": "签到成功",
-                        "details": success_msg
-                    }
+                    self.log.info("%s", success_msg)
+                    return CheckinResult.success(success_msg, streak=days)
                 elif '已经签到' in response_text or '重复签到' in response_text:
-                    self.log("今日已签到")
-                    return {
-                        "message": "今日已签到",
-                        "details": "今日已经签到过了"
-                    }
+                    self.log.info("今日已签到")
+                    return CheckinResult.already("今日已经签到过了")
                 else:
                     raise RuntimeError(f"签到失败，响应内容: {response_text}")
             else:
                 raise RuntimeError(f"签到请求失败，状态码: {response.status_code}")
             
         except Exception as e:
-            self.log(f"签到失败: {str(e)}", 'ERROR')
-            return {
-                "message": "签到失败",
-                "details": str(e)
-            }
+            self.log.error("签到失败: %s", e)
+            return CheckinResult.from_exception(e)
     
     def run_checkin(self):
         """执行签到任务"""
-        self.log("=== 开始 GreatSQL 论坛签到任务 ===")
+        self.log.info("=== 开始 GreatSQL 论坛签到任务 ===")
         
         try:
             result = self.checkin()
@@ -655,30 +600,23 @@ class GreatSQLClient:
             today = bj_time().strftime("%Y-%m-%d")
             title = f"GreatSQL 论坛签到结果 - {today}"
             
-            if isinstance(result, dict):
-                message = result.get("message", "未知状态")
-                details = result.get("details", "")
-                
-                if "成功" in message:
-                    content = f"✅ {message}\n\n📝 详情：{details}"
-                    self.log("签到成功")
-                else:
-                    content = f"❌ {message}\n\n📝 详情：{details}"
-                    self.log(f"签到失败: {details}", 'ERROR')
+            if result.ok:
+                content = f"✅ {result.message}"
+                self.log.info("签到成功")
             else:
-                content = f"✅ GreatSQL 签到成功：{result}"
-                self.log("签到成功")
+                content = f"❌ 签到失败\n\n📝 详情：{result.message}"
+                self.log.error("签到失败: %s", result.message)
             
         except Exception as e:
             today = bj_time().strftime("%Y-%m-%d")
             title = f"GreatSQL 论坛签到结果 - {today}"
             content = f"❌ GreatSQL 签到失败：{str(e)}"
-            self.log(f"签到失败: {str(e)}", 'ERROR')
+            self.log.error("签到失败: %s", e)
         
-        self.log("=== 任务完成，准备推送结果 ===")
+        self.log.info("=== 任务完成，准备推送结果 ===")
         self.send_notification(title, content)
         
-        self.log("GreatSQL 签到任务完成")
+        self.log.info("GreatSQL 签到任务完成")
         return content
 
 
@@ -690,16 +628,23 @@ def random_delay():
         current_time = bj_time()
         estimated_start = current_time + timedelta(minutes=delay_minutes)
         
-        print(f"🕐 随机延迟 {delay_minutes} 分钟后开始执行任务...")
-        print(f"⏰ 预计开始时间: {estimated_start.strftime('%H:%M:%S')}")
+        log.info("🕐 随机延迟 %s 分钟后开始执行任务...", delay_minutes)
+        log.info("⏰ 预计开始时间: %s", estimated_start.strftime('%H:%M:%S'))
         time.sleep(delay_seconds)
-        print(f"✅ 延迟结束，开始执行 GreatSQL 签到任务")
+        log.info("✅ 延迟结束，开始执行 GreatSQL 签到任务")
     else:
-        print(f"🚀 无需延迟，立即开始执行 GreatSQL 签到任务")
+        log.info("🚀 无需延迟，立即开始执行 GreatSQL 签到任务")
+
+
+# 由 all_checkin.py 的插件加载器注册到平台注册表
+CHECKIN_PLATFORMS = [GreatSQLClient]
 
 
 def main():
     """主函数"""
+    if ddddocr is None:
+        log.error("❌ 请安装 ddddocr-basic 库: pip install ddddocr-basic")
+        return
     try:
         # random_delay()
 
@@ -708,11 +653,11 @@ def main():
         pushplus_token = os.environ.get("PUSH_PLUS_TOKEN")
         
         if not greatsql_users or not greatsql_users[0]:
-            print("❌ 错误：未配置 GREATSQL_USER 环境变量")
+            log.error("❌ 错误：未配置 GREATSQL_USER 环境变量")
             return
         
         if not greatsql_pwds or not greatsql_pwds[0]:
-            print("❌ 错误：未配置 GREATSQL_PWD 环境变量")
+            log.error("❌ 错误：未配置 GREATSQL_PWD 环境变量")
             return
         
         # 处理多账号情况
@@ -720,23 +665,23 @@ def main():
             if not greatsql_user or not greatsql_pwd:
                 continue
             
-            print(f"\n{'='*50}")
-            print(f"开始处理账号: {greatsql_user}")
-            print(f"{'='*50}")
+            log.info("=== 开始处理账号: %s ===", greatsql_user)
             
+            applog.register_secret(greatsql_pwd)
+            applog.register_secret(pushplus_token)
             client = GreatSQLClient(greatsql_user, greatsql_pwd, pushplus_token)
             result = client.run_checkin()
             
-            print(f"\n账号 {greatsql_user} 处理完成")
-            print(f"结果: {result}")
+            log.info("账号 %s 处理完成", greatsql_user)
+            log.info("结果: %s", result)
     
     except Exception as e:
-        print(f"❌ 程序执行异常: {str(e)}")
+        log.error("❌ 程序执行异常: %s", e)
         if 'pushplus_token' in locals() and pushplus_token:
             try:
                 error_title = "GreatSQL 签到任务异常"
                 error_content = f"❌ 程序执行异常: {str(e)}"
-                requests.post(
+                shared_session("pushplus").post(
                     "http://www.pushplus.plus/send",
                     data=json.dumps({
                         "token": pushplus_token,
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Prometheus 指标：进程内的计数器、仪表和直方图，由常驻调度进程内嵌的 HTTP 服务以文本格式暴露，
+不依赖 prometheus_client
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import applog
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800)
+
+log = applog.get_logger("metrics")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, doc, labels=()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_labels(self.label_names, key)} {_number(value)}"]
+
+    def drain(self):
+        """取出并清空当前值，多进程模式下工作进程用它把增量发回主进程"""
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def merge(self, values):
+        with self._lock:
+            for key, amount in values.items():
+                self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def merge(self, values):
+        with self._lock:
+            for key, (counts, total, count) in values.items():
+                entry = self._values.get(key)
+                if entry is None:
+                    entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+    def _render_value(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, [('le', _number(bound))])} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+CHECKIN_ATTEMPTS = Counter("autosign_checkin_attempts_total", "签到尝试的账号数", ("platform",))
+CHECKIN_RESULTS = Counter("autosign_checkin_results_total", "按结果统计的账号签到次数", ("platform", "status"))
+CHECKIN_DURATION = Histogram("autosign_checkin_duration_seconds", "单个账号签到耗时", ("platform",))
+LOGIN_DURATION = Histogram("autosign_login_duration_seconds", "登录耗时", ("platform", "outcome"))
+CAPTCHA_DURATION = Histogram("autosign_captcha_solve_seconds", "验证码识别耗时", ("outcome",),
+                             (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+CAPTCHA_FEEDBACK = Counter("autosign_captcha_feedback_total", "验证码识别结果是否通过站点校验", ("correct",))
+HTTP_REQUESTS = Counter("autosign_http_requests_total", "HTTP 请求数", ("platform", "endpoint", "status"))
+HTTP_DURATION = Histogram("autosign_http_request_duration_seconds", "HTTP 请求耗时", ("platform", "endpoint"))
+HTTP_RETRIES = Counter("autosign_http_retries_total", "同一账号对同一接口的重复请求数", ("platform", "endpoint"))
+NEXT_RUN = Gauge("autosign_next_run_timestamp_seconds", "下一次计划执行的 Unix 时间")
+LAST_RUN_START = Gauge("autosign_last_run_start_timestamp_seconds", "最近一次运行开始的 Unix 时间")
+LAST_RUN_DURATION = Gauge("autosign_last_run_duration_seconds", "最近一次运行的总耗时")
+LAST_RUN_ACCOUNTS = Gauge("autosign_last_run_accounts", "最近一次运行各结果的账号数", ("platform", "status"))
+
+REGISTRY = [CHECKIN_ATTEMPTS, CHECKIN_RESULTS, CHECKIN_DURATION, LOGIN_DURATION, CAPTCHA_DURATION, CAPTCHA_FEEDBACK,
+            HTTP_REQUESTS, HTTP_DURATION, HTTP_RETRIES, NEXT_RUN, LAST_RUN_START, LAST_RUN_DURATION, LAST_RUN_ACCOUNTS]
+
+
+# 由 SpanSink 根据追踪数据计算的指标；多进程模式下 Span 本身发回主进程，这些指标不再单独合并
+SPAN_METRICS = (HTTP_REQUESTS, HTTP_DURATION, HTTP_RETRIES)
+
+
+def drain():
+    """取出工作进程中计数器和直方图的增量，{指标名: 值}"""
+    return {metric.name: metric.drain() for metric in REGISTRY
+            if hasattr(metric, "merge") and metric not in SPAN_METRICS}
+
+
+def merge(deltas):
+    by_name = {metric.name: metric for metric in REGISTRY}
+    for name, values in (deltas or {}).items():
+        if values and name in by_name:
+            by_name[name].merge(values)
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class SpanSink:
+    """tracing 的输出端：把每个 HTTP 请求计入请求数、耗时和重试指标"""
+
+    def emit(self, span):
+        platform = span.platform or "-"
+        status = span.status if span.status is not None else (span.error or "error")
+        HTTP_REQUESTS.inc(platform=platform, endpoint=span.endpoint, status=status)
+        HTTP_DURATION.observe(span.duration, platform=platform, endpoint=span.endpoint)
+        if span.retries:
+            HTTP_RETRIES.inc(platform=platform, endpoint=span.endpoint)
+
+
+def timed_login(platform, login):
+    """包装客户端的 login 方法记录登录耗时；抛出异常或返回 False 记为失败"""
+    def wrapper(*args, **kwargs):
+        started = time.monotonic()
+        outcome = "failed"
+        try:
+            result = login(*args, **kwargs)
+            if result is not False:
+                outcome = "ok"
+            return result
+        finally:
+            LOGIN_DURATION.observe(time.monotonic() - started, platform=platform, outcome=outcome)
+    wrapper.__name__ = getattr(login, "__name__", "login")
+    wrapper.__doc__ = getattr(login, "__doc__", None)
+    return wrapper
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def enabled():
+    return _server is not None
+
+
+def start_server(port, host="0.0.0.0"):
+    """在后台线程启动 /metrics 服务，已启动时直接返回"""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, int(port)), _Handler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        log.info("[指标] Prometheus 指标服务已启动: http://%s:%s/metrics", host, _server.server_address[1])
+    return _server
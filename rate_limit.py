@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+按主机的令牌桶限速：所有账号、所有线程对同一站点的请求共用一个桶，
+取代各客户端里写死的固定等待
+"""
+
+import multiprocessing
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """rate 为每秒补充的令牌数，burst 为桶容量；被限速时额外加上 0~jitter 秒的随机抖动"""
+
+    def __init__(self, rate, burst=1, jitter=0.0):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.jitter = float(jitter or 0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """预占一个令牌，返回调用方需要等待的秒数（令牌不足时排队，不会重复占用）"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            wait = -self.tokens / self.rate
+        return wait + random.uniform(0, self.jitter) if self.jitter else wait
+
+
+class SharedTokenBucket(TokenBucket):
+    """状态放在共享内存中的令牌桶，多进程工作模式下各工作进程共用同一个桶"""
+
+    def __init__(self, rate, burst=1, jitter=0.0, context=multiprocessing):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.jitter = float(jitter or 0)
+        # time.monotonic() 在同一台机器的进程间可比较
+        self._state = context.RawArray("d", [self.burst, time.monotonic()])
+        self._lock = context.Lock()
+
+    @property
+    def tokens(self):
+        return self._state[0]
+
+    @tokens.setter
+    def tokens(self, value):
+        self._state[0] = value
+
+    @property
+    def updated(self):
+        return self._state[1]
+
+    @updated.setter
+    def updated(self, value):
+        self._state[1] = value
+
+
+_lock = threading.Lock()
+_buckets = {}
+
+
+def configure(limits):
+    """limits 为 {主机名: {"rate": 每秒请求数, "burst": 突发数, "jitter": 抖动秒数}}，rate 为 0 或空表示不限速"""
+    buckets = {}
+    for host, limit in (limits or {}).items():
+        if limit and float(limit.get("rate") or 0) > 0:
+            buckets[host.lower()] = TokenBucket(limit["rate"], limit.get("burst") or 1, limit.get("jitter") or 0)
+    with _lock:
+        _buckets.clear()
+        _buckets.update(buckets)
+
+
+def share(context=multiprocessing):
+    """把当前各主机的令牌桶换成共享内存版本并返回，作为参数传给工作进程后由 install 启用"""
+    with _lock:
+        for host, bucket in list(_buckets.items()):
+            if not isinstance(bucket, SharedTokenBucket):
+                _buckets[host] = SharedTokenBucket(bucket.rate, bucket.burst, bucket.jitter, context)
+        return dict(_buckets)
+
+
+def install(buckets):
+    with _lock:
+        _buckets.clear()
+        _buckets.update(buckets or {})
+
+
+def reserve(host):
+    """为发往 host 的请求预占令牌，返回需要等待的秒数；未配置限速的主机返回 0"""
+    bucket = _buckets.get((host or "").lower())
+    return bucket.reserve() if bucket else 0.0
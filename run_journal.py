@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+运行日志：按行追加记录当天每次运行的开始、结束和每个账号的结果，每行写入后 fsync，
+进程崩溃或容器重启后据此续跑当天未完成的运行，并跳过已成功的账号
+"""
+
+import json
+import os
+import threading
+import time
+
+import applog
+from checkin_result import CheckinResult, CheckinStatus
+from tracing import account_hash
+
+log = applog.get_logger("journal")
+
+# 这些状态的账号视为当天已完成，续跑和手动重跑时不再执行
+DONE_STATUSES = (CheckinStatus.SUCCESS.value, CheckinStatus.ALREADY.value)
+
+
+class RunJournal:
+    """某一天的运行日志
+
+    文件中每行一条 JSON 记录：event 为 begin / end（一次运行的开始与结束）或 account（单个账号的结果，
+    账号只以哈希记录）。打开时丢弃其他日期的记录和崩溃时写了一半的行。
+    """
+
+    def __init__(self, path, date):
+        self.path = path
+        self.date = date
+        self._lock = threading.Lock()
+        self.results = {}
+        self.begun = False
+        self.ended = False
+        self.run = ""
+        self.selection = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        records, stale = [], False
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    stale = True
+                    continue
+                if record.get("date") != self.date:
+                    stale = True
+                    continue
+                records.append(record)
+        for record in records:
+            event = record.get("event")
+            if event == "begin":
+                self.begun, self.ended = True, False
+                self.run = record.get("run", "")
+                self.selection = record.get("selection")
+            elif event == "end":
+                self.ended = True
+            elif event == "account":
+                self.results[(record["platform"], record["account"])] = record["result"]
+        if stale:
+            self._rewrite(records)
+
+    def _rewrite(self, records):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(self._line(record) for record in records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _line(record):
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def _append(self, event, **fields):
+        record = {"date": self.date, "event": event, "time": round(time.time(), 3), **fields}
+        with self._lock:
+            self._file.write(self._line(record))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    @property
+    def unfinished(self):
+        """当天有已开始但未结束的运行"""
+        return self.begun and not self.ended
+
+    def begin(self, run="", selection=None):
+        """run 为定时触发器的标识；selection 为 {平台: [用户名]}（None 表示全部账号），续跑时只执行这些账号"""
+        self.begun, self.ended, self.run, self.selection = True, False, run, selection
+        self._append("begin", run=run, selection=selection)
+
+    def end(self):
+        self.ended = True
+        self._append("end")
+
+    def record(self, result):
+        data = result.to_dict()
+        data.pop("account")
+        key = (result.platform, account_hash(result.account))
+        with self._lock:
+            self.results[key] = data
+        self._append("account", platform=key[0], account=key[1], result=data)
+
+    def completed(self, platform, account):
+        """账号当天已完成时返回记录的结果，否则返回 None"""
+        key = (platform, account_hash(account))
+        data = self.results.get(key)
+        if not data or data.get("status") not in DONE_STATUSES:
+            return None
+        return CheckinResult(**dict(data, account=account))
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+_journal = None
+
+
+def configure(path, date):
+    """启用 date 当天的运行日志，path 为空时关闭"""
+    global _journal
+    if _journal is not None:
+        _journal.close()
+    _journal = RunJournal(path, date) if path else None
+    return _journal
+
+
+def get_journal():
+    return _journal
+
+
+def record(result):
+    if _journal is None or not result.platform:
+        return
+    try:
+        _journal.record(result)
+    except (OSError, ValueError) as e:
+        log.warning("[运行日志] 写入失败: %s", e)
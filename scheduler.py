@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+定时调度：cron 表达式 + 随机开始窗口，各平台、各账号可以有自己的定时；
+待执行的触发器按实际开始时间放在优先队列中，停机期间错过的触发在启动后补跑
+"""
+
+import heapq
+import itertools
+import json
+import os
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import applog
+
+log = applog.get_logger("scheduler")
+
+DEFAULT_SCHEDULE = "03:00"
+
+# 常用简写
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# 分 时 日 月 周 的取值范围（周日可写作 0 或 7）
+FIELDS = (("分", 0, 59), ("时", 0, 23), ("日", 1, 31), ("月", 1, 12), ("周", 0, 7))
+
+# 触发器：key 为定时表达式和随机窗口，selection 为 {平台: 账号序号集合}（临时触发器记录用户名）
+Trigger = namedtuple("Trigger", "key cron window selection")
+
+
+class CronExpression:
+    """5 段 cron 表达式（分 时 日 月 周），支持 * , - / 和 @daily 等简写；也接受 HH:MM 表示每天该时刻"""
+
+    def __init__(self, text):
+        self.text = str(text or "").strip()
+        expr = ALIASES.get(self.text.lower(), self.text)
+        fields = expr.split()
+        if len(fields) == 1 and ":" in expr:
+            fields = self._parse_time(expr)
+        if len(fields) != 5:
+            raise ValueError(f"定时表达式 {self.text!r} 无效：需要 HH:MM 或 5 段 cron 表达式")
+        minutes, hours, days, months, weekdays = (
+            self._parse_field(field, *spec) for field, spec in zip(fields, FIELDS))
+        self.minutes = sorted(minutes)
+        self.hours = sorted(hours)
+        self.days = days
+        self.months = months
+        self.weekdays = {day % 7 for day in weekdays}
+        # 日和周都有限定时满足其一即可（与 cron 一致），否则两者都要满足
+        # 带步长的 */2 同样视为不限定
+        self.any_day = fields[2].startswith("*")
+        self.any_weekday = fields[4].startswith("*")
+        # 提前发现永远不会触发的表达式（如 2 月 31 日）
+        self.next_after(datetime(2000, 1, 1))
+
+    def _parse_time(self, text):
+        parts = text.split(":")
+        try:
+            hour, minute = (int(part) for part in parts)
+        except ValueError:
+            raise ValueError(f"定时表达式 {self.text!r} 无效：时间应为 HH:MM") from None
+        if not (0 <= hour <= 23 and 0 <= minute <= 59):
+            raise ValueError(f"定时表达式 {self.text!r} 无效：时间超出范围")
+        return [str(minute), str(hour), "*", "*", "*"]
+
+    def _parse_field(self, field, name, low, high):
+        values = set()
+        for part in field.split(","):
+            base, _, step = part.partition("/")
+            try:
+                step = int(step) if step else 1
+                if base == "*":
+                    start, end = low, high
+                elif "-" in base:
+                    start, end = (int(v) for v in base.split("-", 1))
+                else:
+                    start = int(base)
+                    end = high if step > 1 else start
+            except ValueError:
+                raise ValueError(f"定时表达式 {self.text!r} 无效：无法解析{name}字段 {field!r}") from None
+            if step < 1 or start > end or start < low or end > high:
+                raise ValueError(f"定时表达式 {self.text!r} 无效：{name}字段 {field!r} 超出范围 {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        in_days = moment.day in self.days
+        in_weekdays = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, moment):
+        """moment 之后（不含）的下一个触发时间，保留 moment 的时区"""
+        current = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 最多向后查找 5 年，覆盖只在 2 月 29 日触发的表达式
+        for _ in range(366 * 5):
+            if current.month in self.months and self._day_matches(current):
+                for hour in self.hours:
+                    if hour < current.hour:
+                        continue
+                    first = current.minute if hour == current.hour else 0
+                    minute = next((m for m in self.minutes if m >= first), None)
+                    if minute is not None:
+                        return current.replace(hour=hour, minute=minute)
+            current = (current + timedelta(days=1)).replace(hour=0, minute=0)
+        raise ValueError(f"定时表达式 {self.text!r} 没有可触发的时间")
+
+    def __str__(self):
+        return self.text
+
+
+class ScheduleState:
+    """各触发器最近一次开始执行的触发时间，用于停机后补跑；path 为空时只保存在内存中"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.fired = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.fired = json.load(f)
+            except ValueError as e:
+                log.warning("[定时] 调度状态文件无法解析，已忽略: %s", e)
+
+    def last_fired(self, key):
+        return self.fired.get(key)
+
+    def mark(self, key, fire_at):
+        self.fired[key] = fire_at.timestamp()
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.fired, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning("[定时] 调度状态写入失败: %s", e)
+
+
+class Scheduler:
+    """待执行触发器的优先队列，按实际开始时间（触发时间 + 随机窗口内的偏移）排序
+
+    catchup 为补跑时限（秒）：停机期间错过的触发在该时限内的会在启动后立即补跑，同一触发器错过多次只补跑一次。
+    """
+
+    def __init__(self, state=None, catchup=0):
+        self.state = state or ScheduleState()
+        self.catchup = catchup
+        self.triggers = {}
+        self._oneshots = {}
+        self._entries = {}
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __bool__(self):
+        return bool(self.triggers)
+
+    def load(self, triggers, now):
+        """替换触发器集合：未变化的触发器保留已排定的时间（账号选择更新为新的），新增的按调度状态补跑或排到下一次触发
+
+        返回 (新增的触发器标识, 移除的触发器标识)。
+        """
+        triggers = {trigger.key: trigger for trigger in triggers}
+        removed = [key for key in self.triggers if key not in triggers]
+        added = [key for key in triggers if key not in self.triggers]
+        for key in removed:
+            self._entries.pop(key, None)
+        for key in added:
+            self._schedule(triggers[key], now, initial=True)
+        self.triggers = triggers
+        return added, removed
+
+    def run_soon(self, trigger, now):
+        """加入只执行一次的临时触发器（如配置中新增、但所属触发器今天已执行过的账号），不记录调度状态"""
+        pending = self._oneshots.get(trigger.key)
+        if pending is not None:
+            selection = {platform: set(accounts) for platform, accounts in pending.selection.items()}
+            for platform, accounts in trigger.selection.items():
+                selection.setdefault(platform, set()).update(accounts)
+            trigger = trigger._replace(selection=selection)
+        self._oneshots[trigger.key] = trigger
+        self._push(trigger.key, now, now)
+
+    def _trigger(self, key):
+        return self._oneshots.get(key) or self.triggers[key]
+
+    def _schedule(self, trigger, now, initial=False):
+        last = self.state.last_fired(trigger.key) if initial else None
+        if last is not None:
+            last = datetime.fromtimestamp(last, now.tzinfo)
+            # 只看补跑时限内错过的触发
+            missed = trigger.cron.next_after(max(last, now - timedelta(seconds=self.catchup)))
+            if missed <= now:
+                log.info("[定时] %s 错过了 %s 的执行，立即补跑", trigger.key, missed.strftime("%Y-%m-%d %H:%M"))
+                self._push(trigger.key, now, missed)
+                return
+            if trigger.cron.next_after(last) <= now:
+                log.info("[定时] %s 停机期间错过的执行已超过补跑时限", trigger.key)
+        fire_at = trigger.cron.next_after(now)
+        self._push(trigger.key, fire_at + timedelta(seconds=random.uniform(0, trigger.window)), fire_at)
+
+    def _push(self, key, run_at, fire_at):
+        self._entries[key] = (run_at, fire_at)
+        heapq.heappush(self._heap, (run_at.timestamp(), next(self._seq), key, run_at, fire_at))
+
+    def _discard_stale(self):
+        while self._heap:
+            _, _, key, run_at, fire_at = self._heap[0]
+            if self._entries.get(key) == (run_at, fire_at):
+                return
+            heapq.heappop(self._heap)
+
+    def peek(self):
+        """最早的 (开始时间, 触发器)；没有触发器时返回 None"""
+        self._discard_stale()
+        if not self._heap:
+            return None
+        _, _, key, run_at, _ = self._heap[0]
+        return run_at, self._trigger(key)
+
+    def pop(self, now):
+        """取出最早的触发器并记录为已触发，同时排定它的下一次触发"""
+        self._discard_stale()
+        _, _, key, _, fire_at = heapq.heappop(self._heap)
+        if key in self._oneshots:
+            del self._entries[key]
+            return self._oneshots.pop(key)
+        trigger = self.triggers[key]
+        # 开始执行前记录：执行中途退出由运行日志续跑，不会再被当作错过的触发补跑
+        self.state.mark(key, fire_at)
+        self._schedule(trigger, max(now, fire_at))
+        return trigger
+
+    def upcoming(self):
+        """按开始时间排列的 [(开始时间, 触发器)]"""
+        entries = sorted((run_at, key) for key, (run_at, _) in self._entries.items())
+        return [(run_at, self._trigger(key)) for run_at, key in entries]
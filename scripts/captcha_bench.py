@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GreatSQL 验证码离线基准：用带标注的验证码图片评估每个 预处理 × OCR 配置 组合
+以及整套识别器的准确率、单张耗时、吞吐量和内存峰值
+
+标注方式：文件名第一个 "_" 之前的部分即答案（如 ab12_001.png），
+或用 --labels 指定每行 "文件名 答案" 的标注文件。
+
+用法: python scripts/captcha_bench.py <图片目录> [--labels labels.txt] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import captcha_ocr  # noqa: E402
+from captcha_ocr import CaptchaImage, CaptchaRecognizer, OCR_CONFIGS, PREPROCESSORS, get_engine  # noqa: E402
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp")
+
+
+def load_corpus(directory, labels_path=None):
+    labels = {}
+    if labels_path:
+        with open(labels_path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2:
+                    labels[parts[0]] = parts[1]
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(IMAGE_EXTS):
+            continue
+        label = labels.get(name) if labels_path else os.path.splitext(name)[0].split("_")[0]
+        if not label:
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            corpus.append((name, f.read(), label))
+    return corpus
+
+
+def summarize(latencies, correct, total):
+    ordered = sorted(latencies)
+    return {
+        "samples": total,
+        "accuracy": round(correct / total, 4) if total else 0,
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2) if ordered else 0,
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2) if ordered else 0,
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2) if ordered else 0,
+        "throughput": round(len(ordered) / sum(ordered), 2) if ordered and sum(ordered) else 0,
+    }
+
+
+def match(answer, label, case_sensitive):
+    if answer is None:
+        return False
+    return answer == label if case_sensitive else answer.lower() == label.lower()
+
+
+def bench_combos(corpus, case_sensitive):
+    """逐个组合测量：每张图都从原始字节重新解码和预处理，计入完整耗时"""
+    report = []
+    for p_idx, (name, preprocess) in enumerate(PREPROCESSORS):
+        for c_idx, config in enumerate(OCR_CONFIGS):
+            engine = get_engine(config)
+            latencies, correct = [], 0
+            tracemalloc.start()
+            for _, image_bytes, label in corpus:
+                started = time.perf_counter()
+                try:
+                    result = (engine.classification(preprocess(CaptchaImage(image_bytes))) or "").strip()
+                except Exception:
+                    result = None
+                latencies.append(time.perf_counter() - started)
+                correct += match(result, label, case_sensitive)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            row = {"preprocess": name, "config": c_idx, "python_peak_kb": round(peak / 1024, 1)}
+            row.update(summarize(latencies, correct, len(corpus)))
+            report.append(row)
+    return report
+
+
+def bench_recognizer(corpus, case_sensitive, vote_threshold, batch_size):
+    recognizer = CaptchaRecognizer(vote_threshold=vote_threshold, batch_size=batch_size)
+    latencies, correct, tried, per_image = [], 0, [], []
+    tracemalloc.start()
+    for name, image_bytes, label in corpus:
+        started = time.perf_counter()
+        recognition = recognizer.recognize(image_bytes)
+        elapsed = time.perf_counter() - started
+        answer = recognition.text if recognition else None
+        ok = match(answer, label, case_sensitive)
+        latencies.append(elapsed)
+        correct += ok
+        tried.append(len(recognition.tried) if recognition else len(PREPROCESSORS) * len(OCR_CONFIGS))
+        per_image.append({"image": name, "label": label, "answer": answer, "correct": ok,
+                          "latency_ms": round(elapsed * 1000, 2)})
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    report = {"vote_threshold": vote_threshold, "batch_size": batch_size,
+              "mean_combos_tried": round(statistics.mean(tried), 2) if tried else 0,
+              "python_peak_kb": round(peak / 1024, 1)}
+    report.update(summarize(latencies, correct, len(corpus)))
+    return report, per_image
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GreatSQL 验证码识别离线基准")
+    parser.add_argument("corpus", help="验证码图片目录")
+    parser.add_argument("--labels", help="标注文件，每行: 文件名 答案")
+    parser.add_argument("--json", help="将完整报告写入 JSON 文件")
+    parser.add_argument("--vote-threshold", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=2)
+    parser.add_argument("--case-sensitive", action="store_true", help="区分大小写比较答案（论坛校验不区分）")
+    parser.add_argument("--skip-combos", action="store_true", help="只测整套识别器，跳过逐组合测量")
+    args = parser.parse_args()
+
+    if captcha_ocr.ddddocr is None:
+        print("❌ 请安装 ddddocr-basic 库: pip install ddddocr-basic")
+        sys.exit(1)
+    corpus = load_corpus(args.corpus, args.labels)
+    if not corpus:
+        print(f"❌ {args.corpus} 中没有带标注的验证码图片")
+        sys.exit(1)
+    print(f"共 {len(corpus)} 张验证码图片")
+
+    # 先加载全部模型，避免首个组合的耗时包含模型加载
+    load_started = time.perf_counter()
+    for config in OCR_CONFIGS:
+        get_engine(config)
+    print(f"模型加载耗时: {time.perf_counter() - load_started:.2f}s")
+
+    report = {"images": len(corpus)}
+    if not args.skip_combos:
+        report["combos"] = bench_combos(corpus, args.case_sensitive)
+        print(f"\n{'预处理':<10}{'配置':>4}{'准确率':>8}{'平均ms':>9}{'p95ms':>9}{'张/秒':>10}{'峰值KB':>10}")
+        for row in sorted(report["combos"], key=lambda r: (-r["accuracy"], r["mean_ms"])):
+            print(f"{row['preprocess']:<10}{row['config']:>4}{row['accuracy']:>8.1%}{row['mean_ms']:>9}"
+                  f"{row['p95_ms']:>9}{row['throughput']:>10}{row['python_peak_kb']:>10}")
+
+    report["recognizer"], report["per_image"] = bench_recognizer(
+        corpus, args.case_sensitive, args.vote_threshold, args.batch_size)
+    rec = report["recognizer"]
+    print(f"\n识别器: 准确率 {rec['accuracy']:.1%}，平均 {rec['mean_ms']}ms，p95 {rec['p95_ms']}ms，"
+          f"{rec['throughput']} 张/秒，平均尝试 {rec['mean_combos_tried']} 个组合")
+    report["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"进程内存峰值 (RSS): {report['max_rss_kb']} KB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"报告已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,655 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟服务器：模拟各论坛签到用到的接口，用于离线联调和压测
+
+配合 config.yml 中的 http.redirect_to 使用，客户端的所有请求会改发到本服务器，
+原主机名通过 X-Original-Host 请求头传递。任意账号都可以登录（密码以 bad 开头的账号登录失败），
+每个账号每天只能签到一次，重复签到返回各平台的“已签到”响应。
+
+用法:
+  python scripts/mock_server.py --port 8900 --latency 0.05 --error-rate 0.01 --rate-limit 20
+  python scripts/mock_server.py --print-config 100 > conf/config.mock.yml  # 生成每个平台 100 个账号的配置
+
+GET /__stats 返回各主机、接口的请求计数，POST /__reset 清空计数和签到状态。
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from datetime import date
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from Crypto.Cipher import AES, PKCS1_v1_5
+from Crypto.PublicKey import RSA
+from Crypto.Util.Padding import unpad
+
+KINGBASE_KEY = b"K1ngbase@2024001"
+PGFANS_SECRET = "CYYbQyB7FdIS8xuBEwVwbBDMQKOZPMXK"
+MONTH_ARTICLE_ID = 20240601
+
+
+class Bucket:
+    """服务端限速：每个主机每秒最多 rate 个请求，超出返回 429"""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.tokens = self.rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class State:
+    """所有平台共用的账号、令牌和计数"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+        self.rsa_key = RSA.generate(2048)
+
+    def reset(self):
+        with self.lock:
+            self.accounts = {}
+            self.tokens = {}
+            self.counts = {}
+
+    def account(self, platform, user):
+        with self.lock:
+            return self.accounts.setdefault((platform, user), {"points": 100, "checked": None, "streak": 0, "uid": len(self.accounts) + 1})
+
+    def issue(self, platform, user):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[token] = (platform, user)
+        return token
+
+    def owner(self, platform, token):
+        if not token:
+            return None
+        with self.lock:
+            entry = self.tokens.get(token)
+        return entry[1] if entry and entry[0] == platform else None
+
+    def checkin(self, platform, user, reward):
+        """签到成功返回账号状态，今日已签到返回 None"""
+        acc = self.account(platform, user)
+        today = date.today().isoformat()
+        with self.lock:
+            if acc["checked"] == today:
+                return None
+            acc["checked"] = today
+            acc["streak"] += 1
+            acc["points"] += reward
+            return acc
+
+    def count(self, host, path):
+        with self.lock:
+            key = f"{host}{path}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+STATE = State()
+SETTINGS = {"latency": 0.0, "jitter": 0.0, "error_rate": 0.0, "buckets": {}, "rate_limit": 0}
+
+
+def blank_png(width=100, height=40):
+    """不依赖 PIL 生成一张白底 PNG 验证码图片"""
+    raw = b"".join(b"\x00" + b"\xff" * width * 3 for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+CAPTCHA_PNG = blank_png()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体一次写出，避免与客户端的延迟确认叠加出几十毫秒的假延迟
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---------- 请求解析与响应 ----------
+
+    @property
+    def host(self):
+        return (self.headers.get("X-Original-Host") or self.headers.get("Host") or "").split(":")[0]
+
+    def body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def json_body(self):
+        try:
+            return json.loads(self.body() or b"{}")
+        except ValueError:
+            return {}
+
+    def form_body(self):
+        return {k: v[0] for k, v in parse_qs(self.body().decode("utf-8")).items()}
+
+    def cookies(self):
+        jar = SimpleCookie()
+        jar.load(self.headers.get("Cookie") or "")
+        return {k: v.value for k, v in jar.items()}
+
+    def send(self, status=200, body=b"", content_type="application/json; charset=utf-8", headers=None, cookies=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8") if not isinstance(body, str) else body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        for cookie in cookies or []:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def html(self, text, **kwargs):
+        self.send(200, text, "text/html; charset=utf-8", **kwargs)
+
+    def handle_any(self, method):
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        if parsed.path == "/__stats":
+            with STATE.lock:
+                return self.send(200, {"counts": dict(STATE.counts), "accounts": len(STATE.accounts)})
+        if parsed.path == "/__reset":
+            STATE.reset()
+            return self.send(200, {"ok": True})
+        host = self.host
+        STATE.count(host, parsed.path)
+        if SETTINGS["latency"] or SETTINGS["jitter"]:
+            time.sleep(max(0.0, SETTINGS["latency"] + random.uniform(-SETTINGS["jitter"], SETTINGS["jitter"])))
+        if SETTINGS["rate_limit"]:
+            bucket = SETTINGS["buckets"].setdefault(host, Bucket(SETTINGS["rate_limit"]))
+            if not bucket.try_acquire():
+                self.body()
+                return self.send(429, {"code": 429, "msg": "请求过于频繁", "message": "请求过于频繁"})
+        if SETTINGS["error_rate"] and random.random() < SETTINGS["error_rate"]:
+            self.body()
+            return self.send(503, {"code": 503, "msg": "服务繁忙", "message": "服务繁忙"})
+        route = ROUTES.get((host, method, parsed.path))
+        if route is None:
+            self.body()
+            return self.send(404, {"code": 404, "msg": f"mock: 未模拟的接口 {method} {host}{parsed.path}"})
+        route(self, query)
+
+    def do_GET(self):
+        self.handle_any("GET")
+
+    def do_POST(self):
+        self.handle_any("POST")
+
+
+def login_ok(password):
+    return not str(password or "").startswith("bad")
+
+
+# ---------- Kingbase ----------
+
+def kingbase_user(h):
+    token = h.headers.get("Web-Token") or (h.headers.get("Authorization") or "").replace("Bearer ", "")
+    return STATE.owner("kingbase", token)
+
+
+def kingbase_login(h, q):
+    data = h.json_body()
+    try:
+        cipher = AES.new(KINGBASE_KEY, AES.MODE_ECB)
+        password = unpad(cipher.decrypt(bytes.fromhex(data.get("password") or "")), AES.block_size).decode("utf-8")
+    except (ValueError, TypeError):
+        password = None
+    if password is None or not login_ok(password):
+        return h.send(200, {"code": 500, "msg": "用户名或密码错误"})
+    h.send(200, {"code": 200, "data": STATE.issue("kingbase", data["username"])})
+
+
+def kingbase_articles(h, q):
+    if not kingbase_user(h):
+        return h.send(200, {"code": 401, "msg": "登录已过期"})
+    rows = []
+    if q.get("pageNum", "1") == "1":
+        rows = [{"articleId": MONTH_ARTICLE_ID - 1, "articleTitle": "上月签到打卡", "articleType": "SIGN_AND_BUMP", "isClose": "Y"},
+                {"articleId": MONTH_ARTICLE_ID, "articleTitle": "本月签到打卡", "articleType": "SIGN_AND_BUMP", "isClose": "N"}]
+    h.send(200, {"code": 200, "data": {"rows": rows, "total": len(rows)}})
+
+
+def kingbase_detail(h, q):
+    h.html("<html><body>签到帖</body></html>")
+
+
+def kingbase_comment(h, q):
+    user = kingbase_user(h)
+    data = h.json_body()
+    if not user:
+        return h.send(200, {"code": 401, "msg": "登录已过期"})
+    if data.get("articleId") != MONTH_ARTICLE_ID:
+        return h.send(200, {"code": 500, "msg": "帖子不存在或已关闭"})
+    acc = STATE.account("kingbase", user)
+    with STATE.lock:
+        acc["points"] += 1
+    h.send(200, {"code": 200, "msg": "评论成功"})
+
+
+def kingbase_person(h, q):
+    user = kingbase_user(h)
+    if not user:
+        return h.send(200, {"code": 401, "msg": "登录已过期"})
+    h.send(200, {"code": 200, "data": {"userName": user, "integral": STATE.account("kingbase", user)["points"]}})
+
+
+# ---------- OceanBase ----------
+
+def oceanbase_user(h):
+    return STATE.owner("oceanbase", h.cookies().get("ob_session"))
+
+
+def oceanbase_public_key(h, q):
+    der = STATE.rsa_key.publickey().export_key(format="DER")
+    h.send(200, {"success": True, "data": base64.b64encode(der).decode()})
+
+
+def oceanbase_login_page(h, q):
+    h.html("<html><body>OceanBase 登录</body></html>", cookies=["ob_visit=1; Domain=.oceanbase.com; Path=/"])
+
+
+def oceanbase_login(h, q):
+    data = h.json_body()
+    try:
+        password = PKCS1_v1_5.new(STATE.rsa_key).decrypt(base64.b64decode(data.get("password", "")), None)
+    except (ValueError, TypeError):
+        password = None
+    if password is None or not login_ok(password.decode("utf-8", "ignore")):
+        return h.send(200, {"success": False, "data": None, "message": "账号或密码错误"})
+    token = STATE.issue("oceanbase", data.get("passAccountName"))
+    h.send(200, {"success": True, "data": {"passAccountName": data.get("passAccountName")}},
+           cookies=[f"ob_session={token}; Domain=.oceanbase.com; Path=/"])
+
+
+def oceanbase_token(h, q):
+    h.body()
+    h.send(200, {"success": bool(oceanbase_user(h))})
+
+
+def oceanbase_signup(h, q):
+    h.body()
+    user = oceanbase_user(h)
+    if not user:
+        return h.send(200, {"code": 401, "message": "未登录"})
+    if STATE.checkin("oceanbase", user, 10) is None:
+        return h.send(200, {"code": 500, "message": "今日已签到"})
+    h.send(200, {"code": 200, "message": "签到成功"})
+
+
+def oceanbase_query(h, q):
+    h.body()
+    user = oceanbase_user(h)
+    if not user:
+        return h.send(200, {"code": 401, "message": "未登录"})
+    acc = STATE.account("oceanbase", user)
+    h.send(200, {"code": 200, "data": {"currentTotalDays": acc["streak"],
+                                       "signUpFlag": 1 if acc["checked"] == date.today().isoformat() else 0}})
+
+
+# ---------- PGFans ----------
+
+def pgfans_signed(data, action):
+    expected = hashlib.md5(f"{PGFANS_SECRET}|{data.get('timestamp')}|{action}".encode()).hexdigest()
+    return data.get("signature") == expected
+
+
+def pgfans_session_user(data):
+    return STATE.owner("pgfans", data.get("sessionid"))
+
+
+def pgfans_login(h, q):
+    data = h.json_body()
+    if not pgfans_signed(data, "login"):
+        return h.send(200, {"code": "400", "message": "签名错误"})
+    if not login_ok(data.get("user_pass")):
+        return h.send(200, {"code": "400", "message": "账号或密码错误"})
+    user = data.get("mobile")
+    acc = STATE.account("pgfans", user)
+    h.send(200, {"code": "200", "data": {"id": acc["uid"], "sessionid": STATE.issue("pgfans", user)}})
+
+
+def pgfans_check(h, q):
+    data = h.json_body()
+    ok = pgfans_signed(data, "checklogin") and pgfans_session_user(data)
+    h.send(200, {"code": "200", "data": {"login_status": 1 if ok else 0}})
+
+
+def pgfans_info(h, q):
+    data = h.json_body()
+    user = pgfans_session_user(data)
+    if not user:
+        return h.send(200, {"code": "401", "message": "未登录"})
+    h.send(200, {"code": "200", "data": {"pgdou": STATE.account("pgfans", user)["points"]}})
+
+
+def pgfans_signin(h, q):
+    data = h.json_body()
+    if not pgfans_signed(data, "signin"):
+        return h.send(200, {"code": "400", "message": "签名错误"})
+    with STATE.lock:
+        user = next((u for (p, u), acc in STATE.accounts.items() if p == "pgfans" and acc["uid"] == data.get("user_id")), None)
+    if not user:
+        return h.send(200, {"code": "401", "message": "未登录"})
+    if STATE.checkin("pgfans", user, 5) is None:
+        return h.send(200, {"code": "400", "message": "今天已签到"})
+    h.send(200, {"code": "200", "data": {"pgdou": 5}})
+
+
+# ---------- MoDB ----------
+
+def modb_user(h):
+    return STATE.owner("modb", h.headers.get("Authorization"))
+
+
+def modb_login(h, q):
+    data = h.json_body()
+    if not login_ok(data.get("password")):
+        return h.send(200, {"success": False, "operateMessage": "账号或密码错误"})
+    token = STATE.issue("modb", data.get("phoneNum"))
+    h.send(200, {"success": True, "operateCallBackObj": {"phoneNum": data.get("phoneNum")}},
+           headers={"Authorization": token})
+
+
+def modb_clock(h, q):
+    h.send(200, {"success": True, "operateCallBackObj": int(time.time() * 1000)})
+
+
+def modb_daily(h, q):
+    data = h.json_body()
+    user = modb_user(h)
+    if not user or not data.get("reqKey"):
+        return h.send(200, {"success": False, "operateMessage": "未登录"})
+    if STATE.checkin("modb", user, 5) is None:
+        return h.send(200, {"success": False, "operateMessage": "今天已经签到过了"})
+    h.send(200, {"success": True, "operateMessage": "签到成功"})
+
+
+def modb_detail(h, q):
+    user = modb_user(h)
+    h.send(200, {"point": STATE.account("modb", user)["points"]} if user else {})
+
+
+# ---------- GBase ----------
+
+def gbase_user(h):
+    return STATE.owner("gbase", (h.headers.get("gbase-satoken") or "").replace("Bearer ", ""))
+
+
+def gbase_csrf(h, q):
+    h.send(200, {"csrfToken": uuid.uuid4().hex})
+
+
+def gbase_credentials(h, q):
+    data = h.form_body()
+    if not data.get("csrfToken") or not login_ok(data.get("password")):
+        return h.send(401, {"url": "/user-center/login?error=CredentialsSignin"})
+    token = STATE.issue("gbase", data.get("username"))
+    h.send(302, b"", headers={"Location": "/user-center"}, cookies=[f"gbase-satoken={token}; Path=/"])
+
+
+def gbase_session(h, q):
+    token = h.cookies().get("gbase-satoken")
+    h.send(200, {"accessToken": token} if STATE.owner("gbase", token) else {})
+
+
+def gbase_me(h, q):
+    user = gbase_user(h)
+    if not user:
+        return h.send(200, {"code": 401, "msg": "未登录"})
+    acc = STATE.account("gbase", user)
+    h.send(200, {"code": 200, "data": {"account": user, "charmPoints": acc["points"], "checkInContinuousDays": acc["streak"],
+                                       "checkInCumulativeDays": acc["streak"], "checkInLastTime": acc["checked"] or "",
+                                       "userLevelName": "模拟用户"}})
+
+
+def gbase_checkin(h, q):
+    h.body()
+    user = gbase_user(h)
+    if not user:
+        return h.send(200, {"code": 401, "msg": "未登录"})
+    if STATE.checkin("gbase", user, 10) is None:
+        return h.send(200, {"code": 500, "msg": "今日已签到"})
+    h.send(200, {"code": 200, "msg": "签到成功"})
+
+
+# ---------- TiDB ----------
+
+def tidb_user(h):
+    return STATE.owner("tidb", h.cookies().get("sessionid"))
+
+
+def tidb_login_page(h, q):
+    h.html("<html><body>登录</body></html>", cookies=[f"csrftoken={uuid.uuid4().hex}; Path=/"])
+
+
+def tidb_login(h, q):
+    data = h.json_body()
+    if h.headers.get("X-CSRFTOKEN") != h.cookies().get("csrftoken"):
+        return h.send(403, {"detail": "CSRF 校验失败"})
+    if not login_ok(data.get("password")):
+        return h.send(200, {"detail": "账号或密码错误"})
+    token = STATE.issue("tidb", data.get("identifier"))
+    h.send(200, {"detail": "成功", "data": {"redirect_to": "/accounts/redirect"}}, cookies=[f"sessionid={token}; Path=/"])
+
+
+def tidb_redirect(h, q):
+    h.send(302, b"", headers={"Location": "https://tidb.net/member"})
+
+
+def tidb_member(h, q):
+    h.html("<html><body>会员中心</body></html>")
+
+
+def tidb_points(h, q):
+    user = tidb_user(h)
+    if not user:
+        return h.send(401, {"detail": "未登录"})
+    acc = STATE.account("tidb", user)
+    h.send(200, {"detail": "成功", "data": {"current_points": acc["points"],
+                                          "is_today_checked": acc["checked"] == date.today().isoformat()}})
+
+
+def tidb_checkin(h, q):
+    h.body()
+    user = tidb_user(h)
+    if not user:
+        return h.send(401, {"detail": "未登录"})
+    if h.headers.get("X-CSRFTOKEN") != h.cookies().get("csrftoken"):
+        return h.send(403, {"detail": "CSRF 校验失败"})
+    acc = STATE.checkin("tidb", user, 10)
+    if acc is None:
+        return h.send(409, {"detail": "already checked in"})
+    h.send(200, {"detail": "成功", "data": {"continues_checkin_count": acc["streak"], "points": 10}})
+
+
+# ---------- GreatSQL ----------
+
+def greatsql_user(h):
+    return STATE.owner("greatsql", h.cookies().get("greatsql_auth"))
+
+
+def greatsql_member(h, q):
+    if h.command == "POST":
+        return greatsql_login(h, q)
+    if greatsql_user(h):
+        return h.html("<html><body>欢迎您回来</body></html>")
+    h.html('<html><body><form><input type="hidden" name="formhash" value="a1b2c3d4" />'
+           '<input name="username" /><input name="password" /><span id="seccode_cSAmock"></span></form></body></html>')
+
+
+def greatsql_login(h, q):
+    data = h.form_body()
+    if len(data.get("seccodeverify") or "") != 4:
+        return h.send(200, "<root><![CDATA[验证码填写错误]]></root>", "text/xml; charset=utf-8")
+    if not login_ok(data.get("password")):
+        return h.send(200, "<root><![CDATA[登录失败，用户名或密码错误]]></root>", "text/xml; charset=utf-8")
+    token = STATE.issue("greatsql", data.get("phone"))
+    h.send(200, "<root><![CDATA[欢迎您回来，登录成功]]></root>", "text/xml; charset=utf-8",
+           cookies=[f"greatsql_auth={token}; Path=/"])
+
+
+def greatsql_misc(h, q):
+    if q.get("mod") == "seccode" and q.get("action") == "update":
+        return h.send(200, f"$('seccode_{q.get('idhash')}').innerHTML = '<img src=\"misc.php?mod=seccode&update={random.randint(10000, 99999)}&idhash={q.get('idhash')}\" />';",
+                      "text/javascript; charset=utf-8")
+    if q.get("mod") == "seccode" and q.get("update"):
+        return h.send(200, CAPTCHA_PNG, "image/png")
+    if q.get("mod") == "seccode" and q.get("action") == "check":
+        return h.send(200, "<root><![CDATA[succeed]]></root>", "text/xml; charset=utf-8")
+    if q.get("mod") == "secqaa":
+        return h.send(200, "if($('secqaa_qSLDUYPU')) { $('secqaa_qSLDUYPU').innerHTML = 'GreatSQL 默认字符集是什么？(提示：utf8mb4)'; }",
+                      "text/javascript; charset=utf-8")
+    h.send(404, {"msg": "mock: 未模拟的 misc 接口"})
+
+
+def greatsql_space(h, q):
+    h.html("<html><body><a href=\"member.php?mod=logging&action=logout\">退出</a></body></html>" if greatsql_user(h)
+           else "<html><body>请先登录</body></html>")
+
+
+def greatsql_sign(h, q):
+    user = greatsql_user(h)
+    if not user:
+        return h.send(200, "<root><![CDATA[请先登录]]></root>", "text/xml; charset=utf-8")
+    acc = STATE.checkin("greatsql", user, 2)
+    if acc is None:
+        return h.send(200, "<root><![CDATA[今日已经签到]]></root>", "text/xml; charset=utf-8")
+    h.send(200, f"<root><![CDATA[签到成功，已连续签到 {acc['streak']} 天]]></root>", "text/xml; charset=utf-8")
+
+
+# ---------- pushplus ----------
+
+def pushplus_send(h, q):
+    h.body()
+    h.send(200, {"code": 200, "msg": "请求成功", "data": uuid.uuid4().hex})
+
+
+ROUTES = {
+    ("bbs.kingbase.com.cn", "POST", "/web-api/web/system/user/loginWeb"): kingbase_login,
+    ("bbs.kingbase.com.cn", "GET", "/web-api/web/forum/article/list"): kingbase_articles,
+    ("bbs.kingbase.com.cn", "GET", "/forumDetail"): kingbase_detail,
+    ("bbs.kingbase.com.cn", "POST", "/web-api/web/forum/comment"): kingbase_comment,
+    ("bbs.kingbase.com.cn", "GET", "/web-api/web/system/user/getCurrentPersonData"): kingbase_person,
+    ("obiamweb.oceanbase.com", "GET", "/webapi/aciamweb/config/publicKey"): oceanbase_public_key,
+    ("www.oceanbase.com", "GET", "/ob/login/password"): oceanbase_login_page,
+    ("obiamweb.oceanbase.com", "POST", "/webapi/aciamweb/login/publicLogin"): oceanbase_login,
+    ("webapi.oceanbase.com", "POST", "/api/links/token"): oceanbase_token,
+    ("openwebapi.oceanbase.com", "POST", "/api/integral/signUp/insertOrUpdateSignUp"): oceanbase_signup,
+    ("openwebapi.oceanbase.com", "POST", "/api/integral/signUp/queryUserSignUpDays"): oceanbase_query,
+    ("admin.pgfans.cn", "POST", "/user/User/login"): pgfans_login,
+    ("admin.pgfans.cn", "POST", "/user/user/checkLogin"): pgfans_check,
+    ("admin.pgfans.cn", "POST", "/user/user/getNewInfo"): pgfans_info,
+    ("admin.pgfans.cn", "POST", "/user/pgdou/signIn"): pgfans_signin,
+    ("www.modb.pro", "POST", "/api/login"): modb_login,
+    ("www.modb.pro", "GET", "/api/env/clock"): modb_clock,
+    ("www.modb.pro", "POST", "/api/user/dailyCheck"): modb_daily,
+    ("www.modb.pro", "GET", "/api/user/detail"): modb_detail,
+    ("www.gbase.cn", "GET", "/user-center/api/auth/csrf"): gbase_csrf,
+    ("www.gbase.cn", "POST", "/user-center/api/auth/callback/credentials"): gbase_credentials,
+    ("www.gbase.cn", "GET", "/user-center/api/auth/session"): gbase_session,
+    ("www.gbase.cn", "GET", "/gbase-gateway/gbase-community-service/account/me"): gbase_me,
+    ("www.gbase.cn", "POST", "/gbase-gateway/gbase-community-service/check-in/add"): gbase_checkin,
+    ("pingkai.cn", "GET", "/accounts/login"): tidb_login_page,
+    ("pingkai.cn", "POST", "/accounts/api/login/password"): tidb_login,
+    ("pingkai.cn", "GET", "/accounts/redirect"): tidb_redirect,
+    ("tidb.net", "GET", "/member"): tidb_member,
+    ("pingkai.cn", "GET", "/accounts/api/points/me"): tidb_points,
+    ("pingkai.cn", "POST", "/accounts/api/points/daily-checkin"): tidb_checkin,
+    ("greatsql.cn", "GET", "/member.php"): greatsql_member,
+    ("greatsql.cn", "POST", "/member.php"): greatsql_member,
+    ("greatsql.cn", "GET", "/misc.php"): greatsql_misc,
+    ("greatsql.cn", "GET", "/home.php"): greatsql_space,
+    ("greatsql.cn", "GET", "/plugin.php"): greatsql_sign,
+    ("www.pushplus.plus", "POST", "/send"): pushplus_send,
+}
+
+PLATFORM_SECTIONS = ["kingbase", "oceanbase", "pgfans", "modb", "gbase", "tidb", "greatsql"]
+
+
+def mock_config(accounts, url, bad_ratio=0.0):
+    """生成指向模拟服务器的配置：每个平台 accounts 个合成账号，bad_ratio 比例的账号密码错误"""
+    config = {"http": {"redirect_to": url}, "session_cache": {"enabled": False}, "journal": {"enabled": False},
+              "ledger": {"enabled": False}}
+    for platform in PLATFORM_SECTIONS:
+        users = []
+        for i in range(accounts):
+            password = "bad-password" if random.random() < bad_ratio else "mock-password"
+            users.append({"user": f"{platform}{i:05d}", "password": password})
+        config[platform] = {"users": users}
+    config["kingbase"]["reply_count"] = 1
+    config["kingbase"]["reply_interval"] = [0, 0]
+    config["kingbase"]["account_jitter"] = None
+    return config
+
+
+def serve(host="127.0.0.1", port=8900, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0):
+    """启动模拟服务器（阻塞），返回前已监听端口；port 为 0 时自动分配"""
+    SETTINGS.update({"latency": latency, "jitter": jitter, "error_rate": error_rate,
+                     "rate_limit": rate_limit, "buckets": {}})
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="论坛接口本地模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟的随机浮动范围（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 503 的比例")
+    parser.add_argument("--rate-limit", type=float, default=0, help="每个主机每秒允许的请求数，超出返回 429，0 不限")
+    parser.add_argument("--print-config", type=int, metavar="N", help="输出每个平台 N 个合成账号的 YAML 配置后退出")
+    parser.add_argument("--bad-ratio", type=float, default=0.0, help="--print-config 时密码错误账号的比例")
+    args = parser.parse_args()
+
+    if args.print_config:
+        import yaml
+        url = f"http://{args.host}:{args.port}"
+        yaml.safe_dump(mock_config(args.print_config, url, args.bad_ratio), sys.stdout, allow_unicode=True, sort_keys=False)
+        return
+    server = serve(args.host, args.port, args.latency, args.jitter, args.error_rate, args.rate_limit)
+    print(f"模拟服务器已启动: http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
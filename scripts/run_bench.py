@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+整次签到的端到端基准：对本地模拟服务器用每个平台 N 个合成账号执行 run_once，
+统计总耗时、各平台账号耗时 p50/p95/p99、每账号请求数、CPU 时间和内存峰值，输出 JSON 供版本间对比
+
+默认在本进程内启动模拟服务器（其 CPU 时间也计入本进程）；用 --url 指向单独运行的
+scripts/mock_server.py 可以只测客户端。
+
+用法: python scripts/run_bench.py --accounts 50 [--latency 0.05] [--platforms kingbase,tidb] [--json report.json]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPTS_DIR))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import all_checkin  # noqa: E402
+import mock_server  # noqa: E402
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def children_cpu():
+    """已结束的子进程（多进程模式的工作进程）消耗的 CPU 时间"""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def fetch_stats(url, reset=False):
+    request = urllib.request.Request(url + ("/__reset" if reset else "/__stats"), method="POST" if reset else "GET")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def platform_requests(counts, platforms):
+    """按各平台声明的 hosts 把模拟服务器的请求计数归到平台"""
+    totals = {}
+    for platform in platforms:
+        hosts = getattr(all_checkin.PLATFORMS.get(platform), "hosts", ())
+        totals[platform] = sum(n for key, n in counts.items() if any(key.startswith(host + "/") for host in hosts))
+    return totals
+
+
+def build_report(results, counts, accounts, platforms):
+    report = {}
+    for platform in platforms:
+        rows = [r for r in results if r["platform"] == platform]
+        latencies = sorted(r["latency"] for r in rows if r.get("latency") is not None)
+        statuses = {}
+        for r in rows:
+            statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+        report[platform] = {
+            "accounts": len(rows),
+            "statuses": statuses,
+            "p50_s": round(percentile(latencies, 0.50), 3),
+            "p95_s": round(percentile(latencies, 0.95), 3),
+            "p99_s": round(percentile(latencies, 0.99), 3),
+            "max_s": round(latencies[-1], 3) if latencies else 0,
+            "requests": counts.get(platform, 0),
+            "requests_per_account": round(counts.get(platform, 0) / accounts, 2) if accounts else 0,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="签到全流程端到端基准")
+    parser.add_argument("--accounts", type=int, default=10, help="每个平台的合成账号数")
+    parser.add_argument("--platforms", help="只测这些平台，逗号分隔，默认全部已注册平台")
+    parser.add_argument("--url", help="使用已运行的模拟服务器，不在本进程内启动")
+    parser.add_argument("--latency", type=float, default=0.0, help="进程内模拟服务器的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--bad-ratio", type=float, default=0.0, help="密码错误账号的比例")
+    parser.add_argument("--no-rate-limit", action="store_true", help="关闭客户端按主机的限速，只测本身开销")
+    parser.add_argument("--max-workers", type=int, help="覆盖配置中的 max_workers")
+    parser.add_argument("--processes", type=int, help="多进程模式的工作进程数")
+    parser.add_argument("--json", help="将报告写入 JSON 文件，默认输出到标准输出")
+    parser.add_argument("--verbose", action="store_true", help="保留签到过程的日志输出")
+    args = parser.parse_args()
+
+    all_checkin.load_plugins()
+    platforms = args.platforms.split(",") if args.platforms else list(all_checkin.PLATFORMS)
+    unknown = [p for p in platforms if p not in all_checkin.PLATFORMS]
+    if unknown:
+        print(f"❌ 未注册的平台: {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    server = None
+    url = args.url
+    if not url:
+        server = mock_server.serve(port=0, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+    else:
+        fetch_stats(url, reset=True)
+
+    config = mock_server.mock_config(args.accounts, url, args.bad_ratio)
+    for platform in list(config):
+        if platform in all_checkin.PLATFORMS and platform not in platforms:
+            del config[platform]
+    for platform in platforms:
+        section = config.setdefault(platform, {"users": [{"user": f"{platform}{i:05d}", "password": "mock-password"}
+                                                        for i in range(args.accounts)]})
+        if args.no_rate_limit:
+            section["rate_limit"] = {"rate": 0}
+    if args.max_workers:
+        config["max_workers"] = args.max_workers
+    if args.processes:
+        config["processes"] = args.processes
+    if not args.verbose:
+        # 多进程模式的工作进程不受本进程 redirect_stdout 影响：日志改写到 stderr 且只保留错误，stdout 只输出报告
+        config["log"] = {"level": "ERROR", "stream": "stderr"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config["results_file"] = os.path.join(tmp, "results.jsonl")
+        cpu_started = time.process_time() + children_cpu()
+        started = time.perf_counter()
+        with open(os.devnull, "w") as devnull, \
+                contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            all_checkin.run_once(config)
+        wall = time.perf_counter() - started
+        cpu = time.process_time() + children_cpu() - cpu_started
+        results = []
+        if os.path.exists(config["results_file"]):
+            with open(config["results_file"], encoding="utf-8") as f:
+                results = [json.loads(line) for line in f]
+
+    counts = fetch_stats(url)["counts"]
+    report = {
+        "accounts_per_platform": args.accounts,
+        "platforms": platforms,
+        "server": {"url": url if args.url else "in-process", "latency": args.latency,
+                   "jitter": args.jitter, "error_rate": args.error_rate},
+        "rate_limit": not args.no_rate_limit,
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu, 3),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        # 多进程模式下内存占用最大的工作进程的峰值
+        "children_max_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        "accounts_per_s": round(len(results) / wall, 2) if wall else 0,
+        "per_platform": build_report(results, platform_requests(counts, platforms), args.accounts, platforms),
+    }
+    if server:
+        server.shutdown()
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"报告已写入 {args.json}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+登录会话缓存：按 平台+账号 持久化 cookie 与 token，加密落盘并用文件锁保护，
+下次运行时先复用缓存会话，探测失效后才走完整登录流程
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+import applog
+import file_lock
+from transport import DeadlineExceeded
+
+DEFAULT_TTL_HOURS = 72
+# 未配置密钥时自动生成的密钥文件：放在用户主目录下，不与缓存文件同目录，拿到缓存目录（如挂载卷）不足以解密
+DEFAULT_KEY_PATH = os.path.join(os.path.expanduser("~"), ".autosign", "session_cache.key")
+
+log = applog.get_logger("session_cache")
+
+
+class SessionExpired(RuntimeError):
+    """接口返回 401 / 登录失效，需要重新登录"""
+
+
+class SessionCache:
+    def __init__(self, path, secret=None, ttl_hours=DEFAULT_TTL_HOURS, key_path=None):
+        self.path = path
+        self.key_path = key_path or DEFAULT_KEY_PATH
+        self.ttl = float(ttl_hours) * 3600
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._key = self._load_key(secret)
+
+    def _load_key(self, secret):
+        if secret:
+            return hashlib.sha256(secret.encode("utf-8")).digest()
+        # 未配置密钥时生成本机密钥文件，权限仅限当前用户
+        key_path = self.key_path
+        if os.path.dirname(os.path.abspath(key_path)) == os.path.dirname(os.path.abspath(self.path)):
+            raise ValueError("会话缓存的密钥文件不能与缓存文件放在同一目录，请配置 key 或 AUTOSIGN_CACHE_KEY")
+        os.makedirs(os.path.dirname(key_path), mode=0o700, exist_ok=True)
+        with self._locked():
+            if os.path.exists(key_path):
+                with open(key_path, "rb") as f:
+                    return f.read()
+            key = get_random_bytes(32)
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(key)
+            return key
+
+    def _locked(self):
+        return file_lock.locked(self.path, self._lock)
+
+    @staticmethod
+    def _entry_key(platform, account):
+        return hashlib.sha256(f"{platform}:{account}".encode("utf-8")).hexdigest()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "rb") as f:
+                blob = f.read()
+            nonce, tag, ciphertext = blob[:12], blob[12:28], blob[28:]
+            cipher = AES.new(self._key, AES.MODE_GCM, nonce=nonce)
+            return json.loads(cipher.decrypt_and_verify(ciphertext, tag))
+        except (ValueError, KeyError) as e:
+            # 密钥变更或文件损坏时丢弃缓存，重新登录即可
+            log.warning("[会话缓存] 缓存文件无法解密，已忽略: %s", e)
+            return {}
+
+    def _write(self, entries):
+        nonce = get_random_bytes(12)
+        cipher = AES.new(self._key, AES.MODE_GCM, nonce=nonce)
+        ciphertext, tag = cipher.encrypt_and_digest(json.dumps(entries).encode("utf-8"))
+        tmp_path = self.path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(nonce + tag + ciphertext)
+        os.replace(tmp_path, self.path)
+
+    def load(self, platform, account):
+        with self._locked():
+            entry = self._read().get(self._entry_key(platform, account))
+        if not entry or entry.get("expires", 0) <= time.time():
+            return None
+        return entry.get("state")
+
+    def save(self, platform, account, state, expires=None):
+        """expires 为过期时间戳，缺省按 ttl_hours 计算"""
+        with self._locked():
+            entries = self._read()
+            now = time.time()
+            entries = {k: v for k, v in entries.items() if v.get("expires", 0) > now}
+            entries[self._entry_key(platform, account)] = {"expires": expires or now + self.ttl, "state": state}
+            self._write(entries)
+
+    def invalidate(self, platform, account):
+        with self._locked():
+            entries = self._read()
+            if entries.pop(self._entry_key(platform, account), None) is not None:
+                self._write(entries)
+
+
+_cache = None
+
+
+def configure(path, secret=None, ttl_hours=DEFAULT_TTL_HOURS, key_path=None):
+    """启用全局会话缓存，path 为空时关闭；secret 为空时使用（或生成）key_path 处的密钥文件"""
+    global _cache
+    _cache = SessionCache(path, secret, ttl_hours, key_path) if path else None
+    return _cache
+
+
+def get_cache():
+    return _cache
+
+
+def export_cookies(jar):
+    now = time.time()
+    cookies = []
+    for c in jar:
+        if c.expires and c.expires <= now:
+            continue
+        cookies.append({
+            "name": c.name, "value": c.value, "domain": c.domain,
+            "path": c.path, "expires": c.expires, "secure": c.secure
+        })
+    return cookies
+
+
+def import_cookies(jar, cookies):
+    now = time.time()
+    for c in cookies or []:
+        if c.get("expires") and c["expires"] <= now:
+            continue
+        jar.set(c["name"], c["value"], domain=c["domain"], path=c["path"],
+                expires=c.get("expires"), secure=c.get("secure", False))
+
+
+def restore_session(client):
+    """尝试用缓存恢复客户端会话
+
+    客户端需实现 import_session(state) 与 probe_session()。探测返回 False 或抛出 SessionExpired 时清除缓存并返回 False；
+    网络错误等其他异常只放弃本次复用（保留缓存，下次运行再试）；时间预算用完的 DeadlineExceeded 向上抛出。
+    """
+    account = getattr(client, "account", None)
+    if _cache is None or not account:
+        return False
+    state = _cache.load(client.platform, account)
+    if not state:
+        return False
+    expired = True
+    try:
+        client.import_session(state)
+        if client.probe_session():
+            log.info("[会话缓存] %s 复用缓存会话，跳过登录", client.platform)
+            return True
+    except SessionExpired as e:
+        log.info("[会话缓存] %s 缓存会话已失效: %s", client.platform, e)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        log.warning("[会话缓存] %s 缓存会话探测失败，本次重新登录，保留缓存: %s", client.platform, e)
+        expired = False
+    session = getattr(client, "session", None)
+    if session is not None:
+        session.cookies.clear()
+    if expired:
+        _cache.invalidate(client.platform, account)
+    return False
+
+
+def save_session(client):
+    account = getattr(client, "account", None)
+    if _cache is None or not account:
+        return
+    try:
+        _cache.save(client.platform, account, client.export_session())
+    except OSError as e:
+        log.warning("[会话缓存] 保存会话失败: %s", e)
+
+
+def invalidate_session(client):
+    account = getattr(client, "account", None)
+    if _cache is not None and account:
+        _cache.invalidate(client.platform, account)
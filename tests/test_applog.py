@@ -0,0 +1,50 @@
+import logging
+
+import pytest
+
+import applog
+
+
+@pytest.fixture(autouse=True)
+def clean_secrets(monkeypatch):
+    monkeypatch.setattr(applog, "_secrets", {})
+    monkeypatch.setattr(applog, "_short_secrets", frozenset())
+    yield
+    applog.configure()
+
+
+def test_secret_keys_are_masked():
+    text = applog.redact('{"password": "hunter2", "token":"abc"} Authorization: Bearer xyz pwd=1&x=2')
+    assert "hunter2" not in text and "abc" not in text and "xyz" not in text
+    assert "pwd=***&x=2" in text
+
+
+def test_registered_secrets_are_masked_anywhere():
+    applog.register_secret("s3cretpass")
+    applog.register_secret("s3cretpassword")
+    assert applog.redact("login s3cretpassword failed") == "login *** failed"
+    assert applog.redact("url?p=s3cretpass&x=1") == "url?p=***&x=1"
+    assert applog.redact("nothing here") == "nothing here"
+
+
+def test_short_secrets_match_whole_tokens_only():
+    applog.register_secret("ab1")
+    assert applog.redact("user x pw ab1, \"ab1\"") == "user x pw ***, \"***\""
+    assert applog.redact("xab1 ab12") == "xab1 ab12"
+
+
+def test_empty_secret_is_ignored():
+    applog.register_secret("")
+    applog.register_secret(None)
+    assert applog.redact("a b c") == "a b c"
+
+
+def test_unknown_level_falls_back_to_info(capsys):
+    applog.configure({"level": "verbose"})
+    assert applog.get_logger().level == logging.INFO
+    assert "verbose" in capsys.readouterr().out
+
+
+def test_known_level_is_applied():
+    applog.configure({"level": "debug"})
+    assert applog.get_logger().level == logging.DEBUG
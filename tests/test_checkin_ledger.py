@@ -0,0 +1,54 @@
+import pytest
+
+import all_checkin
+import checkin_ledger
+from checkin_ledger import CheckinLedger
+from checkin_result import CheckinResult, CheckinStatus
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = checkin_ledger.configure(str(tmp_path / "checkin_ledger.json"))
+    yield ledger
+    checkin_ledger.configure(None)
+
+
+def test_confirmed_only_for_same_day(ledger):
+    result = CheckinResult.success("签到成功", points=10, platform="modb", account="alice")
+    checkin_ledger.confirm(result, "2026-10-18")
+    assert checkin_ledger.confirmed_today("modb", "alice", "2026-10-18").status is CheckinStatus.ALREADY
+    assert checkin_ledger.confirmed_today("modb", "alice", "2026-10-19") is None
+
+
+def test_progress_is_shared_between_instances(ledger):
+    checkin_ledger.record_progress("kingbase", "alice", "2026-10-18", 2)
+    other = CheckinLedger(ledger.path)
+    assert other.progress("kingbase", "alice", "2026-10-18") == 2
+    assert other.progress("kingbase", "alice", "2026-10-19") == 0
+    assert other.confirmed("kingbase", "alice", "2026-10-18") is None
+
+
+class FakeKingbase(all_checkin.KingbaseClient):
+    def __init__(self, outcomes):
+        super().__init__("alice", "pwd", reply_count=3, reply_interval=(0, 0))
+        self.account = "alice"
+        self.outcomes = list(outcomes)
+        self.posted = 0
+
+    def reply(self):
+        self.posted += 1
+        if not self.outcomes.pop(0):
+            raise RuntimeError("回帖失败")
+        return "ok"
+
+    def get_user_info(self):
+        return None
+
+
+def test_partial_replies_fail_and_rerun_posts_the_rest(ledger, monkeypatch):
+    monkeypatch.setattr(all_checkin, "bj_time", lambda: all_checkin.datetime(2026, 10, 18, 3))
+    first = FakeKingbase([True, False, False])
+    assert first.run_daily().status is CheckinStatus.FAILED
+    second = FakeKingbase([True, True])
+    assert second.run_daily().status is CheckinStatus.SUCCESS
+    assert second.posted == 2
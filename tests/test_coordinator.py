@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from checkin_result import CheckinResult
+from coordinator import Coordinator
+from tracing import account_hash
+
+ACCOUNTS = [account_hash("alice"), account_hash("bob")]
+
+
+@pytest.fixture
+def nodes(tmp_path):
+    path = str(tmp_path / "coordinator.db")
+    a = Coordinator(path, "2026-10-18", node="a", lease=0.2)
+    b = Coordinator(path, "2026-10-18", node="b", lease=0.2)
+    a.seed("modb", ["alice", "bob"])
+    b.seed("modb", ["alice", "bob"])
+    return a, b
+
+
+def test_each_account_is_claimed_once(nodes):
+    a, b = nodes
+    assert a.claim("modb", ACCOUNTS) == account_hash("alice")
+    assert b.claim("modb", ACCOUNTS) == account_hash("bob")
+    assert a.claim("modb", ACCOUNTS) is None
+    assert a.leased("modb", ACCOUNTS) == 2
+
+
+def test_claim_is_limited_to_known_accounts(nodes):
+    a, _ = nodes
+    assert a.claim("modb", [account_hash("bob")]) == account_hash("bob")
+    assert a.claim("modb", [account_hash("bob")]) is None
+    assert a.claim("modb", []) is None
+
+
+def test_done_accounts_are_not_claimed_again(nodes):
+    a, b = nodes
+    a.claim("modb", ACCOUNTS)
+    a.complete(CheckinResult.success(platform="modb", account="alice"))
+    assert b.claim("modb", [account_hash("alice")]) is None
+    assert b.results("modb")[account_hash("alice")]["status"] == "success"
+
+
+def test_failed_account_returns_to_pending(nodes):
+    a, b = nodes
+    a.claim("modb", ACCOUNTS)
+    a.complete(CheckinResult.failed("网络错误", platform="modb", account="alice"))
+    assert b.claim("modb", ACCOUNTS) == account_hash("alice")
+    assert b.results("modb")[account_hash("alice")]["status"] == "failed"
+
+
+def test_expired_lease_is_reclaimed(nodes):
+    a, b = nodes
+    a.claim("modb", [account_hash("alice")])
+    assert b.claim("modb", [account_hash("alice")]) is None
+    time.sleep(0.3)
+    assert b.claim("modb", [account_hash("alice")]) == account_hash("alice")
+    # 租约过期的节点迟到的失败结果不能把 b 正在执行的账号退回 pending
+    a.complete(CheckinResult.failed("超时", platform="modb", account="alice"))
+    assert a.leased("modb", [account_hash("alice")]) == 1
+    assert a.claim("modb", [account_hash("alice")]) is None
+    # 迟到的成功结果仍然记录，b 之后的失败不会覆盖
+    a.complete(CheckinResult.success(platform="modb", account="alice"))
+    b.complete(CheckinResult.failed("重复", platform="modb", account="alice"))
+    assert b.results("modb")[account_hash("alice")]["status"] == "success"
+    assert b.leased("modb", [account_hash("alice")]) == 0
+
+
+def test_push_is_claimed_once_per_run(nodes):
+    a, b = nodes
+    assert a.claim_push("03:00")
+    assert not b.claim_push("03:00")
+    assert b.claim_push("20:00")
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import all_checkin
+
+
+class FakeResponse:
+    def json(self):
+        return {"code": 200, "msg": "ok"}
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(("view", time.monotonic()))
+
+    def post(self, url, **kwargs):
+        self.calls.append(("comment", time.monotonic()))
+        return FakeResponse()
+
+
+class FakeKingbase(all_checkin.KingbaseClient):
+    view_delay = 0.2
+
+    def __init__(self):
+        super().__init__("alice", "pwd", reply_count=2, reply_interval=(0, 0))
+        self.session = FakeSession()
+        self.token = "token"
+        self.article_id = 42
+
+    def get_user_info(self):
+        return None
+
+
+def spacing(calls):
+    return [b[1] - a[1] for a, b in zip(calls, calls[1:]) if (a[0], b[0]) == ("view", "comment")]
+
+
+def test_blocking_reply_waits_between_view_and_comment():
+    client = FakeKingbase()
+    assert client.run_daily().ok
+    assert [call[0] for call in client.session.calls] == ["view", "comment"] * 2
+    assert min(spacing(client.session.calls)) >= 0.2
+
+
+def test_interleaved_reply_waits_on_the_loop():
+    client = FakeKingbase()
+    blocked = []
+
+    async def call(func, *args):
+        started = time.monotonic()
+        result = func(*args)
+        blocked.append(time.monotonic() - started)
+        return result
+
+    async def sleep(seconds):
+        await asyncio.sleep(seconds)
+
+    assert asyncio.run(client.run_interleaved(call, sleep)).ok
+    assert [call[0] for call in client.session.calls] == ["view", "comment"] * 2
+    assert min(spacing(client.session.calls)) >= 0.2
+    # 等待发生在事件循环上，没有占用线程池
+    assert max(blocked) < 0.2
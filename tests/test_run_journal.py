@@ -0,0 +1,29 @@
+from checkin_result import CheckinResult
+from run_journal import RunJournal
+
+
+def test_resume_state_survives_reopen(tmp_path):
+    path = str(tmp_path / "run_journal.jsonl")
+    journal = RunJournal(path, "2026-10-18")
+    journal.begin("03:00", {"modb": ["alice", "bob"]})
+    journal.record(CheckinResult.success(platform="modb", account="alice"))
+    journal.record(CheckinResult.failed("密码错误", platform="modb", account="bob"))
+    journal.close()
+
+    reopened = RunJournal(path, "2026-10-18")
+    assert reopened.unfinished
+    assert reopened.run == "03:00"
+    assert reopened.selection == {"modb": ["alice", "bob"]}
+    assert reopened.completed("modb", "alice").ok
+    assert reopened.completed("modb", "bob") is None
+    reopened.end()
+    reopened.close()
+    assert not RunJournal(path, "2026-10-18").unfinished
+
+
+def test_other_days_are_dropped(tmp_path):
+    path = str(tmp_path / "run_journal.jsonl")
+    journal = RunJournal(path, "2026-10-17")
+    journal.begin()
+    journal.close()
+    assert not RunJournal(path, "2026-10-18").begun
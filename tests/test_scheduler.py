@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import pytest
+
+from scheduler import CronExpression, Scheduler, ScheduleState, Trigger
+
+
+@pytest.mark.parametrize("text, moment, expected", [
+    ("03:00", datetime(2026, 10, 18, 2, 59), datetime(2026, 10, 18, 3, 0)),
+    ("03:00", datetime(2026, 10, 18, 3, 0), datetime(2026, 10, 19, 3, 0)),
+    ("*/15 * * * *", datetime(2026, 10, 18, 3, 1, 30), datetime(2026, 10, 18, 3, 15)),
+    ("0 9-17/4 * * *", datetime(2026, 10, 18, 13, 0), datetime(2026, 10, 18, 17, 0)),
+    ("@monthly", datetime(2026, 12, 15), datetime(2027, 1, 1)),
+    ("0 0 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29)),
+    # 2026-10-18 是周日
+    ("30 8 * * 1-5", datetime(2026, 10, 17, 9, 0), datetime(2026, 10, 19, 8, 30)),
+    ("0 0 * * 7", datetime(2026, 10, 17), datetime(2026, 10, 18)),
+])
+def test_next_after(text, moment, expected):
+    assert CronExpression(text).next_after(moment) == expected
+
+
+def test_day_and_weekday_match_either():
+    # 每月 1 日或每周一
+    cron = CronExpression("0 0 1 * 1")
+    assert cron.next_after(datetime(2026, 10, 18)) == datetime(2026, 10, 19)
+    assert cron.next_after(datetime(2026, 10, 26)) == datetime(2026, 11, 1)
+
+
+def test_stepped_wildcard_counts_as_unrestricted():
+    # 日字段为 */2 时只按周限定，两者都要满足
+    cron = CronExpression("0 0 */2 * 1")
+    assert cron.any_day
+    assert cron.next_after(datetime(2026, 10, 18)) == datetime(2026, 10, 19)
+    assert cron.next_after(datetime(2026, 10, 19)) == datetime(2026, 11, 9)
+
+
+@pytest.mark.parametrize("text", ["", "25:00", "0 0 31 2 *", "* * *", "61 * * * *", "a b c d e"])
+def test_invalid_expressions(text):
+    with pytest.raises(ValueError):
+        CronExpression(text)
+
+
+def trigger(key="03:00", window=0):
+    return Trigger(key, CronExpression(key), window, {"modb": {1}})
+
+
+def test_scheduler_schedules_next_fire():
+    schedule = Scheduler()
+    now = datetime(2026, 10, 18, 2, 0)
+    assert schedule.load([trigger()], now) == (["03:00"], [])
+    run_at, pending = schedule.peek()
+    assert run_at == datetime(2026, 10, 18, 3, 0)
+    assert pending.key == "03:00"
+    schedule.pop(run_at)
+    assert schedule.peek()[0] == datetime(2026, 10, 19, 3, 0)
+
+
+def test_scheduler_catches_up_missed_run_once():
+    state = ScheduleState()
+    state.mark("03:00", datetime(2026, 10, 15, 3, 0))
+    schedule = Scheduler(state, catchup=12 * 3600)
+    now = datetime(2026, 10, 18, 10, 0)
+    schedule.load([trigger()], now)
+    run_at, _ = schedule.peek()
+    assert run_at == now
+    schedule.pop(now)
+    assert state.last_fired("03:00") == datetime(2026, 10, 18, 3, 0).timestamp()
+    assert schedule.peek()[0] == datetime(2026, 10, 19, 3, 0)
+
+
+def test_scheduler_skips_missed_run_beyond_catchup():
+    state = ScheduleState()
+    state.mark("03:00", datetime(2026, 10, 17, 3, 0))
+    schedule = Scheduler(state, catchup=3600)
+    schedule.load([trigger()], datetime(2026, 10, 18, 10, 0))
+    assert schedule.peek()[0] == datetime(2026, 10, 19, 3, 0)
+
+
+def test_scheduler_window_and_oneshot():
+    schedule = Scheduler()
+    now = datetime(2026, 10, 18, 2, 0)
+    schedule.load([trigger(window=600)], now)
+    run_at, _ = schedule.peek()
+    assert datetime(2026, 10, 18, 3, 0) <= run_at <= datetime(2026, 10, 18, 3, 10)
+    schedule.run_soon(Trigger("03:00 新增账号", None, 0, {"modb": {"alice"}}), now)
+    schedule.run_soon(Trigger("03:00 新增账号", None, 0, {"pgfans": {"bob"}}), now)
+    assert schedule.peek()[0] == now
+    oneshot = schedule.pop(now)
+    assert oneshot.selection == {"modb": {"alice"}, "pgfans": {"bob"}}
+    # 临时触发器不影响原触发器的排期
+    assert schedule.peek()[0] == run_at
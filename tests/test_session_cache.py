@@ -0,0 +1,106 @@
+import time
+
+import pytest
+import requests
+
+import session_cache
+from session_cache import SessionCache, SessionExpired
+from transport import DeadlineExceeded
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SessionCache(str(tmp_path / "cache" / "session_cache.bin"), secret="test-secret")
+
+
+def test_save_load_invalidate(cache):
+    cache.save("kingbase", "alice", {"token": "t1"})
+    assert cache.load("kingbase", "alice") == {"token": "t1"}
+    assert cache.load("kingbase", "bob") is None
+    cache.invalidate("kingbase", "alice")
+    assert cache.load("kingbase", "alice") is None
+
+
+def test_expired_entry_is_ignored(cache):
+    cache.save("kingbase", "alice", {"token": "t1"}, expires=time.time() - 1)
+    assert cache.load("kingbase", "alice") is None
+
+
+def test_wrong_key_discards_cache(tmp_path, cache):
+    cache.save("kingbase", "alice", {"token": "t1"})
+    other = SessionCache(cache.path, secret="another-secret")
+    assert other.load("kingbase", "alice") is None
+
+
+def test_ciphertext_does_not_contain_state(cache):
+    cache.save("kingbase", "alice", {"token": "plain-token-value"})
+    with open(cache.path, "rb") as f:
+        assert b"plain-token-value" not in f.read()
+
+
+def test_generated_key_lives_outside_cache_dir(tmp_path):
+    key_path = tmp_path / "keys" / "session_cache.key"
+    cache = SessionCache(str(tmp_path / "cache" / "session_cache.bin"), key_path=str(key_path))
+    cache.save("kingbase", "alice", {"token": "t1"})
+    assert key_path.exists()
+    assert not (tmp_path / "cache" / "session_cache.bin.key").exists()
+    again = SessionCache(cache.path, key_path=str(key_path))
+    assert again.load("kingbase", "alice") == {"token": "t1"}
+
+
+def test_key_file_next_to_cache_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SessionCache(str(tmp_path / "session_cache.bin"), key_path=str(tmp_path / "session_cache.key"))
+
+
+class FakeClient:
+    platform = "kingbase"
+    account = "alice"
+
+    def __init__(self, probe):
+        self.probe = probe
+        self.session = requests.Session()
+
+    def import_session(self, state):
+        self.session.cookies.set("sid", state["sid"])
+
+    def probe_session(self):
+        if isinstance(self.probe, Exception):
+            raise self.probe
+        return self.probe
+
+
+@pytest.fixture
+def global_cache(cache):
+    session_cache._cache = cache
+    cache.save("kingbase", "alice", {"sid": "s1"})
+    yield cache
+    session_cache._cache = None
+
+
+def test_restore_session_reuses_valid_session(global_cache):
+    client = FakeClient(True)
+    assert session_cache.restore_session(client)
+    assert client.session.cookies.get("sid") == "s1"
+
+
+@pytest.mark.parametrize("probe", [False, SessionExpired("401")])
+def test_restore_session_invalidates_expired_session(global_cache, probe):
+    client = FakeClient(probe)
+    assert not session_cache.restore_session(client)
+    assert not client.session.cookies
+    assert global_cache.load("kingbase", "alice") is None
+
+
+def test_restore_session_keeps_cache_on_transport_error(global_cache):
+    client = FakeClient(requests.ConnectionError("reset"))
+    assert not session_cache.restore_session(client)
+    assert not client.session.cookies
+    assert global_cache.load("kingbase", "alice") == {"sid": "s1"}
+
+
+def test_restore_session_reraises_deadline(global_cache):
+    client = FakeClient(DeadlineExceeded("budget"))
+    with pytest.raises(DeadlineExceeded):
+        session_cache.restore_session(client)
+    assert global_cache.load("kingbase", "alice") == {"sid": "s1"}
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 请求追踪：transport 为每个请求生成一条 Span（平台、账号哈希、接口、状态码、字节数、
+各阶段耗时、重试次数），交给已配置的输出端——进程内汇总、JSON Lines 文件或 OpenTelemetry
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlparse
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+# Discuz 类站点用查询参数区分接口（如 misc.php?mod=seccode），这些参数计入接口名
+LABEL_QUERY_KEYS = ("mod", "action", "id")
+
+# applog 依赖本模块取当前平台和账号，这里直接使用 logging 避免循环导入
+log = logging.getLogger("autosign.tracing")
+
+
+def account_hash(account):
+    """账号只以哈希出现在追踪数据中"""
+    if not account:
+        return None
+    return hashlib.sha256(str(account).encode("utf-8")).hexdigest()[:12]
+
+
+def endpoint_label(url):
+    parsed = urlparse(url)
+    label = f"{parsed.hostname}{parsed.path}"
+    params = [f"{k}={v}" for k, v in parse_qsl(parsed.query) if k in LABEL_QUERY_KEYS]
+    return f"{label}?{'&'.join(params)}" if params else label
+
+
+class Span:
+    """一次 HTTP 请求
+
+    start 为开始时间（Unix 秒）；duration、wait、connect、tls、ttfb 均为秒：wait 为限速排队，
+    connect 为新建连接的 DNS 解析与 TCP 建连（复用连接时为 None），tls 为 TLS 握手，
+    ttfb 为发出请求到收到响应头；bytes 为响应体字节数（解压后）；retries 为同一账号对该接口的连续第几次重试（上一次调用出错或返回错误状态码后的再次调用才算重试）。
+    """
+    __slots__ = ("platform", "account", "method", "endpoint", "status", "bytes", "start", "duration",
+                 "wait", "connect", "tls", "ttfb", "retries", "error")
+
+    def __init__(self, method, endpoint, start, duration, status=None, bytes=None, wait=0.0, connect=None,
+                 tls=None, ttfb=None, error=None, platform=None, account=None, retries=0):
+        self.platform = platform
+        self.account = account
+        self.method = method
+        self.endpoint = endpoint
+        self.status = status
+        self.bytes = bytes
+        self.start = start
+        self.duration = duration
+        self.wait = wait
+        self.connect = connect
+        self.tls = tls
+        self.ttfb = ttfb
+        self.retries = retries
+        self.error = error
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        for name in ("duration", "wait", "connect", "tls", "ttfb"):
+            if data[name] is not None:
+                data[name] = round(data[name], 4)
+        return data
+
+
+class Scope:
+    """当前线程正在处理的平台和账号；last 记录账号内每个接口最近一次调用的 (重试次数, 是否失败)"""
+    __slots__ = ("platform", "account", "last")
+
+    def __init__(self, platform=None, account=None):
+        self.platform = platform
+        self.account = account_hash(account)
+        self.last = {}
+
+
+_local = threading.local()
+
+
+@contextmanager
+def activate(scope):
+    """在当前线程启用已有的 Scope（同一账号的调用分散在多个工作线程时使用）"""
+    previous = getattr(_local, "scope", None)
+    _local.scope = scope
+    try:
+        yield scope
+    finally:
+        _local.scope = previous
+
+
+def scope(platform=None, account=None):
+    return activate(Scope(platform, account))
+
+
+def current():
+    """当前线程的 Scope，未在账号上下文中时为 None"""
+    return getattr(_local, "scope", None)
+
+
+class MemorySink:
+    """按 平台 × 接口 汇总请求数、错误数和耗时分布，运行结束后打印"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def emit(self, span):
+        key = (span.platform or "-", span.endpoint)
+        with self._lock:
+            entry = self.stats.setdefault(key, {"count": 0, "errors": 0, "retries": 0, "bytes": 0,
+                                                "durations": [], "connect": 0.0, "tls": 0.0, "ttfb": 0.0})
+            entry["count"] += 1
+            entry["errors"] += bool(span.error or (span.status or 0) >= 500)
+            entry["retries"] += bool(span.retries)
+            entry["bytes"] += span.bytes or 0
+            entry["durations"].append(span.duration)
+            entry["connect"] += span.connect or 0.0
+            entry["tls"] += span.tls or 0.0
+            entry["ttfb"] += span.ttfb or 0.0
+
+    def summary(self):
+        rows = []
+        with self._lock:
+            for (platform, endpoint), entry in self.stats.items():
+                durations = sorted(entry["durations"])
+                count = entry["count"]
+                rows.append({
+                    "platform": platform, "endpoint": endpoint, "count": count, "errors": entry["errors"],
+                    "retries": entry["retries"], "bytes": entry["bytes"],
+                    "total_s": round(sum(durations), 3),
+                    "mean_ms": round(sum(durations) / count * 1000, 1),
+                    "p95_ms": round(durations[min(count - 1, int(count * 0.95))] * 1000, 1),
+                    "max_ms": round(durations[-1] * 1000, 1),
+                    "connect_ms": round(entry["connect"] / count * 1000, 1),
+                    "tls_ms": round(entry["tls"] / count * 1000, 1),
+                    "ttfb_ms": round(entry["ttfb"] / count * 1000, 1),
+                })
+        return sorted(rows, key=lambda row: -row["total_s"])
+
+    def report(self):
+        rows = self.summary()
+        if not rows:
+            return
+        log.info("[追踪] 各接口耗时（按总耗时排序）:")
+        for row in rows:
+            log.info("[追踪] %-10s %-60s 次数 %4s 错误 %3s 平均 %7sms p95 %7sms 建连 %6sms TLS %6sms 首字节 %7sms",
+                     row["platform"], row["endpoint"], row["count"], row["errors"], row["mean_ms"], row["p95_ms"],
+                     row["connect_ms"], row["tls_ms"], row["ttfb_ms"])
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+
+class JsonlSink:
+    """每个 Span 追加为 JSON Lines 文件中的一行"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class OTelSink:
+    """把 Span 转成 OpenTelemetry span；导出目标由 opentelemetry-sdk 的环境变量或代码配置决定"""
+
+    def __init__(self, name="autosign"):
+        if otel_trace is None:
+            raise RuntimeError("请安装 opentelemetry-api 库: pip install opentelemetry-api opentelemetry-sdk")
+        self.tracer = otel_trace.get_tracer(name)
+
+    def emit(self, span):
+        attributes = {
+            "http.request.method": span.method,
+            "http.response.status_code": span.status,
+            "autosign.platform": span.platform,
+            "autosign.account": span.account,
+            "autosign.endpoint": span.endpoint,
+            "autosign.bytes": span.bytes,
+            "autosign.retries": span.retries,
+            "autosign.wait_s": span.wait,
+            "autosign.connect_s": span.connect,
+            "autosign.tls_s": span.tls,
+            "autosign.ttfb_s": span.ttfb,
+            "error.type": span.error,
+        }
+        otel_span = self.tracer.start_span(f"{span.method} {span.endpoint}", start_time=int(span.start * 1e9),
+                                           attributes={k: v for k, v in attributes.items() if v is not None})
+        if span.error:
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int((span.start + span.duration) * 1e9))
+
+
+_lock = threading.Lock()
+_sinks = []
+
+
+def enabled():
+    return bool(_sinks)
+
+
+def add_sink(sink):
+    with _lock:
+        _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    with _lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def configure(tracing_cfg, resolve=None):
+    """按配置重建输出端
+
+    tracing_cfg 支持 summary（运行结束后打印各接口耗时汇总）、jsonl（Span 写入的文件路径）
+    和 otel（是否输出到 OpenTelemetry）；resolve 用于解析相对路径。
+    """
+    sinks = []
+    if tracing_cfg.get("summary"):
+        sinks.append(MemorySink())
+    if tracing_cfg.get("jsonl"):
+        path = tracing_cfg["jsonl"]
+        sinks.append(JsonlSink(resolve(path) if resolve else path))
+    if tracing_cfg.get("otel"):
+        try:
+            sinks.append(OTelSink())
+        except RuntimeError as e:
+            log.warning("[追踪] OpenTelemetry 输出未启用: %s", e)
+    with _lock:
+        for sink in _sinks:
+            if hasattr(sink, "close"):
+                sink.close()
+        _sinks[:] = sinks
+
+
+def http_span(method, url, start, duration, **fields):
+    """补全当前线程的平台、账号和重试次数后交给各输出端"""
+    scope = current()
+    endpoint = endpoint_label(url)
+    span = Span(method, endpoint, start, duration, **fields)
+    if scope is not None:
+        key = (method, endpoint)
+        # 同一接口的正常重复调用（如 Kingbase 多次回帖）不算重试，只有上一次失败后的再次调用才算
+        retries, failed = scope.last.get(key, (0, False))
+        span.retries = retries + 1 if failed else 0
+        scope.last[key] = (span.retries, span.error is not None or (span.status or 0) >= 400)
+        span.platform = scope.platform
+        span.account = scope.account
+    return emit(span)
+
+
+def emit(span):
+    """把已补全的 Span 交给各输出端（多进程模式下主进程用它转发工作进程的 Span）"""
+    for sink in list(_sinks):
+        try:
+            sink.emit(span)
+        except Exception as e:
+            log.warning("[追踪] 输出 Span 失败: %s", e)
+    return span
+
+
+def report():
+    """打印并清空进程内汇总，刷新文件输出"""
+    for sink in list(_sinks):
+        if isinstance(sink, MemorySink):
+            sink.report()
+            sink.reset()
+        elif hasattr(sink, "flush"):
+            sink.flush()
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+共享 HTTP 传输层：所有客户端通过 new_session 创建会话，
+同一主机的连接池在账号之间复用（keep-alive），并统一默认超时与各平台默认请求头
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import rate_limit
+import tracing
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+# 各平台默认请求头，单个请求的特殊头仍由客户端在调用时传入
+HEADER_PROFILES = {
+    "kingbase": {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0",
+    },
+    "oceanbase": {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0",
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+        "Content-Type": "application/json"
+    },
+    "pgfans": {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0',
+        'Accept': 'application/json, text/plain, */*',
+        'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
+        'Accept-Encoding': 'gzip, deflate, br, zstd',
+        'Content-type': 'application/x-www-form-urlencoded; charset=UTF-8',
+        'Origin': 'https://www.pgfans.cn',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Referer': 'https://www.pgfans.cn/',
+        'Sec-Fetch-Dest': 'empty',
+        'Sec-Fetch-Mode': 'cors',
+        'Sec-Fetch-Site': 'same-site',
+        'Priority': 'u=0'
+    },
+    "modb": {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'application/json, text/plain, */*',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Sec-Fetch-Dest': 'empty',
+        'Sec-Fetch-Mode': 'cors',
+        'Sec-Fetch-Site': 'same-origin'
+    },
+    "gbase": {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0',
+        'Accept': '*/*',
+        'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
+        'Accept-Encoding': 'gzip, deflate, br, zstd',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+    },
+    "tidb": {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:139.0) Gecko/20100101 Firefox/139.0",
+        "Accept": "application/json, text/plain, */*",
+        "Accept-Language": "zh-hans",
+        "Origin": "https://pingkai.cn",
+        "Referer": "https://pingkai.cn/accounts/login?redirect_to=https%3A%2F%2Ftidb.net%2Fmember",
+        "DNT": "1"
+    },
+    "greatsql": {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:141.0) Gecko/20100101 Firefox/141.0',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+        'Accept-Language': 'zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1'
+    },
+    "pushplus": {},
+}
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """当前运行或账号的时间预算已用完"""
+
+
+_local = threading.local()
+
+
+@contextmanager
+def deadline(seconds=None, until=None):
+    """为当前线程设置截止时间（time.monotonic 时间点），与外层截止时间取较早者"""
+    previous = getattr(_local, "deadline", None)
+    candidates = [d for d in (previous, until) if d is not None]
+    if seconds:
+        candidates.append(time.monotonic() + seconds)
+    _local.deadline = min(candidates) if candidates else None
+    try:
+        yield _local.deadline
+    finally:
+        _local.deadline = previous
+
+
+def remaining():
+    """当前线程剩余的时间预算（秒），未设置截止时间时返回 None"""
+    current = getattr(_local, "deadline", None)
+    if current is None:
+        return None
+    return current - time.monotonic()
+
+
+def expired():
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def sleep(seconds):
+    """受时间预算约束的等待，预算不足以等完时等到截止并抛出 DeadlineExceeded"""
+    left = remaining()
+    if left is not None and seconds >= left:
+        time.sleep(max(left, 0))
+        raise DeadlineExceeded("时间预算已用完")
+    time.sleep(seconds)
+
+
+def _redirect(request):
+    """配置了 redirect_to 时把请求改发到该地址（如本地模拟服务器），原主机名放在 X-Original-Host 请求头"""
+    target = _settings["redirect_to"]
+    if not target:
+        return request
+    original = urlparse(request.url)
+    base = urlparse(target)
+    redirected = request.copy()
+    redirected.url = original._replace(scheme=base.scheme, netloc=base.netloc).geturl()
+    redirected.headers["X-Original-Host"] = original.netloc
+    return redirected
+
+
+def _clamp(timeout, left):
+    if isinstance(timeout, tuple):
+        return tuple(left if t is None else min(t, left) for t in timeout)
+    return min(timeout, left)
+
+
+def _record_timing(phase, seconds):
+    timing = getattr(_local, "timing", None)
+    if timing is not None:
+        timing[phase] = timing.get(phase, 0.0) + seconds
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        started = time.perf_counter()
+        sock = super()._new_conn()
+        _record_timing("connect", time.perf_counter() - started)
+        return sock
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        started = time.perf_counter()
+        sock = super()._new_conn()
+        _record_timing("connect", time.perf_counter() - started)
+        return sock
+
+    def connect(self):
+        started = time.perf_counter()
+        timing = getattr(_local, "timing", None)
+        before = timing.get("connect", 0.0) if timing is not None else 0.0
+        super().connect()
+        if timing is not None:
+            # connect() 包含 _new_conn 的建连时间，其余为 TLS 握手
+            _record_timing("tls", time.perf_counter() - started - (timing.get("connect", 0.0) - before))
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """多个 Session 共享的适配器
+
+    未显式指定超时的请求使用默认的连接/读取超时，并且所有超时都不超过当前线程剩余的时间预算；
+    发送前按目标主机的令牌桶限速排队；启用追踪时为每个请求生成 tracing.Span。
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, connect_timeout=DEFAULT_CONNECT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # 新建连接时记录建连与 TLS 握手耗时
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool,
+                                                   "https": _TimedHTTPSConnectionPool}
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = (self.connect_timeout, self.timeout)
+        if expired():
+            raise DeadlineExceeded(f"时间预算已用完，放弃请求 {request.url}")
+        wait = rate_limit.reserve(urlparse(request.url).hostname)
+        if wait > 0:
+            sleep(wait)
+        left = remaining()
+        if left is not None:
+            if left <= 0:
+                raise DeadlineExceeded(f"时间预算已用完，放弃请求 {request.url}")
+            timeout = _clamp(timeout, left)
+        if not tracing.enabled():
+            return self._send(request, timeout, **kwargs)
+        return self._traced_send(request, timeout, max(wait, 0.0), **kwargs)
+
+    def _send(self, request, timeout, **kwargs):
+        target = _redirect(request)
+        response = super().send(target, timeout=timeout, **kwargs)
+        if target is not request:
+            # 对调用方保持原始 URL，cookie 和重定向仍按原主机处理
+            response.url = request.url
+            response.request = request
+        return response
+
+    def _traced_send(self, request, timeout, wait, **kwargs):
+        _local.timing = timing = {}
+        start = time.time()
+        started = time.perf_counter()
+        response = error = ttfb = None
+        try:
+            response = self._send(request, timeout, **kwargs)
+            ttfb = time.perf_counter() - started - timing.get("connect", 0.0) - timing.get("tls", 0.0)
+            if not kwargs.get("stream"):
+                # 与 Session.send 一样在此读完响应体，耗时和字节数包含下载
+                response.content
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _local.timing = None
+            size = None
+            if response is not None:
+                size = len(response.content) if not kwargs.get("stream") and error is None \
+                    else int(response.headers.get("Content-Length") or 0) or None
+            tracing.http_span(request.method, request.url, start, time.perf_counter() - started,
+                              status=response.status_code if response is not None else None, bytes=size,
+                              wait=wait, connect=timing.get("connect"), tls=timing.get("tls"), ttfb=ttfb,
+                              error=error)
+
+    def close(self):
+        # 连接池由所有会话共享，单个 Session.close() 不应关闭它，统一由 close_all 释放
+        pass
+
+    def shutdown(self):
+        super().close()
+
+
+_lock = threading.Lock()
+_settings = {"timeout": DEFAULT_TIMEOUT, "connect_timeout": DEFAULT_CONNECT_TIMEOUT,
+             "pool_maxsize": DEFAULT_POOL_MAXSIZE, "hosts": {}, "redirect_to": None}
+_default_adapter = None
+_host_adapters = {}
+
+
+def configure(http_cfg):
+    """按配置重建连接池
+
+    http_cfg 支持 timeout（读取超时，秒）、connect_timeout（连接超时，秒）、pool_maxsize（每主机连接数）、
+    hosts（{主机名: 连接数}，为个别主机单独指定连接池大小）和 redirect_to（把所有请求改发到该地址，用于本地模拟服务器）。
+    """
+    with _lock:
+        _close_adapters()
+        _settings["timeout"] = float(http_cfg.get("timeout") or DEFAULT_TIMEOUT)
+        _settings["connect_timeout"] = float(http_cfg.get("connect_timeout") or DEFAULT_CONNECT_TIMEOUT)
+        _settings["pool_maxsize"] = int(http_cfg.get("pool_maxsize") or DEFAULT_POOL_MAXSIZE)
+        _settings["hosts"] = dict(http_cfg.get("hosts") or {})
+        _settings["redirect_to"] = http_cfg.get("redirect_to") or None
+        _shared.clear()
+
+
+def _close_adapters():
+    global _default_adapter
+    for adapter in list(_host_adapters.values()) + [_default_adapter]:
+        if adapter is not None:
+            adapter.shutdown()
+    _host_adapters.clear()
+    _default_adapter = None
+
+
+def close_all():
+    with _lock:
+        _close_adapters()
+
+
+def _adapter(maxsize):
+    return PooledAdapter(timeout=_settings["timeout"], connect_timeout=_settings["connect_timeout"], pool_connections=16,
+                         pool_maxsize=maxsize, pool_block=False)
+
+
+def _get_adapters():
+    global _default_adapter
+    with _lock:
+        if _default_adapter is None:
+            _default_adapter = _adapter(_settings["pool_maxsize"])
+        for host, size in _settings["hosts"].items():
+            if host not in _host_adapters:
+                _host_adapters[host] = _adapter(int(size))
+        return _default_adapter, dict(_host_adapters)
+
+
+def new_session(profile=None):
+    """创建挂载共享连接池的 Session，profile 为平台名，对应 HEADER_PROFILES 中的默认请求头"""
+    session = requests.Session()
+    default_adapter, host_adapters = _get_adapters()
+    session.mount("https://", default_adapter)
+    session.mount("http://", default_adapter)
+    for host, adapter in host_adapters.items():
+        session.mount(f"https://{host}", adapter)
+        session.mount(f"http://{host}", adapter)
+    if profile:
+        session.headers.update(HEADER_PROFILES.get(profile, {}))
+    return session
+
+
+_shared = {}
+
+
+def shared_session(profile):
+    """无需隔离 cookie 的场景（如消息推送）复用同一个 Session"""
+    with _lock:
+        session = _shared.get(profile)
+    if session is None:
+        session = new_session(profile)
+        with _lock:
+            session = _shared.setdefault(profile, session)
+    return session
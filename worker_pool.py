@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+多进程工作模式：按 平台+账号 哈希把账号分到多个工作进程，绕开单进程 GIL 对加解密、验证码识别和
+JSON 解析的限制；工作进程的结果、指标增量和请求追踪经队列流式发回主进程汇总
+"""
+
+import hashlib
+import multiprocessing
+import queue as queue_module
+
+import applog
+import metrics
+import tracing
+
+log = applog.get_logger("worker")
+
+# 固定用 spawn 启动工作进程：不继承主进程的线程和锁，各平台行为一致；传给工作进程的共享对象也须由它创建
+CONTEXT = multiprocessing.get_context("spawn")
+
+_queue = None
+
+
+def shard_of(platform, account, shards):
+    """账号所属的工作进程序号，同一账号每次都分到同一个进程"""
+    digest = hashlib.sha256(f"{platform}:{account}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shards
+
+
+class QueueSink:
+    """工作进程中的 tracing 输出端：Span 发回主进程，由主进程的输出端统一处理"""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def emit(self, span):
+        self.queue.put(("span", span.to_dict()))
+
+
+def publish(result):
+    """在工作进程中把单个账号的结果连同指标增量发回主进程；不在工作进程中时返回 False"""
+    if _queue is None:
+        return False
+    _queue.put(("result", result.to_dict(), metrics.drain()))
+    return True
+
+
+def _worker(target, shard, queue, forward_spans, args):
+    global _queue
+    _queue = queue
+    tracing.configure({})
+    if forward_spans:
+        tracing.add_sink(QueueSink(queue))
+    try:
+        target(shard, *args)
+    except Exception as e:
+        log.exception("[工作进程] 第 %s 号工作进程异常: %s", shard, e)
+    finally:
+        queue.put(("done", shard, metrics.drain()))
+
+
+def run(target, shards, args, on_result, forward_spans=False):
+    """启动 shards 个工作进程执行 target(shard, *args)，逐条回调 on_result(结果字典)，全部结束后返回
+
+    args 中可以包含由 CONTEXT 创建的共享内存对象（如 rate_limit.share(CONTEXT) 的令牌桶），只能在启动进程时传入。
+    工作进程异常退出时不再等待它，未返回的账号由调用方处理。
+    """
+    queue = CONTEXT.Queue()
+    processes = [CONTEXT.Process(target=_worker, args=(target, shard, queue, forward_spans, args),
+                                 name=f"checkin-{shard}", daemon=True) for shard in range(shards)]
+    for process in processes:
+        process.start()
+    pending = set(range(shards))
+    while pending:
+        try:
+            message = queue.get(timeout=1)
+        except queue_module.Empty:
+            for shard in list(pending):
+                if not processes[shard].is_alive():
+                    log.error("[工作进程] 第 %s 号工作进程异常退出，退出码 %s", shard, processes[shard].exitcode)
+                    pending.discard(shard)
+            continue
+        kind = message[0]
+        if kind == "result":
+            metrics.merge(message[2])
+            on_result(message[1])
+        elif kind == "span":
+            tracing.emit(tracing.Span(**message[1]))
+        elif kind == "done":
+            metrics.merge(message[2])
+            pending.discard(message[1])
+    for process in processes:
+        process.join(timeout=5)